@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Backfill the PhoneIndex and CourseIndex keys on existing enquiries.
+
+Enquiries stored before those indexes existed have no `phone` or
+`course` attribute, so the indexes (and GET /enquiries?phone=... or
+?course=...) don't see them. This scans EnquiryTable with a parallel
+segmented Scan and sets the missing attributes the way /submit does:
+`phone` is contactNumber in E.164 and `course` is the first complete
+child's course (enquiries.primary_course). Attributes that are already
+set are left alone, so the script can be re-run, e.g. after a partial
+run. Enquiries whose contact number or children give no value are
+counted as skipped.
+
+Run it after the deploy that adds the index.
+
+Usage (from Backend/):
+    python backfill_enquiry_indexes.py --dry-run
+    python backfill_enquiry_indexes.py --segments 8
+    python backfill_enquiry_indexes.py --endpoint-url http://localhost:8000
+"""
+import argparse
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent / 'lambda_functions'))
+
+import core  # noqa: E402
+import enquiries  # noqa: E402
+
+
+def index_keys(item):
+    """The missing phone/course attributes of a raw ENQUIRY# item, as {name: value}."""
+    keys = {}
+    if 'phone' not in item:
+        phone = core.to_e164(item.get('contactNumber', {}).get('S'))
+        if phone:
+            keys['phone'] = phone
+    if 'course' not in item:
+        children = core.from_attribute(item['children']) if 'children' in item else []
+        course = enquiries.primary_course(children if isinstance(children, list) else [])
+        if course:
+            keys['course'] = course
+    return keys
+
+
+def backfill_segment(client, table, segment, total_segments, page_size, dry_run, stats, lock):
+    kwargs = {
+        'TableName': table,
+        'Segment': segment,
+        'TotalSegments': total_segments,
+        'FilterExpression': 'begins_with(PK, :prefix) AND '
+                            '(attribute_not_exists(phone) OR attribute_not_exists(course))',
+        'ExpressionAttributeValues': {':prefix': {'S': 'ENQUIRY#'}},
+        'Limit': page_size,
+    }
+    while True:
+        response = client.scan(**kwargs)
+        for item in response.get('Items', []):
+            keys = index_keys(item)
+            if keys and not dry_run:
+                # if_not_exists: a concurrent /submit or re-run has the last word
+                client.update_item(
+                    TableName=table,
+                    Key={'PK': item['PK']},
+                    UpdateExpression='SET ' + ', '.join(f'#{name} = if_not_exists(#{name}, :{name})'
+                                                        for name in keys),
+                    ConditionExpression='attribute_exists(PK)',
+                    ExpressionAttributeNames={f'#{name}': name for name in keys},
+                    ExpressionAttributeValues={f':{name}': {'S': value} for name, value in keys.items()},
+                )
+            with lock:
+                stats['scanned'] += 1
+                stats['updated' if keys else 'skipped'] += 1
+        if 'LastEvaluatedKey' not in response:
+            return
+        kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+
+def backfill(client, table, segments=4, page_size=500, dry_run=False):
+    """
+    Set the missing phone/course attributes on every ENQUIRY# item.
+    Returns counts: scanned (items missing either), updated and skipped.
+    """
+    stats = {'scanned': 0, 'updated': 0, 'skipped': 0}
+    lock = threading.Lock()
+    with ThreadPoolExecutor(max_workers=segments) as pool:
+        futures = [
+            pool.submit(backfill_segment, client, table, segment, segments, page_size, dry_run, stats, lock)
+            for segment in range(segments)
+        ]
+        for future in futures:
+            future.result()
+    return stats
+
+
+def make_client(segments, endpoint_url=None, region=None):
+    import boto3
+    from botocore.config import Config
+
+    config = Config(max_pool_connections=max(10, segments), retries={'mode': 'adaptive', 'max_attempts': 10})
+    return boto3.client('dynamodb', endpoint_url=endpoint_url, region_name=region, config=config)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--table', default='EnquiryTable')
+    parser.add_argument('--segments', type=int, default=4)
+    parser.add_argument('--page-size', type=int, default=500)
+    parser.add_argument('--dry-run', action='store_true', help='count what would change without writing')
+    parser.add_argument('--endpoint-url', help='e.g. http://localhost:8000 for DynamoDB Local')
+    parser.add_argument('--region')
+    args = parser.parse_args()
+
+    stats = backfill(make_client(args.segments, args.endpoint_url, args.region), args.table,
+                     segments=args.segments, page_size=args.page_size, dry_run=args.dry_run)
+    verb = 'Would update' if args.dry_run else 'Updated'
+    print(f"{verb} {stats['updated']} of {stats['scanned']} enquiries missing phone or course; "
+          f"{stats['skipped']} had nothing to set", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Export throughput benchmark against DynamoDB Local.
+
+Creates a synthetic EnquiryTable in a local DynamoDB (e.g.
+`docker run -p 8000:8000 amazon/dynamodb-local`), loads it with enquiries
+and runs export_enquiries.export() to a discarded CSV stream at several
+segment counts, so the scaling of the parallel Scan is visible.
+
+Usage (from Backend/):
+    python benchmarks/export_bench.py
+    python benchmarks/export_bench.py --items 200000 --segments 1 2 4 8 16 32
+    python benchmarks/export_bench.py --skip-load   # reuse an already loaded table
+"""
+import argparse
+import os
+import random
+import sys
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import export_enquiries  # noqa: E402
+
+COURSES = ['ucmas', 'robotics', 'coding', 'chess']
+BATCH_SIZE = 25
+
+
+def create_table(client, table):
+    existing = client.list_tables()['TableNames']
+    if table in existing:
+        client.delete_table(TableName=table)
+        client.get_waiter('table_not_exists').wait(TableName=table)
+    client.create_table(
+        TableName=table,
+        AttributeDefinitions=[{'AttributeName': 'PK', 'AttributeType': 'S'}],
+        KeySchema=[{'AttributeName': 'PK', 'KeyType': 'HASH'}],
+        BillingMode='PAY_PER_REQUEST',
+    )
+    client.get_waiter('table_exists').wait(TableName=table)
+
+
+def synthetic_item(index, start):
+    enquiry_id = str(uuid.uuid4())
+    children = [
+        {'M': {
+            'id': {'S': str(n + 1)},
+            'name': {'S': f'Child {index}-{n}'},
+            'age': {'S': str(random.randint(4, 14))},
+            'selectedCourse': {'S': random.choice(COURSES)},
+        }}
+        for n in range(random.randint(1, 3))
+    ]
+    return {
+        'PK': {'S': f'ENQUIRY#{enquiry_id}'},
+        'enquiryId': {'S': enquiry_id},
+        'children': {'L': children},
+        'parentName': {'S': f'Parent {index}'},
+        'contactNumber': {'S': '123-456-7890'},
+        'phone': {'S': '+11234567890'},
+        'course': children[0]['M']['selectedCourse'],
+        'email': {'S': f'parent{index}@example.com'},
+        'consent': {'BOOL': True},
+        'formDate': {'S': '10/23/2025'},
+        'submittedAt': {'S': (start + timedelta(seconds=index)).isoformat()},
+        'status': {'S': 'pending'},
+    }
+
+
+def load(client, table, items, workers):
+    start = datetime.now(timezone.utc) - timedelta(seconds=items)
+
+    def write_batch(offset):
+        requests = [
+            {'PutRequest': {'Item': synthetic_item(i, start)}}
+            for i in range(offset, min(offset + BATCH_SIZE, items))
+        ]
+        pending = {table: requests}
+        while pending:
+            pending = client.batch_write_item(RequestItems=pending).get('UnprocessedItems') or None
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(write_batch, range(0, items, BATCH_SIZE)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--endpoint-url', default='http://localhost:8000')
+    parser.add_argument('--table', default='EnquiryExportBench')
+    parser.add_argument('--items', type=int, default=50000)
+    parser.add_argument('--segments', type=int, nargs='+', default=[1, 2, 4, 8, 16])
+    parser.add_argument('--skip-load', action='store_true')
+    args = parser.parse_args()
+
+    # DynamoDB Local accepts any credentials and region
+    os.environ.setdefault('AWS_ACCESS_KEY_ID', 'local')
+    os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'local')
+    region = os.environ.get('AWS_DEFAULT_REGION', 'us-east-1')
+
+    client = export_enquiries.make_client(max(args.segments), args.endpoint_url, region)
+    if not args.skip_load:
+        print(f"Loading {args.items} synthetic enquiries into {args.table}...")
+        create_table(client, args.table)
+        load(client, args.table, args.items, workers=16)
+
+    print(f"{'segments':>8}  {'items':>8}  {'rows':>8}  {'seconds':>8}  {'items/s':>10}  {'speedup':>7}")
+    baseline = None
+    with open(os.devnull, 'w', newline='') as devnull:
+        for segments in args.segments:
+            stats = export_enquiries.export(client, args.table, export_enquiries.CsvWriter(devnull),
+                                            segments=segments)
+            baseline = baseline or stats['itemsPerSecond']
+            print(f"{segments:>8}  {stats['items']:>8}  {stats['rows']:>8}  {stats['seconds']:>8.2f}  "
+                  f"{stats['itemsPerSecond']:>10.0f}  {stats['itemsPerSecond'] / baseline:>6.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,181 @@
+"""
+In-process stand-ins for the AWS and Google Sheets clients the handlers use.
+
+Install them with core.set_client() / sheets.set_client(). Every fake takes a
+`latency` in seconds that is slept on each call, to model network round trips.
+The DynamoDB fake is storage.MemoryEngine plus those knobs; import this
+module after putting lambda_functions on sys.path.
+"""
+import random
+import threading
+import time
+
+import storage
+
+# Kept for scripts written against the old names
+FakeClientError = storage.ClientError
+
+
+class FakeDynamoDB(storage.MemoryEngine):
+    """
+    storage.MemoryEngine with the call counts, latency and throttling the
+    benchmarks model. With `unprocessed_rate` set, that fraction of
+    batch_write_item requests is returned as UnprocessedItems.
+    """
+
+    def __init__(self, latency=0.0, unprocessed_rate=0.0):
+        super().__init__()
+        self.latency = latency
+        self.unprocessed_rate = unprocessed_rate
+        self.calls = {}
+        self._calls_lock = threading.Lock()
+
+    def _call(self, name):
+        with self._calls_lock:
+            self.calls[name] = self.calls.get(name, 0) + 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def _unprocessed(self, request):
+        return self.unprocessed_rate and random.random() < self.unprocessed_rate
+
+
+def stream_record(item, event_name='INSERT'):
+    """
+    Wrap a low-level DynamoDB item as an EnquiryTable stream record
+    (NEW_IMAGE view), as delivered to the stream worker.
+    """
+    return {
+        'eventName': event_name,
+        'eventSource': 'aws:dynamodb',
+        'dynamodb': {
+            'Keys': {'PK': item['PK']},
+            'NewImage': item,
+            'StreamViewType': 'NEW_IMAGE',
+        },
+    }
+
+
+class FakeSNS:
+    """
+    Records published messages. `failures` is a list of error codes raised
+    by successive publish calls before they start succeeding.
+    """
+
+    def __init__(self, latency=0.0, failures=None):
+        self.latency = latency
+        self.failures = list(failures or [])
+        self.messages = []
+
+    def publish(self, **kwargs):
+        if self.latency:
+            time.sleep(self.latency)
+        if self.failures:
+            raise FakeClientError(self.failures.pop(0))
+        self.messages.append(kwargs)
+        return {'MessageId': str(len(self.messages))}
+
+
+class FakeSQS:
+    """
+    In-memory queue. receive_event() turns pending messages into the event
+    an SQS-triggered Lambda receives, and requeue() puts back the ones a
+    handler reported as batch item failures.
+    """
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.pending = []
+        self.in_flight = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    def send_message(self, QueueUrl, MessageBody, **kwargs):
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            self._next_id += 1
+            message_id = str(self._next_id)
+            self.pending.append({'messageId': message_id, 'body': MessageBody, 'receiveCount': 0})
+        return {'MessageId': message_id}
+
+    def receive_event(self, max_messages=10):
+        with self._lock:
+            batch, self.pending = self.pending[:max_messages], self.pending[max_messages:]
+            records = []
+            for message in batch:
+                message['receiveCount'] += 1
+                self.in_flight[message['messageId']] = message
+                records.append({
+                    'messageId': message['messageId'],
+                    'body': message['body'],
+                    'attributes': {'ApproximateReceiveCount': str(message['receiveCount'])},
+                    'eventSource': 'aws:sqs',
+                })
+        return {'Records': records}
+
+    def requeue(self, result):
+        with self._lock:
+            failed = {f['itemIdentifier'] for f in (result or {}).get('batchItemFailures', [])}
+            for message_id in list(self.in_flight):
+                message = self.in_flight.pop(message_id)
+                if message_id in failed:
+                    self.pending.append(message)
+
+
+class FakeWorksheet:
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.rows = []
+        self.calls = {}
+
+    def _call(self, name):
+        self.calls[name] = self.calls.get(name, 0) + 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def append_row(self, row, **kwargs):
+        self._call('append_row')
+        self.rows.append(list(row))
+
+    def append_rows(self, rows, **kwargs):
+        self._call('append_rows')
+        self.rows.extend(list(row) for row in rows)
+
+    def col_values(self, col, **kwargs):
+        self._call('col_values')
+        return [row[col - 1] if len(row) >= col else '' for row in self.rows]
+
+    def delete_rows(self, start_index, end_index=None):
+        self._call('delete_rows')
+        del self.rows[start_index - 1:end_index or start_index]
+
+
+class FakeSpreadsheet:
+    def __init__(self, worksheet, latency=0.0):
+        self._worksheet = worksheet
+        self.latency = latency
+
+    def worksheet(self, name):
+        if self.latency:
+            time.sleep(self.latency)
+        return self._worksheet
+
+
+class FakeGspreadClient:
+    """
+    Stand-in for an authorized gspread client; every open_by_key() and
+    worksheet() call costs one `latency`, like the real metadata requests.
+    """
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.worksheet = FakeWorksheet(latency)
+        self.opens = 0
+
+    def open_by_key(self, key):
+        self.opens += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return FakeSpreadsheet(self.worksheet, self.latency)
+
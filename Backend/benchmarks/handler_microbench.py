@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Per-request overhead microbenchmark for the API handlers.
+
+Drives each handler with synthetic API Gateway proxy events against the
+in-process fakes (no network), and reports the cost of the full handler
+next to the business logic alone (the function wrapped by
+core.api_handler), so the framework overhead is visible. Ends with the
+per-call percentiles metrics.py aggregated in local mode.
+
+Usage (from Backend/):
+    python benchmarks/handler_microbench.py
+    python benchmarks/handler_microbench.py --iterations 20000
+    python benchmarks/handler_microbench.py --storage sqlite
+"""
+import argparse
+import contextlib
+import json
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'lambda_functions'))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import core  # noqa: E402
+import metrics  # noqa: E402
+import storage  # noqa: E402
+import tokens  # noqa: E402
+from fakes import FakeDynamoDB, FakeSQS  # noqa: E402
+
+import request_otp_handler  # noqa: E402
+import submit_enquiry_handler  # noqa: E402
+import verify_otp_handler  # noqa: E402
+
+
+def api_event(method, path, body=None, headers=None):
+    """Build a minimal API Gateway REST (v1) proxy event."""
+    return {
+        'resource': path,
+        'path': path,
+        'httpMethod': method,
+        'headers': {'Content-Type': 'application/json', 'x-api-key': 'bench', **(headers or {})},
+        'queryStringParameters': None,
+        'pathParameters': None,
+        'requestContext': {'stage': 'v1', 'httpMethod': method, 'resourcePath': path},
+        'body': None if body is None else json.dumps(body),
+        'isBase64Encoded': False,
+    }
+
+
+SUBMIT_BODY = {
+    'children': [{'id': '1', 'name': 'John Doe', 'age': '8', 'selectedCourse': 'ucmas'}],
+    'parentName': 'Jane Doe',
+    'contactNumber': '123-456-7890',
+    'email': 'jane@example.com',
+    'consent': True,
+    'todaysDate': '10/23/2025',
+}
+
+
+def measure(call, iterations):
+    """Return per-call latencies in microseconds, with handler logging silenced."""
+    samples = []
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        for i in range(iterations):
+            start = time.perf_counter()
+            call(i)
+            samples.append((time.perf_counter() - start) * 1e6)
+    return samples
+
+
+def report(name, samples):
+    samples = sorted(samples)
+    p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+    print(f"{name:<38} mean {statistics.fmean(samples):8.1f} us   "
+          f"p50 {statistics.median(samples):8.1f} us   p99 {p99:8.1f} us")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=5000)
+    parser.add_argument('--storage', choices=['memory', 'sqlite'], default='memory',
+                        help='engine behind core.dynamodb() (see storage.py)')
+    args = parser.parse_args()
+    n = args.iterations
+
+    sqs = FakeSQS()
+    core.set_client('dynamodb', FakeDynamoDB() if args.storage == 'memory' else storage.SQLiteEngine())
+    core.set_client('sqs', sqs)
+    tokens.set_key_set('bench', {'bench': 'bench-verification-key'})
+
+    # /request, one phone per iteration so the per-phone limits don't kick in
+    request_events = [api_event('POST', '/request', {'phone': f'+1555{i:07d}'}) for i in range(2 * n)]
+    report('request: full handler', measure(lambda i: request_otp_handler.lambda_handler(request_events[i], None), n))
+    request_bodies = [json.loads(e['body']) for e in request_events[n:]]
+    report('request: business logic only',
+           measure(lambda i: request_otp_handler.lambda_handler.__wrapped__(request_bodies[i], request_events[n + i], None), n))
+
+    # /verify, each iteration consumes a fresh OTP issued through /request
+    codes = [json.loads(m['body'])['code'] for m in sqs.pending[:n]]
+    request_ids = [json.loads(m['body'])['requestId'] for m in sqs.pending[:n]]
+    verify_events = [api_event('POST', '/verify', {'requestId': r, 'otp': c}) for r, c in zip(request_ids, codes)]
+    report('verify: full handler', measure(lambda i: verify_otp_handler.lambda_handler(verify_events[i], None), n))
+
+    # /submit, a different child per iteration so none is merged as a repeat
+    token = tokens.issue_token('+11234567890')
+    submit_bodies = [{**SUBMIT_BODY, 'children': [{**SUBMIT_BODY['children'][0], 'name': f'Child {i}'}],
+                      'verificationToken': token} for i in range(2 * n)]
+    submit_events = [api_event('POST', '/submit', body) for body in submit_bodies]
+    report('submit: full handler', measure(lambda i: submit_enquiry_handler.lambda_handler(submit_events[i], None), n))
+    report('submit: business logic only',
+           measure(lambda i: submit_enquiry_handler.lambda_handler.__wrapped__(
+               submit_bodies[n + i], submit_events[n + i], None), n))
+    report('submit: repeat (merged)', measure(lambda i: submit_enquiry_handler.lambda_handler(submit_events[0], None), n))
+    report('submit: token check only', measure(lambda i: tokens.verify_token(token), n))
+    submit_event = submit_events[0]
+
+    # Paths that should never reach AWS
+    options_event = api_event('OPTIONS', '/submit')
+    bad_json_event = {**submit_event, 'body': '{"children": ['}
+    report('preflight OPTIONS', measure(lambda i: submit_enquiry_handler.lambda_handler(options_event, None), n))
+    report('malformed JSON', measure(lambda i: submit_enquiry_handler.lambda_handler(bad_json_event, None), n))
+
+    # Per-call timings collected by metrics.py in local mode
+    print()
+    for name, stats in metrics.summary().items():
+        print(f"{name:<38} n {stats['count']:>6}   p50 {stats['p50']:7.3f} ms   "
+              f"p90 {stats['p90']:7.3f} ms   p99 {stats['p99']:7.3f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Import-time benchmark for the Lambda handler modules.
+
+Each handler is imported in a fresh interpreter with `python -X importtime`,
+which is the part of a cold start we control. Reports the median cumulative
+import time, the module's own INIT_DURATION_MS and the heaviest imports.
+
+Usage (from Backend/):
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --runs 10 --top 5 submit_enquiry_handler
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+LAMBDA_DIR = Path(__file__).resolve().parent.parent / 'lambda_functions'
+
+HANDLERS = [
+    'request_otp_handler',
+    'verify_otp_handler',
+    'submit_enquiry_handler',
+    'sheet_sync_handler',
+]
+
+
+def import_once(module):
+    """
+    Import `module` in a child interpreter and return
+    (cumulative_us, init_ms, [(cumulative_us, name), ...] for top-level imports).
+    """
+    env = {**os.environ, 'PYTHONPATH': str(LAMBDA_DIR), 'PYTHONDONTWRITEBYTECODE': '1'}
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}; print({module}.INIT_DURATION_MS)'],
+        capture_output=True, text=True, env=env, check=True,
+    )
+
+    total_us = 0
+    children = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        if not cumulative.strip().isdigit():
+            continue
+        cumulative_us = int(cumulative)
+        depth = (len(name) - len(name.lstrip())) // 2
+        if name.strip() == module:
+            total_us = cumulative_us
+        elif depth == 1:
+            children.append((cumulative_us, name.strip()))
+
+    init_ms = float(result.stdout.strip().splitlines()[-1])
+    return total_us, init_ms, children
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('modules', nargs='*', default=HANDLERS)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=5)
+    args = parser.parse_args()
+
+    for module in args.modules:
+        totals, inits, heaviest = [], [], {}
+        for _ in range(args.runs):
+            total_us, init_ms, children = import_once(module)
+            totals.append(total_us)
+            inits.append(init_ms)
+            for cumulative_us, name in children:
+                heaviest.setdefault(name, []).append(cumulative_us)
+
+        print(f"{module}: import {statistics.median(totals) / 1000:.1f} ms, "
+              f"INIT_DURATION_MS {statistics.median(inits):.1f} ms (median of {args.runs})")
+        ranked = sorted(heaviest.items(), key=lambda kv: statistics.median(kv[1]), reverse=True)
+        for name, samples in ranked[:args.top]:
+            print(f"    {statistics.median(samples) / 1000:8.2f} ms  {name}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+Concurrent load test of the OTP and enquiry flows, run in process.
+
+Each virtual user runs the full journey through the real handlers:
+POST /request -> (an SMS dispatcher publishes the code) -> POST /verify ->
+POST /submit. Background threads drain the SMS queue through
+sms_dispatch_handler, and once the journeys finish the new enquiries are
+pushed through sheet_sync_handler as stream batches.
+
+DynamoDB is the in-process fake by default, the SQLite engine from
+storage.py with --storage sqlite, or DynamoDB Local with --endpoint-url
+(tables are created on the fly). SNS, SQS and Google Sheets
+are always fakes, each with a configurable per-call latency.
+
+Reports throughput and p50/p95/p99 per endpoint and, from metrics.py in
+local mode, per dependency call. --save-baseline writes those numbers to a
+JSON file; --baseline compares a run against one and exits non-zero on a
+slowdown beyond --tolerance, for CI-style checks.
+
+Usage (from Backend/):
+    python benchmarks/loadtest.py
+    python benchmarks/loadtest.py --users 500 --concurrency 32 --dynamodb-latency 0.004 --sheets-latency 0.2
+    python benchmarks/loadtest.py --save-baseline benchmarks/baselines/loadtest.json
+    python benchmarks/loadtest.py --baseline benchmarks/baselines/loadtest.json --tolerance 0.25
+    python benchmarks/loadtest.py --endpoint-url http://localhost:8000
+    python benchmarks/loadtest.py --storage sqlite --sqlite-path /tmp/loadtest.db
+"""
+import argparse
+import contextlib
+import json
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'lambda_functions'))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+TABLES = {
+    'OTP_TABLE': 'LoadTestOtpTable',
+    'ENQUIRY_TABLE': 'LoadTestEnquiryTable',
+    'RATE_LIMIT_TABLE': 'LoadTestRateLimitTable',
+    'IDEMPOTENCY_TABLE': 'LoadTestIdempotencyTable',
+}
+# Handlers read their configuration at import
+os.environ.update(TABLES)
+os.environ.setdefault('SMS_QUEUE_URL', 'loadtest-sms-queue')
+os.environ['METRICS_MODE'] = 'local'
+
+import core  # noqa: E402
+import metrics  # noqa: E402
+import sheets  # noqa: E402
+import storage  # noqa: E402
+import tokens  # noqa: E402
+from fakes import FakeDynamoDB, FakeGspreadClient, FakeSNS, FakeSQS, stream_record  # noqa: E402
+from handler_microbench import SUBMIT_BODY, api_event  # noqa: E402
+
+import request_otp_handler  # noqa: E402
+import sheet_sync_handler  # noqa: E402
+import sms_dispatch_handler  # noqa: E402
+import submit_enquiry_handler  # noqa: E402
+import verify_otp_handler  # noqa: E402
+
+_CODE = re.compile(r'code is (\d+)')
+
+
+class Inbox(FakeSNS):
+    """FakeSNS that lets a virtual user wait for the code sent to its phone."""
+
+    def __init__(self, latency=0.0):
+        super().__init__(latency)
+        self._codes = {}
+        self._arrived = threading.Condition()
+
+    def publish(self, **kwargs):
+        response = super().publish(**kwargs)
+        with self._arrived:
+            self._codes[kwargs['PhoneNumber']] = _CODE.search(kwargs['Message']).group(1)
+            self._arrived.notify_all()
+        return response
+
+    def wait_for_code(self, phone, timeout):
+        with self._arrived:
+            self._arrived.wait_for(lambda: phone in self._codes, timeout)
+            return self._codes.pop(phone, None)
+
+
+def create_tables(client):
+    existing = set(client.list_tables()['TableNames'])
+    for name in TABLES.values():
+        if name in existing:
+            client.delete_table(TableName=name)
+            client.get_waiter('table_not_exists').wait(TableName=name)
+        client.create_table(
+            TableName=name,
+            AttributeDefinitions=[{'AttributeName': 'PK', 'AttributeType': 'S'}],
+            KeySchema=[{'AttributeName': 'PK', 'KeyType': 'HASH'}],
+            BillingMode='PAY_PER_REQUEST',
+        )
+    for name in TABLES.values():
+        client.get_waiter('table_exists').wait(TableName=name)
+
+
+class Recorder:
+    def __init__(self):
+        self.samples = {}
+        self.errors = {}
+
+    def call(self, name, handler, event):
+        start = time.perf_counter()
+        result = handler(event, None)
+        self.samples.setdefault(name, []).append((time.perf_counter() - start) * 1000)
+        if result['statusCode'] != 200:
+            self.errors[name] = self.errors.get(name, 0) + 1
+            return None
+        return json.loads(result['body'])
+
+
+def journey(index, inbox, recorder, sms_timeout):
+    """One virtual user: request a code, verify it, submit an enquiry."""
+    local = f'555{index // 10000 % 1000:03d}{index % 10000:04d}'
+    phone = f'+1{local}'
+
+    requested = recorder.call('POST /request', request_otp_handler.lambda_handler,
+                              api_event('POST', '/request', {'phone': phone}))
+    if not requested:
+        return
+    code = inbox.wait_for_code(phone, sms_timeout)
+    if code is None:
+        recorder.errors['SMS not delivered'] = recorder.errors.get('SMS not delivered', 0) + 1
+        return
+
+    verified = recorder.call('POST /verify', verify_otp_handler.lambda_handler,
+                             api_event('POST', '/verify', {'requestId': requested['requestId'], 'otp': code}))
+    if not verified:
+        return
+
+    body = {**SUBMIT_BODY, 'contactNumber': f'{local[:3]}-{local[3:6]}-{local[6:]}',
+            'verificationToken': verified['verificationToken']}
+    recorder.call('POST /submit', submit_enquiry_handler.lambda_handler,
+                  api_event('POST', '/submit', body, {'Idempotency-Key': str(uuid.uuid4())}))
+
+
+def run_dispatcher(sqs, stop):
+    """Drain the SMS queue through sms_dispatch_handler until stopped."""
+    while not stop.is_set():
+        event = sqs.receive_event()
+        if not event['Records']:
+            time.sleep(0.001)
+            continue
+        sqs.requeue(sms_dispatch_handler.lambda_handler(event, None))
+
+
+def sync_sheet(recorder, batch_size=100):
+    """Push every new enquiry through the stream worker, batch by batch."""
+    records, kwargs = [], {
+        'TableName': TABLES['ENQUIRY_TABLE'],
+        'FilterExpression': 'begins_with(PK, :prefix)',
+        'ExpressionAttributeValues': {':prefix': {'S': 'ENQUIRY#'}},
+    }
+    while True:
+        response = core.dynamodb().scan(**kwargs)
+        records.extend(stream_record(item) for item in response.get('Items', []))
+        if 'LastEvaluatedKey' not in response:
+            break
+        kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    for offset in range(0, len(records), batch_size):
+        start = time.perf_counter()
+        sheet_sync_handler.lambda_handler({'Records': records[offset:offset + batch_size]}, None)
+        recorder.samples.setdefault('stream: sheet sync batch', []).append((time.perf_counter() - start) * 1000)
+    return len(records)
+
+
+def percentiles(values):
+    ordered = sorted(values)
+
+    def percentile(p):
+        return ordered[min(len(ordered) - 1, int(len(ordered) * p))]
+
+    return {'count': len(ordered), 'p50': percentile(0.50), 'p95': percentile(0.95), 'p99': percentile(0.99)}
+
+
+def compare(results, baseline, tolerance):
+    """Return a description of every p95 or throughput regression beyond tolerance."""
+    regressions = []
+    for section in ('endpoints', 'dependencies'):
+        for name, old in baseline.get(section, {}).items():
+            new = results[section].get(name)
+            if not new:
+                continue
+            if new['p95'] > old['p95'] * (1 + tolerance):
+                regressions.append(f"{name}: p95 {old['p95']:.2f} -> {new['p95']:.2f} ms")
+            if 'throughput' in old and new['throughput'] < old['throughput'] * (1 - tolerance):
+                regressions.append(f"{name}: throughput {old['throughput']:.1f} -> {new['throughput']:.1f} /s")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=200, help='journeys to run')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--endpoint-url', help='DynamoDB Local endpoint; default is the in-process fake')
+    parser.add_argument('--storage', choices=['memory', 'sqlite'], default='memory',
+                        help='local engine when --endpoint-url is not given (see storage.py)')
+    parser.add_argument('--sqlite-path', default=':memory:')
+    parser.add_argument('--dynamodb-latency', type=float, default=0.003,
+                        help='seconds per in-memory DynamoDB call')
+    parser.add_argument('--sqs-latency', type=float, default=0.003)
+    parser.add_argument('--sns-latency', type=float, default=0.05)
+    parser.add_argument('--sheets-latency', type=float, default=0.15)
+    parser.add_argument('--dispatchers', type=int, default=4, help='concurrent SMS dispatcher invocations')
+    parser.add_argument('--sms-timeout', type=float, default=10.0)
+    parser.add_argument('--save-baseline', help='write the results to this JSON file')
+    parser.add_argument('--baseline', help='compare against this JSON file and exit 1 on regressions')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='allowed relative slowdown (default 0.2)')
+    args = parser.parse_args()
+
+    if args.endpoint_url:
+        import boto3
+        os.environ.setdefault('AWS_ACCESS_KEY_ID', 'local')
+        os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'local')
+        dynamodb = boto3.client('dynamodb', endpoint_url=args.endpoint_url,
+                                region_name=os.environ.get('AWS_DEFAULT_REGION', 'us-east-1'))
+        create_tables(dynamodb)
+    elif args.storage == 'sqlite':
+        dynamodb = storage.SQLiteEngine(args.sqlite_path)
+    else:
+        dynamodb = FakeDynamoDB(latency=args.dynamodb_latency)
+
+    sqs = FakeSQS(latency=args.sqs_latency)
+    inbox = Inbox(latency=args.sns_latency)
+    core.set_client('dynamodb', dynamodb)
+    core.set_client('sqs', sqs)
+    core.set_client('sns', inbox)
+    sheets.set_client(FakeGspreadClient(latency=args.sheets_latency))
+    tokens.set_key_set('loadtest', {'loadtest': 'loadtest-verification-key'})
+    metrics.reset()
+
+    recorder = Recorder()
+    stop = threading.Event()
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        dispatchers = [threading.Thread(target=run_dispatcher, args=(sqs, stop), daemon=True)
+                       for _ in range(args.dispatchers)]
+        for dispatcher in dispatchers:
+            dispatcher.start()
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            list(pool.map(lambda i: journey(i, inbox, recorder, args.sms_timeout), range(args.users)))
+        elapsed = time.perf_counter() - start
+        stop.set()
+        for dispatcher in dispatchers:
+            dispatcher.join()
+        synced = sync_sheet(recorder)
+
+    results = {
+        'config': {key: value for key, value in vars(args).items() if key not in ('save_baseline', 'baseline')},
+        'endpoints': {},
+        'dependencies': {},
+        'errors': recorder.errors,
+    }
+    print(f"{args.users} journeys, concurrency {args.concurrency}, {elapsed:.2f}s "
+          f"({args.users / elapsed:.1f} journeys/s); {synced} enquiries synced to the sheet")
+    print(f"\n{'endpoint':<28} {'count':>6} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for name, values in recorder.samples.items():
+        stats = percentiles(values)
+        stats['throughput'] = stats['count'] / elapsed
+        results['endpoints'][name] = stats
+        print(f"{name:<28} {stats['count']:>6} {stats['throughput']:>8.1f} "
+              f"{stats['p50']:>8.2f} {stats['p95']:>8.2f} {stats['p99']:>8.2f}")
+
+    print(f"\n{'dependency':<40} {'count':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for name, stats in metrics.summary().items():
+        results['dependencies'][name] = {key: stats[key] for key in ('count', 'p50', 'p95', 'p99')}
+        print(f"{name:<40} {stats['count']:>6} {stats['p50']:>8.2f} {stats['p95']:>8.2f} {stats['p99']:>8.2f}")
+
+    if recorder.errors:
+        print(f"\nerrors: {recorder.errors}")
+
+    if args.save_baseline:
+        Path(args.save_baseline).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.save_baseline).write_text(json.dumps(results, indent=2) + '\n')
+        print(f"\nBaseline saved to {args.save_baseline}")
+
+    if args.baseline:
+        regressions = compare(results, json.loads(Path(args.baseline).read_text()), args.tolerance)
+        if regressions:
+            print(f"\nRegressions beyond {args.tolerance:.0%}:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print(f"\nNo regressions beyond {args.tolerance:.0%} against {args.baseline}")
+
+
+if __name__ == '__main__':
+    main()
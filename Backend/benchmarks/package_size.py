@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Size of the Lambda packages the stack builds.
+
+Runs the same build commands as the stack's Docker bundling (see
+stacks/packaging.py) into a temporary directory, zips the output and
+reports the compressed and unpacked sizes, plus the time to import the
+sheet sync handler from the built packages in a fresh interpreter.
+Building the layer needs pip and access to the package index.
+
+It exits 1 when a package is larger than its budget (packaging.MAX_*,
+or --max-function-kb / --max-layer-mb); tests/test_packaging.py checks
+the same budgets.
+
+Usage (from Backend/):
+    python benchmarks/package_size.py
+    python benchmarks/package_size.py --max-function-kb 200 --max-layer-mb 12
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+from stacks import packaging  # noqa: E402
+
+PACKAGES = {
+    'function': (BACKEND_DIR / 'lambda_functions', packaging.function_command),
+    'sheets layer': (BACKEND_DIR / 'layers' / 'sheets', packaging.layer_command),
+}
+
+
+def import_ms(function_dir, layer_dir):
+    env = {**os.environ, 'PYTHONPATH': f'{function_dir}{os.pathsep}{layer_dir / "python"}'}
+    result = subprocess.run(
+        [sys.executable, '-c',
+         'import time; start = time.perf_counter(); import sheet_sync_handler, gspread; '
+         'print((time.perf_counter() - start) * 1000)'],
+        capture_output=True, text=True, env=env, check=True,
+    )
+    return float(result.stdout.strip())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--max-function-kb', type=float, default=packaging.MAX_FUNCTION_KB)
+    parser.add_argument('--max-layer-mb', type=float, default=packaging.MAX_LAYER_MB)
+    args = parser.parse_args()
+
+    limits = {
+        'function': args.max_function_kb * 1024,
+        'sheets layer': args.max_layer_mb * 1024 * 1024,
+    }
+    failed = False
+    with tempfile.TemporaryDirectory() as workdir:
+        outputs = {}
+        for name, (source, command) in PACKAGES.items():
+            outputs[name] = Path(workdir) / name.replace(' ', '_')
+            packaging.build(source, command, outputs[name])
+            zipped, unpacked, count = packaging.sizes(outputs[name])
+            print(f"{name}: {zipped / 1024:.0f} KB zipped, {unpacked / 1024:.0f} KB unpacked, {count} files")
+            if zipped > limits[name]:
+                print(f"    larger than the limit of {limits[name] / 1024:.0f} KB")
+                failed = True
+
+        print(f"import sheet_sync_handler + gspread: "
+              f"{import_ms(outputs['function'], outputs['sheets layer']):.0f} ms")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Reconciliation cost benchmark for the EnquiryTable stream worker.
+
+Runs sheet_sync_handler against the in-process fakes with a sheet that
+already holds --existing rows, then feeds it stream batches that include
+redelivered records. Reports the Sheets calls and time per batch, which
+should stay flat as the sheet grows (the ID column is read once, not per
+batch), and checks that no enquiry ends up in the sheet twice.
+
+Usage (from Backend/):
+    python benchmarks/sheet_reconcile_bench.py
+    python benchmarks/sheet_reconcile_bench.py --existing 100000 --batches 200
+"""
+import argparse
+import contextlib
+import os
+import random
+import sys
+import time
+import uuid
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'lambda_functions'))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import core  # noqa: E402
+import sheet_sync_handler  # noqa: E402
+import sheets  # noqa: E402
+from fakes import FakeDynamoDB, FakeGspreadClient, stream_record  # noqa: E402
+
+
+def enquiry_item(index):
+    enquiry_id = str(uuid.uuid4())
+    return {
+        'PK': {'S': f'ENQUIRY#{enquiry_id}'},
+        'enquiryId': {'S': enquiry_id},
+        'children': {'L': [{'M': {
+            'name': {'S': f'Child {index}'}, 'age': {'S': '8'}, 'selectedCourse': {'S': 'ucmas'},
+        }}]},
+        'parentName': {'S': f'Parent {index}'},
+        'contactNumber': {'S': '123-456-7890'},
+        'email': {'NULL': True},
+        'consent': {'BOOL': True},
+        'formDate': {'S': '10/23/2025'},
+        'submittedAt': {'S': f'2025-10-23T00:00:{index % 60:02d}+00:00'},
+        'status': {'S': 'pending'},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--existing', type=int, default=20000, help='rows already in the sheet')
+    parser.add_argument('--batches', type=int, default=100)
+    parser.add_argument('--batch-size', type=int, default=100)
+    parser.add_argument('--redelivered', type=float, default=0.2, help='fraction of each batch that was already synced')
+    args = parser.parse_args()
+
+    client = FakeGspreadClient()
+    worksheet = client.worksheet
+    worksheet.rows = [[str(uuid.uuid4())] + [''] * 8 for _ in range(args.existing)]
+    sheets.set_client(client)
+    dynamodb = FakeDynamoDB()
+    core.set_client('dynamodb', dynamodb)
+    sheet_sync_handler.ENQUIRY_TABLE = 'EnquiryTable'
+
+    synced, samples, index = [], [], 0
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        for _ in range(args.batches):
+            fresh = []
+            for _ in range(args.batch_size - int(args.batch_size * args.redelivered)):
+                fresh.append(enquiry_item(index))
+                index += 1
+            replayed = random.sample(synced, min(len(synced), args.batch_size - len(fresh)))
+            records = [stream_record(item) for item in fresh + replayed]
+            for item in fresh:
+                dynamodb.put_item(TableName='EnquiryTable', Item=item)
+
+            start = time.perf_counter()
+            sheet_sync_handler.lambda_handler({'Records': records}, None)
+            samples.append((time.perf_counter() - start) * 1e3)
+            synced.extend(fresh)
+
+    ids = [row[0] for row in worksheet.rows]
+    duplicates = len(ids) - len(set(ids))
+    print(f"sheet rows: {args.existing} existing + {index} new = {len(ids)} ({duplicates} duplicates)")
+    print(f"per batch: mean {sum(samples) / len(samples):.2f} ms, first {samples[0]:.2f} ms, "
+          f"last {samples[-1]:.2f} ms")
+    print(f"sheets calls: {worksheet.calls}  cache: {sheets.cache_stats}")
+
+    # Drop a few rows, as if a batch had gone to the DLQ, and backfill them
+    dropped = set(random.sample(range(args.existing, len(worksheet.rows)), min(10, index)))
+    worksheet.rows = [row for i, row in enumerate(worksheet.rows) if i not in dropped]
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        start = time.perf_counter()
+        result = sheet_sync_handler.lambda_handler({'backfill': {}}, None)
+    print(f"backfill: restored {result['synced']} of {len(dropped)} dropped rows "
+          f"in {(time.perf_counter() - start) * 1e3:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Throughput of the storage engines behind core.dynamodb().
+
+Runs the operations the handlers depend on against each engine, with the
+same items and expressions the handlers send: put (an OTP item), get,
+conditional consume (the /verify delete), query on a GSI (one page of
+GET /enquiries) and batch write (25 enquiries per call). Before timing,
+every engine is checked to give the same answers, including failed
+conditions. Reports operations per second, single-threaded and across
+--threads threads.
+
+Usage (from Backend/):
+    python benchmarks/storage_bench.py
+    python benchmarks/storage_bench.py --engines memory --ops 100000 --threads 8
+    python benchmarks/storage_bench.py --endpoint-url http://localhost:8000
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'lambda_functions'))
+
+import core  # noqa: E402
+import storage  # noqa: E402
+
+OTP_TABLE = 'BenchOtpTable'
+ENQUIRY_TABLE = 'BenchEnquiryTable'
+
+CONSUME_CONDITION = 'otp_mac = :mac AND #ttl > :now'
+
+
+def otp_item(i, expires_at):
+    return {
+        'PK': {'S': f'OTP#{i}'},
+        'phone': {'S': f'+1555{i % 10_000_000:07d}'},
+        'otp_mac': {'B': f'mac-{i}'.encode()},
+        'kid': {'S': 'k1'},
+        'TTL': {'N': str(expires_at)},
+        'deliveryStatus': {'S': 'queued'},
+    }
+
+
+def enquiry_item(i):
+    return {
+        'PK': {'S': f'ENQUIRY#{i:08d}'},
+        'status': {'S': 'new'},
+        'course': {'S': ('imaths', 'ucmas', 'obotz')[i % 3]},
+        'phone': {'S': f'+1555{i % 1000:07d}'},
+        'submittedAt': {'S': f'2025-06-{1 + i % 28:02d}T10:{i % 60:02d}:00Z'},
+        'parentName': {'S': f'Parent {i}'},
+    }
+
+
+def consume(client, i, mac, now):
+    try:
+        client.delete_item(
+            TableName=OTP_TABLE,
+            Key={'PK': {'S': f'OTP#{i}'}},
+            ConditionExpression=CONSUME_CONDITION,
+            ExpressionAttributeNames={'#ttl': 'TTL'},
+            ExpressionAttributeValues={':mac': {'B': mac.encode()}, ':now': {'N': str(now)}},
+            ReturnValues='ALL_OLD',
+            ReturnValuesOnConditionCheckFailure='ALL_OLD',
+        )
+        return True
+    except Exception as e:
+        if core.error_code(e) != 'ConditionalCheckFailedException':
+            raise
+        return False
+
+
+def query_page(client, course, date, limit=50, start_key=None):
+    params = {
+        'TableName': ENQUIRY_TABLE,
+        'IndexName': 'CourseIndex',
+        'KeyConditionExpression': '#pk = :pk AND begins_with(submittedAt, :date)',
+        'ExpressionAttributeNames': {'#pk': 'course'},
+        'ExpressionAttributeValues': {':pk': {'S': course}, ':date': {'S': date}},
+        'ScanIndexForward': False,
+        'Limit': limit,
+    }
+    if start_key:
+        params['ExclusiveStartKey'] = start_key
+    return client.query(**params)
+
+
+def batch_write(client, start, count=25):
+    requests = [{'PutRequest': {'Item': enquiry_item(i)}} for i in range(start, start + count)]
+    return client.batch_write_item(RequestItems={ENQUIRY_TABLE: requests})
+
+
+def check(client):
+    """The answers every engine must agree on."""
+    now = int(time.time())
+    client.put_item(TableName=OTP_TABLE, Item=otp_item(-1, now + 300))
+    client.put_item(TableName=OTP_TABLE, Item=otp_item(-2, now - 1))
+    batch_write(client, 10_000_000, 100)
+    pages, start_key = [], None
+    while True:
+        page = query_page(client, 'ucmas', '2025-06', limit=10, start_key=start_key)
+        pages.append(page)
+        start_key = page.get('LastEvaluatedKey')
+        if not start_key:
+            break
+    queried = [(item['submittedAt']['S'], item['PK']['S']) for page in pages for item in page['Items']]
+    expected = sorted(((enquiry_item(i)['submittedAt']['S'], enquiry_item(i)['PK']['S'])
+                       for i in range(10_000_000, 10_000_100) if i % 3 == 1), reverse=True)
+    results = {
+        'wrong hash rejected': not consume(client, -1, 'nope', now),
+        'expired rejected': not consume(client, -2, 'mac--2', now),
+        'consumed once': consume(client, -1, 'mac--1', now) and not consume(client, -1, 'mac--1', now),
+        'get after consume': 'Item' not in client.get_item(TableName=OTP_TABLE, Key={'PK': {'S': 'OTP#-1'}}),
+        'query pages': queried == expected and all(len(page['Items']) <= 10 for page in pages),
+    }
+    failed = [name for name, ok in results.items() if not ok]
+    if failed:
+        raise SystemExit(f"engine disagrees with DynamoDB semantics: {', '.join(failed)}")
+
+
+def rate(label, count, seconds):
+    print(f"    {label:<28} {count / seconds:>12,.0f} ops/s")
+
+
+def run(client, ops, threads):
+    now = int(time.time())
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        def timed(label, operation, count):
+            start = time.perf_counter()
+            chunks = [range(t, count, threads) for t in range(threads)]
+            list(pool.map(lambda chunk: [operation(i) for i in chunk], chunks))
+            rate(label, count, time.perf_counter() - start)
+
+        timed('put', lambda i: client.put_item(TableName=OTP_TABLE, Item=otp_item(i, now + 300)), ops)
+        timed('get', lambda i: client.get_item(TableName=OTP_TABLE, Key={'PK': {'S': f'OTP#{i}'}}), ops)
+        timed('conditional consume', lambda i: consume(client, i, f'mac-{i}', now), ops)
+        timed('batch write (25 items)', lambda i: batch_write(client, i * 25), ops // 25)
+        timed('query (page of 50)',
+              lambda i: query_page(client, ('imaths', 'ucmas', 'obotz')[i % 3], f'2025-06-{1 + i % 28:02d}'),
+              ops // 10)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--engines', nargs='*', default=['memory', 'sqlite'], choices=['memory', 'sqlite'])
+    parser.add_argument('--sqlite-path', default=':memory:')
+    parser.add_argument('--endpoint-url', help='also run against DynamoDB Local (tables must exist)')
+    parser.add_argument('--ops', type=int, default=20000)
+    parser.add_argument('--threads', type=int, default=4)
+    args = parser.parse_args()
+
+    engines = {}
+    for name in args.engines:
+        engines[name] = lambda name=name: (storage.MemoryEngine() if name == 'memory'
+                                           else storage.SQLiteEngine(args.sqlite_path))
+    if args.endpoint_url:
+        import boto3
+        os.environ.setdefault('AWS_ACCESS_KEY_ID', 'local')
+        os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'local')
+        engines['dynamodb'] = lambda: boto3.client(
+            'dynamodb', endpoint_url=args.endpoint_url,
+            region_name=os.environ.get('AWS_DEFAULT_REGION', 'us-east-1'))
+
+    for name, make in engines.items():
+        check(make())
+        for threads in sorted({1, args.threads}):
+            print(f"{name}, {threads} thread{'s' if threads > 1 else ''}:")
+            run(make(), args.ops, threads)
+
+
+if __name__ == '__main__':
+    main()
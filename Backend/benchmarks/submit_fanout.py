@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Latency of POST /submit with the inline Google Sheets append.
+
+Injects a per-call latency into the fake DynamoDB and the fake Sheets
+client and times the full handler in four setups:
+
+    stream only     SUBMIT_SHEETS_DEADLINE_MS=0, the sheet is left to the
+                    EnquiryTable stream (DynamoDB latency only)
+    inline, warm    sheet handles already open: the append runs on
+                    core's background pool while DynamoDB is written
+    inline, cold    the handles (two metadata calls) are opened by that
+                    same background append
+    inline, slow    Sheets slower than --deadline-ms, so the response
+                    waits for the deadline, not the append, and then
+                    releases the row to the stream (one more write)
+
+The warm and cold cases are compared with appending after the write.
+Exits 1 if either isn't closer to the overlapped time than the
+sequential one, if the slow case runs much past the deadline plus the
+release, or if a repeat submission leaves a row in the sheet.
+
+Usage (from Backend/):
+    python benchmarks/submit_fanout.py
+    python benchmarks/submit_fanout.py --dynamodb-latency 0.02 --sheets-latency 0.15 --deadline-ms 500
+"""
+import argparse
+import contextlib
+import itertools
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'lambda_functions'))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import core  # noqa: E402
+import sheets  # noqa: E402
+import tokens  # noqa: E402
+from fakes import FakeDynamoDB, FakeGspreadClient  # noqa: E402
+from handler_microbench import SUBMIT_BODY, api_event  # noqa: E402
+
+import submit_enquiry_handler  # noqa: E402
+
+
+def p50_ms(events, iterations, before=None):
+    samples = []
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        for _ in range(iterations):
+            event = next(events)
+            if before:
+                before()
+            start = time.perf_counter()
+            response = submit_enquiry_handler.lambda_handler(event, None)
+            samples.append((time.perf_counter() - start) * 1000)
+            if response['statusCode'] != 200:
+                raise SystemExit(f"/submit failed: {response['body']}")
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--dynamodb-latency', type=float, default=0.1)
+    parser.add_argument('--sheets-latency', type=float, default=0.1)
+    parser.add_argument('--deadline-ms', type=int, default=1000)
+    parser.add_argument('--iterations', type=int, default=20)
+    args = parser.parse_args()
+
+    dynamodb_ms = args.dynamodb_latency * 1000
+    sheets_ms = args.sheets_latency * 1000
+    open_ms = 2 * sheets_ms
+    slow_sheets_ms = 2 * args.deadline_ms
+
+    core.set_client('dynamodb', FakeDynamoDB(latency=args.dynamodb_latency))
+    gspread_client = FakeGspreadClient(latency=args.sheets_latency)
+    sheets.set_client(gspread_client)
+    tokens.set_key_set('bench', {'bench': 'bench-verification-key'})
+    token = tokens.issue_token('+11234567890')
+    # A different child each time, so no submission is merged as a repeat
+    events = (api_event('POST', '/submit', {**SUBMIT_BODY, 'verificationToken': token,
+                                            'children': [{**SUBMIT_BODY['children'][0], 'name': f'Child {i}'}]})
+              for i in itertools.count())
+
+    print(f"DynamoDB {dynamodb_ms:.0f} ms, Sheets {sheets_ms:.0f} ms per call, deadline {args.deadline_ms} ms")
+
+    submit_enquiry_handler.SHEETS_DEADLINE_MS = 0
+    print(f"    {'stream only':<16} p50 {p50_ms(events, args.iterations):8.1f} ms")
+
+    submit_enquiry_handler.SHEETS_DEADLINE_MS = args.deadline_ms
+    sheets.get_worksheet()
+    warm_overlapped = max(dynamodb_ms, sheets_ms)
+    warm_sequential = dynamodb_ms + sheets_ms
+    warm = p50_ms(events, args.iterations)
+    print(f"    {'inline, warm':<16} p50 {warm:8.1f} ms   "
+          f"(overlapped {warm_overlapped:.0f} ms, sequential {warm_sequential:.0f} ms)")
+
+    cold_overlapped = max(dynamodb_ms, open_ms + sheets_ms)
+    cold_sequential = dynamodb_ms + open_ms + sheets_ms
+    cold = p50_ms(events, args.iterations, before=sheets.invalidate)
+    print(f"    {'inline, cold':<16} p50 {cold:8.1f} ms   "
+          f"(overlapped {cold_overlapped:.0f} ms, sequential {cold_sequential:.0f} ms)")
+
+    # A repeat of an earlier submission is merged, and the row appended
+    # alongside the write must be removed again. Checked before the slow
+    # case, whose appends finish after the response
+    rows = len(gspread_client.worksheet.rows)
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        repeat = submit_enquiry_handler.lambda_handler(api_event('POST', '/submit', {
+            **SUBMIT_BODY, 'verificationToken': token,
+            'children': [{**SUBMIT_BODY['children'][0], 'name': 'Child 0'}]}), None)
+    repeat_rows = len(gspread_client.worksheet.rows) - rows
+
+    sheets.get_worksheet()
+    gspread_client.worksheet.latency = slow_sheets_ms / 1000
+    capped = max(dynamodb_ms, args.deadline_ms) + dynamodb_ms
+    slow = p50_ms(events, args.iterations)
+    print(f"    {'inline, slow':<16} p50 {slow:8.1f} ms   (Sheets {slow_sheets_ms} ms, deadline + release {capped:.0f} ms)")
+
+    failed = []
+    if warm - warm_overlapped > warm_sequential - warm:
+        failed.append('the append did not overlap the DynamoDB write')
+    if cold - cold_overlapped > cold_sequential - cold:
+        failed.append('opening the handles did not overlap the DynamoDB write')
+    if slow > capped * 1.25:
+        failed.append('the deadline did not cap the slow case')
+    if '"duplicate": true' not in repeat['body'] or repeat_rows:
+        failed.append('a repeat submission left a row in the sheet')
+    for reason in failed:
+        print(f"FAIL: {reason}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
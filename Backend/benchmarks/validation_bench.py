@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Validation cost benchmark: compiled schemas vs the old if-chains.
+
+Times schema.validate_enquiry / validate_request_otp / validate_verify_otp
+against copies of the hand-written checks they replaced, on valid bodies
+and on the malformed ones that used to slip through (or crash with a 500).
+
+Usage (from Backend/):
+    python benchmarks/validation_bench.py
+    python benchmarks/validation_bench.py --iterations 200000
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'lambda_functions'))
+
+import enquiries  # noqa: E402
+import schema  # noqa: E402
+from core import ApiError  # noqa: E402
+
+
+def legacy_validate_enquiry(body):
+    """The /submit checks before schema.py, for comparison."""
+    children = body.get('children', [])
+    parent_name = body.get('parentName', '').strip()
+    contact_number = body.get('contactNumber', '').strip()
+    consent = body.get('consent', False)
+    if not children or len(children) == 0:
+        raise ApiError(400, 'At least one child is required')
+    if not parent_name:
+        raise ApiError(400, 'Parent name is required')
+    if not contact_number:
+        raise ApiError(400, 'Contact number is required')
+    if not consent:
+        raise ApiError(400, 'Consent is required')
+    for child in children:
+        if child.get('name', '').strip() and child.get('age', '').strip() and child.get('selectedCourse', '').strip():
+            return
+    raise ApiError(400, 'At least one child must have name, age, and course selected')
+
+
+def legacy_validate_phone(body):
+    phone = body.get('phone', '').strip()
+    if not phone or not phone.startswith('+') or len(phone) < 8 or len(phone) > 16:
+        raise ApiError(400, 'Invalid phone format. Expected E.164 format (e.g., +11234567890)')
+
+
+def legacy_validate_verify(body):
+    if not body.get('requestId', '').strip() or not body.get('otp', '').strip():
+        raise ApiError(400, 'Missing required fields')
+
+
+ENQUIRY = {
+    'children': [
+        {'id': '1', 'name': 'John Doe', 'age': '8', 'selectedCourse': 'ucmas'},
+        {'id': '2', 'name': '', 'age': '', 'selectedCourse': ''},
+    ],
+    'parentName': 'Jane Doe',
+    'contactNumber': '123-456-7890',
+    'email': 'jane@example.com',
+    'consent': True,
+    'todaysDate': '10/23/2025',
+}
+
+CASES = [
+    ('enquiry: valid', ENQUIRY, enquiries.validate, legacy_validate_enquiry),
+    ('enquiry: numeric age', {**ENQUIRY, 'children': [{'name': 'A', 'age': 8, 'selectedCourse': 'ucmas'}]},
+     enquiries.validate, legacy_validate_enquiry),
+    ('enquiry: 6 children, bad course', {**ENQUIRY, 'children': [{'name': 'A', 'age': '8', 'selectedCourse': 'x'}] * 6},
+     enquiries.validate, legacy_validate_enquiry),
+    ('enquiry: many errors', {'children': 'x', 'parentName': 7, 'consent': 'yes'},
+     enquiries.validate, legacy_validate_enquiry),
+    ('request: valid', {'phone': '+11234567890'}, schema.validate_request_otp, legacy_validate_phone),
+    ('request: not E.164', {'phone': '+1abcdefgh'}, schema.validate_request_otp, legacy_validate_phone),
+    ('verify: valid', {'requestId': '0b7e4c52-3f1d-4c8a-9e2b-5a6f7d8c9e0f', 'otp': '1234'},
+     schema.validate_verify_otp, legacy_validate_verify),
+    ('verify: otp not a string', {'requestId': 'x', 'otp': 1234}, schema.validate_verify_otp, legacy_validate_verify),
+]
+
+
+def time_per_call(validate, body, iterations):
+    """Mean microseconds per call and the outcome of the last call."""
+    outcome = 'ok'
+    start = time.perf_counter()
+    for _ in range(iterations):
+        try:
+            validate(body)
+        except ApiError as e:
+            outcome = f"400 ({len(e.details) if getattr(e, 'details', None) else 1} errors)"
+        except Exception as e:
+            outcome = f"500 ({type(e).__name__})"
+    return (time.perf_counter() - start) / iterations * 1e6, outcome
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=50000)
+    args = parser.parse_args()
+
+    print(f"{'case':<34} {'old us':>8} {'old result':>22} {'new us':>8} {'new result':>14}")
+    for name, body, new, old in CASES:
+        old_us, old_outcome = time_per_call(old, body, args.iterations)
+        new_us, new_outcome = time_per_call(new, body, args.iterations)
+        print(f"{name:<34} {old_us:>8.2f} {old_outcome:>22} {new_us:>8.2f} {new_outcome:>14}")
+
+
+if __name__ == '__main__':
+    main()
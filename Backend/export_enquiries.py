@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+Export enquiries from EnquiryTable to CSV or Parquet.
+
+The table is read with a parallel segmented Scan (one worker thread per
+segment) and rows are streamed to the output through a bounded queue, so
+memory stays constant however large the table is. Each child becomes its
+own row, with the parent's enquiry fields repeated.
+
+Usage (from Backend/):
+    python export_enquiries.py --output enquiries.csv
+    python export_enquiries.py --format parquet --output enquiries.parquet --segments 16
+    python export_enquiries.py --watermark-file .export-watermark --output new.csv
+    python export_enquiries.py --endpoint-url http://localhost:8000 --output - | head
+
+With --watermark-file, only enquiries submitted since the stored watermark
+are exported and the watermark is advanced when the export finishes. The
+scan starts WATERMARK_OVERLAP_SECONDS before the watermark, since
+submittedAt is stamped before the item is written and a slow write can
+land behind a later one; rows in the overlap are exported again, so
+consumers should treat enquiryId as the key.
+"""
+import argparse
+import csv
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+
+import boto3
+from boto3.dynamodb.types import TypeDeserializer
+from botocore.config import Config
+
+
+COLUMNS = [
+    'enquiryId',
+    'submittedAt',
+    'status',
+    'parentName',
+    'contactNumber',
+    'phone',
+    'email',
+    'consent',
+    'formDate',
+    'childIndex',
+    'childName',
+    'childAge',
+    'childCourse',
+]
+
+# Pages buffered between the scan workers and the writer, per segment
+QUEUE_PAGES_PER_SEGMENT = 2
+# How long a worker waits on a full queue before checking for a stop
+QUEUE_PUT_TIMEOUT_SECONDS = 0.5
+# How far before the watermark an incremental export starts
+WATERMARK_OVERLAP_SECONDS = 300
+PARQUET_ROW_GROUP_SIZE = 50000
+
+_deserializer = TypeDeserializer()
+_DONE = object()
+
+
+def flatten(item):
+    """
+    Yield one output row per child of a deserialized ENQUIRY# item
+    (or a single row with empty child columns if it has none).
+    """
+    base = {
+        'enquiryId': item.get('enquiryId', ''),
+        'submittedAt': item.get('submittedAt', ''),
+        'status': item.get('status', ''),
+        'parentName': item.get('parentName', ''),
+        'contactNumber': item.get('contactNumber', ''),
+        'phone': item.get('phone', ''),
+        'email': item.get('email') or '',
+        'consent': str(item.get('consent', '')),
+        'formDate': item.get('formDate', ''),
+    }
+    children = item.get('children') or [{}]
+    for index, child in enumerate(children, start=1):
+        child = child if isinstance(child, dict) else {}
+        yield [
+            *base.values(),
+            index if child else '',
+            str(child.get('name', '')),
+            str(child.get('age', '')),
+            str(child.get('selectedCourse', '')),
+        ]
+
+
+def scan_start(since):
+    """
+    Return the submittedAt to scan from for a watermark of `since`:
+    WATERMARK_OVERLAP_SECONDS earlier, or `since` itself if it isn't an
+    ISO timestamp.
+    """
+    try:
+        start = datetime.fromisoformat(since)
+    except ValueError:
+        return since
+    return (start - timedelta(seconds=WATERMARK_OVERLAP_SECONDS)).isoformat()
+
+
+def put_page(pages, rows, stop):
+    """
+    Put `rows` on `pages`, giving up once `stop` is set. Returns whether
+    the page was queued.
+    """
+    while not stop.is_set():
+        try:
+            pages.put(rows, timeout=QUEUE_PUT_TIMEOUT_SECONDS)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def scan_segment(client, table, segment, total_segments, since, page_size, pages, stop):
+    """
+    Scan one segment and put each page of flattened rows on `pages`,
+    until done or `stop` is set. Returns (items, newest submittedAt seen).
+    """
+    filter_expression = 'begins_with(PK, :prefix)'
+    values = {':prefix': {'S': 'ENQUIRY#'}}
+    if since:
+        filter_expression += ' AND submittedAt >= :since'
+        values[':since'] = {'S': scan_start(since)}
+
+    kwargs = {
+        'TableName': table,
+        'Segment': segment,
+        'TotalSegments': total_segments,
+        'FilterExpression': filter_expression,
+        'ExpressionAttributeValues': values,
+        'Limit': page_size,
+    }
+
+    items, newest = 0, since or ''
+    while not stop.is_set():
+        response = client.scan(**kwargs)
+        rows = []
+        for raw in response.get('Items', []):
+            item = {key: _deserializer.deserialize(value) for key, value in raw.items()}
+            newest = max(newest, item.get('submittedAt', ''))
+            rows.extend(flatten(item))
+            items += 1
+        if rows and not put_page(pages, rows, stop):
+            break
+        if 'LastEvaluatedKey' not in response:
+            return items, newest
+        kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+    return items, newest
+
+
+class CsvWriter:
+    def __init__(self, stream):
+        self._writer = csv.writer(stream)
+        self._writer.writerow(COLUMNS)
+
+    def write(self, rows):
+        self._writer.writerows(rows)
+
+    def close(self):
+        pass
+
+
+class ParquetWriter:
+    """
+    Writes rows in row groups so only one group is held in memory.
+    Needs pyarrow, which is only imported when Parquet output is requested.
+    """
+
+    def __init__(self, path):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self._pa = pa
+        self._schema = pa.schema([(name, pa.string()) for name in COLUMNS])
+        self._writer = pq.ParquetWriter(path, self._schema, compression='snappy')
+        self._buffer = []
+
+    def write(self, rows):
+        self._buffer.extend(rows)
+        if len(self._buffer) >= PARQUET_ROW_GROUP_SIZE:
+            self._flush()
+
+    def _flush(self):
+        if not self._buffer:
+            return
+        columns = list(zip(*self._buffer))
+        self._writer.write_table(self._pa.Table.from_arrays(
+            [self._pa.array([str(v) for v in column], type=self._pa.string()) for column in columns],
+            schema=self._schema,
+        ))
+        self._buffer = []
+
+    def close(self):
+        self._flush()
+        self._writer.close()
+
+
+def export(client, table, writer, segments=8, since=None, page_size=1000):
+    """
+    Export every ENQUIRY# item (submitted since `since`, less the
+    watermark overlap, if given) to `writer`. Returns a dict of stats
+    including the new watermark.
+
+    If a segment fails, the other workers are stopped and the first error
+    is raised once they have all finished.
+    """
+    pages = queue.Queue(maxsize=segments * QUEUE_PAGES_PER_SEGMENT)
+    stop = threading.Event()
+    started = time.perf_counter()
+    results = []
+    errors = []
+
+    def run():
+        try:
+            with ThreadPoolExecutor(max_workers=segments) as pool:
+                futures = [
+                    pool.submit(scan_segment, client, table, segment, segments, since, page_size, pages, stop)
+                    for segment in range(segments)
+                ]
+                for future in as_completed(futures):
+                    try:
+                        results.append(future.result())
+                    except BaseException as e:
+                        errors.append(e)
+                        stop.set()
+        finally:
+            pages.put(_DONE)
+
+    producer = threading.Thread(target=run, daemon=True)
+    producer.start()
+
+    rows = 0
+    try:
+        while True:
+            page = pages.get()
+            if page is _DONE:
+                break
+            # After a failure, pages already queued are drained, not written
+            if not stop.is_set():
+                writer.write(page)
+                rows += len(page)
+    except BaseException:
+        stop.set()
+        while pages.get() is not _DONE:
+            pass
+        raise
+    finally:
+        producer.join()
+        writer.close()
+
+    if errors:
+        raise errors[0]
+
+    elapsed = time.perf_counter() - started
+    items = sum(count for count, _ in results)
+    return {
+        'items': items,
+        'rows': rows,
+        'segments': segments,
+        'seconds': elapsed,
+        'itemsPerSecond': items / elapsed if elapsed else 0.0,
+        'watermark': max([newest for _, newest in results] + [since or '']),
+    }
+
+
+def make_client(segments, endpoint_url=None, region=None):
+    config = Config(max_pool_connections=max(10, segments), retries={'mode': 'adaptive', 'max_attempts': 10})
+    return boto3.client('dynamodb', endpoint_url=endpoint_url, region_name=region, config=config)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--table', default='EnquiryTable')
+    parser.add_argument('--format', choices=['csv', 'parquet'], default='csv')
+    parser.add_argument('--output', default='-', help="output file, or '-' for stdout (CSV only)")
+    parser.add_argument('--segments', type=int, default=8)
+    parser.add_argument('--page-size', type=int, default=1000)
+    parser.add_argument('--since', help='only export enquiries with submittedAt from this ISO timestamp (less the overlap)')
+    parser.add_argument('--watermark-file', help='read --since from this file and store the new watermark in it')
+    parser.add_argument('--endpoint-url', help='e.g. http://localhost:8000 for DynamoDB Local')
+    parser.add_argument('--region')
+    args = parser.parse_args()
+
+    since = args.since
+    if args.watermark_file and not since:
+        try:
+            with open(args.watermark_file) as f:
+                since = f.read().strip() or None
+        except FileNotFoundError:
+            since = None
+
+    if args.format == 'parquet':
+        if args.output == '-':
+            parser.error('--format parquet needs an --output file')
+        try:
+            writer = ParquetWriter(args.output)
+        except ImportError:
+            parser.error('pyarrow is required for --format parquet (pip install pyarrow)')
+        stream = None
+    else:
+        stream = sys.stdout if args.output == '-' else open(args.output, 'w', newline='')
+        writer = CsvWriter(stream)
+
+    try:
+        stats = export(make_client(args.segments, args.endpoint_url, args.region), args.table, writer,
+                       segments=args.segments, since=since, page_size=args.page_size)
+    finally:
+        if stream not in (None, sys.stdout):
+            stream.close()
+
+    if args.watermark_file and stats['watermark']:
+        with open(args.watermark_file, 'w') as f:
+            f.write(stats['watermark'])
+
+    print(f"Exported {stats['items']} enquiries ({stats['rows']} rows) in {stats['seconds']:.1f}s "
+          f"with {stats['segments']} segments ({stats['itemsPerSecond']:.0f} items/s)", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
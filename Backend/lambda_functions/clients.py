@@ -0,0 +1,133 @@
+"""
+Construction of the HTTP clients shared across warm invocations.
+
+boto3 clients (see core.client) all use one botocore Config: a connection
+pool sized for the background threads, connect/read timeouts well inside
+the function timeouts, adaptive retries and TCP keepalive. The gspread
+client gets the same treatment on its requests session: a pooled adapter
+with keepalive, (connect, read) timeouts on every call and retries. GETs
+are retried on throttling and 5xx errors; appends (POST) are only retried
+when the connection could not be made, so a row is never sent twice.
+
+Every flush() also records http.requests and http.connections, the
+requests sent and the connections opened since the previous flush, across
+all pools. On warm invocations connections should stay near zero;
+1 - connections / requests is the reuse rate.
+"""
+import functools
+import os
+
+import metrics
+
+
+# Environment variables
+BOTO_MAX_POOL_CONNECTIONS = int(os.environ.get('BOTO_MAX_POOL_CONNECTIONS', '10'))
+BOTO_CONNECT_TIMEOUT_SECONDS = float(os.environ.get('BOTO_CONNECT_TIMEOUT_SECONDS', '2'))
+BOTO_READ_TIMEOUT_SECONDS = float(os.environ.get('BOTO_READ_TIMEOUT_SECONDS', '5'))
+BOTO_MAX_ATTEMPTS = int(os.environ.get('BOTO_MAX_ATTEMPTS', '3'))
+SHEETS_POOL_CONNECTIONS = int(os.environ.get('SHEETS_POOL_CONNECTIONS', '4'))
+SHEETS_CONNECT_TIMEOUT_SECONDS = float(os.environ.get('SHEETS_CONNECT_TIMEOUT_SECONDS', '3'))
+SHEETS_READ_TIMEOUT_SECONDS = float(os.environ.get('SHEETS_READ_TIMEOUT_SECONDS', '15'))
+SHEETS_MAX_RETRIES = int(os.environ.get('SHEETS_MAX_RETRIES', '2'))
+
+# Statuses worth retrying a Sheets GET on
+_RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# Raw clients and sessions by name, for connection_stats()
+_boto3_clients = {}
+_sessions = {}
+
+# Totals at the previous flush
+_reported = (0, 0)
+
+
+@functools.lru_cache(maxsize=None)
+def boto3_config():
+    from botocore.config import Config
+    return Config(
+        max_pool_connections=BOTO_MAX_POOL_CONNECTIONS,
+        connect_timeout=BOTO_CONNECT_TIMEOUT_SECONDS,
+        read_timeout=BOTO_READ_TIMEOUT_SECONDS,
+        retries={'mode': 'adaptive', 'total_max_attempts': BOTO_MAX_ATTEMPTS},
+        tcp_keepalive=True,
+    )
+
+
+def boto3_client(service):
+    import boto3
+    client = _boto3_clients[service] = boto3.client(service, config=boto3_config())
+    return client
+
+
+def gspread_client(info):
+    """
+    Authorize a gspread client from service-account `info`, on a pooled
+    keepalive session with timeouts and retries. Replaces the session of
+    any client built before (e.g. with a rotated key).
+    """
+    import socket
+
+    import gspread
+    from requests.adapters import HTTPAdapter
+    from urllib3.connection import HTTPConnection
+    from urllib3.util.retry import Retry
+
+    client = gspread.service_account_from_dict(info=info)
+    adapter = HTTPAdapter(
+        pool_connections=1,
+        pool_maxsize=SHEETS_POOL_CONNECTIONS,
+        max_retries=Retry(
+            total=SHEETS_MAX_RETRIES,
+            status_forcelist=_RETRY_STATUSES,
+            backoff_factor=0.5,
+            # Hand the last response back, so gspread still raises APIError
+            raise_on_status=False,
+        ),
+    )
+    adapter.poolmanager.connection_pool_kw['socket_options'] = (
+        HTTPConnection.default_socket_options + [(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)]
+    )
+    client.http_client.session.mount('https://', adapter)
+    client.set_timeout((SHEETS_CONNECT_TIMEOUT_SECONDS, SHEETS_READ_TIMEOUT_SECONDS))
+    _sessions['sheets'] = client.http_client.session
+    return client
+
+
+def _pools(manager):
+    pools = getattr(manager, 'pools', None)
+    for key in pools.keys() if pools is not None else ():
+        try:
+            yield pools[key]
+        except KeyError:
+            # Evicted since keys() was read
+            continue
+
+
+def connection_stats():
+    """
+    (requests sent, connections opened) summed over the urllib3 pools of
+    every client built here. Pools that were evicted take their counts
+    with them, so totals can go down.
+    """
+    managers = [getattr(getattr(getattr(client, '_endpoint', None), 'http_session', None), '_manager', None)
+                for client in list(_boto3_clients.values())]
+    managers += [adapter.poolmanager for session in list(_sessions.values())
+                 for adapter in session.adapters.values() if hasattr(adapter, 'poolmanager')]
+    sent = opened = 0
+    for manager in managers:
+        for pool in _pools(manager):
+            sent += pool.num_requests
+            opened += pool.num_connections
+    return sent, opened
+
+
+def record_connection_metrics():
+    global _reported
+    sent, opened = connection_stats()
+    if (sent, opened) != _reported:
+        metrics.count('http.requests', max(0, sent - _reported[0]))
+        metrics.count('http.connections', max(0, opened - _reported[1]))
+    _reported = (sent, opened)
+
+
+metrics.add_collector(record_connection_metrics)
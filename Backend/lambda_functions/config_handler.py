@@ -0,0 +1,54 @@
+import time
+
+_INIT_START = time.perf_counter()
+
+from core import api_handler
+from schema import COURSES, MAX_CHILDREN
+
+# Display details for each course in schema.COURSES; colours and logos
+# stay in the app, keyed by course id
+COURSE_DETAILS = {
+    'imaths': {
+        'name': 'i-Maths',
+        'description': 'i-Maths is an Early Math Enrichment Program designed for children aged 4-7 years. '
+                       'It focuses on building strong mathematical foundations through interactive and engaging '
+                       'activities that make learning math fun and effective.',
+    },
+    'ucmas': {
+        'name': 'UCMAS',
+        'description': 'UCMAS (Universal Concept of Mental Arithmetic System) is an abacus-based mental math '
+                       'program for children aged 7-13 years. It enhances concentration, memory, and calculation '
+                       'skills through systematic training with the abacus.',
+    },
+    'obotz': {
+        'name': 'OBOTZ',
+        'description': 'OBOTZ is an AI Robotics & Coding Program designed for children aged 8-18 years. '
+                       'It introduces students to programming, robotics, and artificial intelligence through '
+                       'hands-on projects and interactive learning experiences.',
+    },
+}
+
+# Static for the life of the deployment, so built once per container
+CONFIG = {
+    'courses': [{'id': course, **COURSE_DETAILS[course]} for course in COURSES],
+    'maxChildren': MAX_CHILDREN,
+}
+
+
+@api_handler
+def lambda_handler(body, event, context):
+    """
+    Lambda handler for GET /config
+
+    Returns the form options the app renders, so courses can change
+    without an app release:
+    {
+        "courses": [{"id": "imaths", "name": "i-Maths", "description": "..."}, ...],
+        "maxChildren": 5
+    }
+    The response can be served from the API stage cache (see BackendStack).
+    """
+    return CONFIG
+
+
+INIT_DURATION_MS = (time.perf_counter() - _INIT_START) * 1000
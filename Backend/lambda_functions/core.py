@@ -0,0 +1,286 @@
+import json
+import os
+import sys
+import base64
+import functools
+import math
+import threading
+import time
+from decimal import Decimal
+
+import clients
+import metrics
+
+
+# Environment variables
+MAX_BODY_BYTES = int(os.environ.get('MAX_BODY_BYTES', '16384'))
+# dynamodb (boto3), or a local engine from storage.py: memory or sqlite
+STORAGE_ENGINE = os.environ.get('STORAGE_ENGINE', 'dynamodb')
+BACKGROUND_THREADS = int(os.environ.get('BACKGROUND_THREADS', '4'))
+
+# CORS/response headers are the same for every response, so build them once
+# per container instead of once per request
+RESPONSE_HEADERS = {
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Allow-Headers': 'Content-Type,x-api-key,Idempotency-Key',
+    'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
+    'Content-Type': 'application/json'
+}
+
+# boto3 clients are created on first use and reused across warm invocations
+_clients = {}
+
+
+class ApiError(Exception):
+    """
+    Raised by handler business logic to return a JSON error response.
+    Anything else that escapes a handler becomes a 500. `details` maps
+    field paths to messages and is returned as "fields".
+    """
+
+    def __init__(self, status_code, message, details=None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.message = message
+        self.details = details
+
+
+def _json_default(value):
+    # Numbers read back from DynamoDB are Decimals
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def response(status_code, payload=None):
+    return {
+        'statusCode': status_code,
+        'headers': RESPONSE_HEADERS,
+        'body': '' if payload is None else json.dumps(payload, default=_json_default)
+    }
+
+
+def _reject_constant(name):
+    raise ValueError(f"{name} is not valid JSON")
+
+
+def _parse_float(text):
+    value = float(text)
+    if not math.isfinite(value):
+        raise ValueError(f"{text} is out of range")
+    return value
+
+
+# json.loads accepts NaN and Infinity, and overflows 1e400 to inf; neither
+# can be stored in DynamoDB, so bodies containing them are rejected
+_decoder = json.JSONDecoder(parse_constant=_reject_constant, parse_float=_parse_float)
+
+
+def parse_body(event, max_bytes=MAX_BODY_BYTES):
+    """
+    Parse the JSON object in an API Gateway event body.
+    Raises ApiError for oversized, malformed or non-object bodies.
+    """
+    body = event.get('body')
+    if body is None or body == '':
+        return {}
+    if isinstance(body, dict):
+        return body
+
+    if event.get('isBase64Encoded'):
+        if len(body) > (max_bytes * 4) // 3 + 4:
+            raise ApiError(413, 'Request body too large')
+        body = base64.b64decode(body)
+
+    if len(body) > max_bytes:
+        raise ApiError(413, 'Request body too large')
+
+    try:
+        if isinstance(body, bytes):
+            body = body.decode('utf-8')
+        parsed = _decoder.decode(body)
+    except ValueError:
+        raise ApiError(400, 'Invalid JSON in request body')
+
+    if not isinstance(parsed, dict):
+        raise ApiError(400, 'Request body must be a JSON object')
+    return parsed
+
+
+def api_handler(func):
+    """
+    Wrap a handler's business logic as an API Gateway Lambda handler.
+
+    The wrapped function is called as func(body, event, context) with the
+    parsed JSON body and returns the payload for a 200 response. It raises
+    ApiError for client or known server errors. Preflight requests, body
+    parsing, the response envelope and error mapping are handled here.
+
+    A handler module can set its own MAX_BODY_BYTES to raise the body limit.
+    External calls made during the invocation are flushed as one metrics
+    record at the end (see metrics.py).
+    """
+    module = sys.modules[func.__module__]
+    max_body_bytes = getattr(module, 'MAX_BODY_BYTES', MAX_BODY_BYTES)
+    cold_start = [True]
+
+    @functools.wraps(func)
+    def lambda_handler(event, context):
+        metrics.begin(cold_start[0])
+        if cold_start[0]:
+            cold_start[0] = False
+            init_ms = getattr(module, 'INIT_DURATION_MS', None)
+            if init_ms is not None:
+                print(f"Module init: {init_ms:.1f} ms")
+                metrics.record('init', init_ms)
+
+        if event.get('httpMethod') == 'OPTIONS':
+            return response(200)
+
+        start = time.perf_counter()
+        try:
+            body = parse_body(event, max_body_bytes)
+            result = response(200, func(body, event, context))
+        except ApiError as e:
+            payload = {'error': e.message}
+            if e.details:
+                payload['fields'] = e.details
+            result = response(e.status_code, payload)
+        except Exception as e:
+            metrics.log(f"Error: {str(e)}")
+            result = response(500, {'error': 'Internal server error'})
+
+        metrics.record('handler', (time.perf_counter() - start) * 1000)
+        metrics.count(f"status.{result['statusCode'] // 100}xx")
+        metrics.flush({'requestId': getattr(context, 'aws_request_id', None)})
+        return result
+
+    return lambda_handler
+
+
+def client(service):
+    """
+    Return the cached low-level boto3 client for `service`, with every
+    call timed by metrics and the shared config from clients.py. boto3
+    itself is only imported the first time a client is needed. With
+    STORAGE_ENGINE set, 'dynamodb' is a local engine from storage.py
+    instead.
+    """
+    cached = _clients.get(service)
+    if cached is None:
+        if service == 'dynamodb' and STORAGE_ENGINE != 'dynamodb':
+            import storage
+            instance = storage.create(STORAGE_ENGINE)
+        else:
+            instance = clients.boto3_client(service)
+        cached = _clients[service] = metrics.instrument(service, instance)
+    return cached
+
+
+def set_client(service, instance):
+    """
+    Install a client for `service`, e.g. a local fake for benchmarks.
+    """
+    _clients[service] = metrics.instrument(service, instance)
+
+
+def dynamodb():
+    return client('dynamodb')
+
+
+# Created on first use and kept across warm invocations
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def run_in_background(func, *args, **kwargs):
+    """
+    Start `func(*args, **kwargs)` on the container's thread pool and return
+    its Future, so a handler can overlap independent I/O with its own
+    calls. The pool outlives the invocation: a call still running when the
+    handler returns is frozen with the container and finishes in a later
+    invocation.
+    """
+    global _executor
+    if _executor is None:
+        # Imported here: concurrent.futures pulls in logging, which would
+        # add to every cold start
+        from concurrent.futures import ThreadPoolExecutor
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=BACKGROUND_THREADS, thread_name_prefix='background')
+    return _executor.submit(func, *args, **kwargs)
+
+
+def to_e164(number, default_country_code='1'):
+    """
+    Normalize a phone number to E.164. Numbers without a leading '+' are
+    treated the way the app sends them (XXX-XXX-XXXX -> +1XXXXXXXXXX).
+    Returns None if the result can't be a valid E.164 number.
+    """
+    if not isinstance(number, str):
+        return None
+    number = number.strip()
+    digits = ''.join(c for c in number if c.isdigit())
+    if not number.startswith('+'):
+        if len(digits) == 10:
+            digits = default_country_code + digits
+    e164 = f'+{digits}'
+    if not 8 <= len(e164) <= 16 or e164[1] == '0':
+        return None
+    return e164
+
+
+def error_code(error):
+    """
+    Return the AWS error code of a botocore ClientError (or a fake with the
+    same `response` shape), or None for any other exception.
+    """
+    return getattr(error, 'response', {}).get('Error', {}).get('Code')
+
+
+def to_attribute(value):
+    """
+    Serialize a JSON-decoded value into a DynamoDB attribute value for the
+    low-level client (the subset of TypeSerializer that request bodies need).
+    """
+    if value is None:
+        return {'NULL': True}
+    if isinstance(value, bool):
+        return {'BOOL': value}
+    if isinstance(value, str):
+        return {'S': value}
+    if isinstance(value, (int, float, Decimal)):
+        return {'N': str(value)}
+    if isinstance(value, list):
+        return {'L': [to_attribute(v) for v in value]}
+    if isinstance(value, dict):
+        return {'M': {k: to_attribute(v) for k, v in value.items()}}
+    raise TypeError(f"Unsupported attribute type: {type(value).__name__}")
+
+
+def from_attribute(value):
+    """
+    Deserialize a DynamoDB attribute value returned by the low-level client
+    or found in a stream image (the inverse of to_attribute).
+    """
+    (kind, data), = value.items()
+    if kind == 'S':
+        return data
+    if kind == 'N':
+        return Decimal(data)
+    if kind == 'BOOL':
+        return data
+    if kind == 'NULL':
+        return None
+    if kind == 'L':
+        return [from_attribute(v) for v in data]
+    if kind == 'M':
+        return {k: from_attribute(v) for k, v in data.items()}
+    if kind == 'B':
+        return data
+    raise TypeError(f"Unsupported attribute type: {kind}")
+
+
+def from_item(item):
+    return {key: from_attribute(value) for key, value in item.items()}
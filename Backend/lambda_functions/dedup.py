@@ -0,0 +1,119 @@
+import base64
+import hashlib
+import os
+import time
+
+import core
+from core import ApiError
+
+
+# Environment variables
+IDEMPOTENCY_TABLE = os.environ.get('IDEMPOTENCY_TABLE')
+ENQUIRY_TABLE = os.environ.get('ENQUIRY_TABLE')
+# A child enquired about for the same course from the same phone within
+# this many seconds is a repeat of the earlier enquiry. 0 turns it off
+DEDUP_WINDOW_SECONDS = int(os.environ.get('DEDUP_WINDOW_SECONDS', '604800'))
+
+
+def _normalize_name(name):
+    return ' '.join(str(name).split()).casefold()
+
+
+def keys(phone, children):
+    """
+    Return the dedup keys for an enquiry: one per complete child, from the
+    E.164 phone, the normalized child name and the course. Hashed, so the
+    index items stay small and don't repeat the child's name.
+    """
+    result = set()
+    for child in children:
+        if not (child.get('name') and child.get('age') and child.get('selectedCourse')):
+            continue
+        source = f"{phone}\n{_normalize_name(child['name'])}\n{child['selectedCourse']}"
+        result.add(base64.urlsafe_b64encode(hashlib.sha256(source.encode()).digest()[:16]).rstrip(b'=').decode())
+    return sorted(result)
+
+
+def record_puts(dedup_keys, enquiry_id, now=None, conditional=True):
+    """
+    Build the TransactWriteItems entries that point each key at
+    `enquiry_id` for DEDUP_WINDOW_SECONDS. Conditional entries fail while
+    another enquiry holds the key, with the holder returned in the
+    cancellation reason (see holders()).
+    """
+    now = int(time.time()) if now is None else now
+    puts = []
+    for key in dedup_keys:
+        put = {
+            'TableName': IDEMPOTENCY_TABLE,
+            'Item': {
+                'PK': {'S': f'DEDUP#{key}'},
+                'enquiryId': {'S': enquiry_id},
+                'TTL': {'N': str(now + DEDUP_WINDOW_SECONDS)},
+            },
+        }
+        if conditional:
+            put.update({
+                'ConditionExpression': 'attribute_not_exists(PK) OR #ttl < :now',
+                'ExpressionAttributeNames': {'#ttl': 'TTL'},
+                'ExpressionAttributeValues': {':now': {'N': str(now)}},
+                'ReturnValuesOnConditionCheckFailure': 'ALL_OLD',
+            })
+        puts.append({'Put': put})
+    return puts
+
+
+def holders(error, start, count):
+    """
+    If `error` cancelled a transaction because of the dedup entries at
+    `start`..`start + count`, return the enquiryId holding each key (None
+    for keys that were free). Returns None for any other error. A
+    concurrent submission of the same child raises ApiError(409).
+    """
+    if core.error_code(error) != 'TransactionCanceledException':
+        return None
+    reasons = (getattr(error, 'response', {}).get('CancellationReasons') or [])[start:start + count]
+    if len(reasons) < count:
+        return None
+
+    result = []
+    for reason in reasons:
+        if reason.get('Code') == 'TransactionConflict':
+            raise ApiError(409, 'This enquiry is already being submitted')
+        if reason.get('Code') == 'ConditionalCheckFailed' and 'Item' in reason:
+            result.append(reason['Item']['enquiryId']['S'])
+        else:
+            result.append(None)
+    return result if any(result) else None
+
+
+def merge(enquiry_id, submitted_at, claims=()):
+    """
+    Record a repeat submission on the existing enquiry instead of storing a
+    new one, in one transaction with `claims` (the idempotency record) if
+    there are any. An update without sheetRetry, so the sheet sync adds no
+    row. Returns False if the enquiry no longer exists.
+    """
+    update = {
+        'TableName': ENQUIRY_TABLE,
+        'Key': {'PK': {'S': f'ENQUIRY#{enquiry_id}'}},
+        'UpdateExpression': 'SET lastSubmittedAt = :at ADD repeatSubmissions :one',
+        'ConditionExpression': 'attribute_exists(PK)',
+        'ExpressionAttributeValues': {':at': {'S': submitted_at}, ':one': {'N': '1'}},
+    }
+    try:
+        if claims:
+            core.dynamodb().transact_write_items(TransactItems=[*claims, {'Update': update}])
+        else:
+            core.dynamodb().update_item(**update)
+    except Exception as e:
+        code = core.error_code(e)
+        if code == 'TransactionCanceledException':
+            reasons = getattr(e, 'response', {}).get('CancellationReasons') or []
+            # Only the enquiry's condition failed; anything else is the caller's
+            if [reason.get('Code') for reason in reasons] != ['None'] * len(claims) + ['ConditionalCheckFailed']:
+                raise
+        elif code != 'ConditionalCheckFailedException':
+            raise
+        return False
+    return True
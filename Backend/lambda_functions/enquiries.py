@@ -0,0 +1,69 @@
+import core
+import schema
+from core import ApiError
+
+
+def _is_complete(child):
+    return bool(child.get('name') and child.get('age') and child.get('selectedCourse'))
+
+
+def primary_course(children):
+    """
+    The course of the first complete child, or None. It is the enquiry's
+    `course` attribute, the CourseIndex key: an enquiry is listed under
+    this one course only, not under every child's.
+    """
+    for child in children:
+        if isinstance(child, dict) and _is_complete(child):
+            return child['selectedCourse']
+    return None
+
+
+def validate(body):
+    """
+    Validate an enquiry submitted by the app against schema.ENQUIRY and
+    return its cleaned fields. Raises ApiError(400) listing every field
+    error.
+    """
+    enquiry = schema.validate_enquiry(body)
+
+    # Children rows may be left blank in the app, but one must be complete
+    children = enquiry['children']
+    course = primary_course(children)
+    if not course:
+        raise ApiError(400, 'At least one child must have name, age, and course selected')
+
+    return {
+        'children': children,
+        'parentName': enquiry['parentName'],
+        'contactNumber': enquiry['contactNumber'],
+        'email': enquiry.get('email') or '',
+        'consent': enquiry['consent'],
+        'todaysDate': enquiry.get('todaysDate', ''),
+        'course': course,
+    }
+
+
+def build_item(enquiry, enquiry_id, phone, submitted_at, source=None):
+    """
+    Build the EnquiryTable item for validated `enquiry` fields. `phone` is
+    the E.164 number for the PhoneIndex and is left out when unknown.
+    """
+    item = {
+        'PK': {'S': f'ENQUIRY#{enquiry_id}'},
+        'enquiryId': {'S': enquiry_id},
+        'children': core.to_attribute(enquiry['children']),
+        'parentName': {'S': enquiry['parentName']},
+        'contactNumber': {'S': enquiry['contactNumber']},
+        'course': {'S': enquiry['course']},
+        'email': {'S': enquiry['email']} if enquiry['email'] else {'NULL': True},
+        'consent': core.to_attribute(enquiry['consent']),
+        'formDate': core.to_attribute(enquiry['todaysDate']),
+        'submittedAt': {'S': submitted_at},
+        'status': {'S': 'pending'}
+    }
+    if phone:
+        item['phone'] = {'S': phone}
+    if source:
+        item['source'] = {'S': source}
+    return item
@@ -0,0 +1,81 @@
+import json
+import os
+import time
+
+import core
+from core import ApiError
+
+
+# Environment variables
+IDEMPOTENCY_TABLE = os.environ.get('IDEMPOTENCY_TABLE')
+IDEMPOTENCY_TTL_SECONDS = int(os.environ.get('IDEMPOTENCY_TTL_SECONDS', '86400'))
+
+HEADER_NAME = 'idempotency-key'
+MIN_KEY_LENGTH = 8
+MAX_KEY_LENGTH = 128
+
+
+def get_key(event, body):
+    """
+    Return the client's idempotency key from the Idempotency-Key header or
+    the idempotencyKey body field, or None if neither is sent.
+    """
+    key = None
+    for name, value in (event.get('headers') or {}).items():
+        if name.lower() == HEADER_NAME:
+            key = value
+            break
+    if key is None:
+        key = body.get('idempotencyKey')
+    if key is None:
+        return None
+
+    if not isinstance(key, str) or not MIN_KEY_LENGTH <= len(key.strip()) <= MAX_KEY_LENGTH:
+        raise ApiError(400, f'Idempotency key must be {MIN_KEY_LENGTH}-{MAX_KEY_LENGTH} characters')
+    return key.strip()
+
+
+def record_put(scope, key, payload, now=None):
+    """
+    Build the TransactWriteItems entry that claims `key` and stores the
+    response `payload`. Including it in the same transaction as the write it
+    protects makes the claim and the write one conditional call.
+    An expired record that TTL hasn't removed yet can be claimed again.
+    """
+    now = int(time.time()) if now is None else now
+    return {
+        'Put': {
+            'TableName': IDEMPOTENCY_TABLE,
+            'Item': {
+                'PK': {'S': f'IDEMPOTENCY#{scope}#{key}'},
+                'response': {'S': json.dumps(payload)},
+                'createdAt': {'N': str(now)},
+                'TTL': {'N': str(now + IDEMPOTENCY_TTL_SECONDS)},
+            },
+            'ConditionExpression': 'attribute_not_exists(PK) OR #ttl < :now',
+            'ExpressionAttributeNames': {'#ttl': 'TTL'},
+            'ExpressionAttributeValues': {':now': {'N': str(now)}},
+            'ReturnValuesOnConditionCheckFailure': 'ALL_OLD',
+        }
+    }
+
+
+def replayed_response(error, index=0):
+    """
+    If `error` cancelled a transaction because the idempotency record at
+    `index` already exists, return the stored response payload. Returns None
+    for any other error. A concurrent in-flight request with the same key
+    raises ApiError(409).
+    """
+    if core.error_code(error) != 'TransactionCanceledException':
+        return None
+    reasons = getattr(error, 'response', {}).get('CancellationReasons') or []
+    if len(reasons) <= index:
+        return None
+
+    reason = reasons[index]
+    if reason.get('Code') == 'ConditionalCheckFailed' and 'Item' in reason:
+        return json.loads(reason['Item']['response']['S'])
+    if reason.get('Code') == 'TransactionConflict':
+        raise ApiError(409, 'A request with this idempotency key is already in progress')
+    return None
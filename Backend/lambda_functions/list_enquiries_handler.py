@@ -0,0 +1,143 @@
+import time
+
+_INIT_START = time.perf_counter()
+
+import base64
+import json
+import os
+import re
+
+import core
+import metrics
+from core import ApiError, api_handler
+
+
+# Environment variables
+ENQUIRY_TABLE = os.environ.get('ENQUIRY_TABLE')
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 100
+
+# Index name -> (partition key attribute, query parameter)
+INDEXES = {
+    'PhoneIndex': ('phone', 'phone'),
+    'CourseIndex': ('course', 'course'),
+    'StatusIndex': ('status', 'status'),
+}
+
+# The indexes deployed so far; they are added one deploy at a time (see
+# enquiryIndexes in backend_stack.py)
+ENQUIRY_INDEXES = os.environ.get('ENQUIRY_INDEXES', ','.join(INDEXES)).split(',')
+
+_DATE_PATTERN = re.compile(r'^\d{4}-\d{2}(-\d{2})?$')
+
+
+def encode_cursor(last_evaluated_key):
+    return base64.urlsafe_b64encode(json.dumps(last_evaluated_key, separators=(',', ':')).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, index_name, partition_value):
+    """
+    Decode a cursor from a previous page. Only keys of the index and
+    partition being queried are accepted.
+    """
+    partition_key = INDEXES[index_name][0]
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except ValueError:
+        raise ApiError(400, 'Invalid cursor')
+    if (not isinstance(key, dict) or set(key) != {'PK', partition_key, 'submittedAt'}
+            or not all(isinstance(v, dict) and isinstance(v.get('S'), str) and len(v) == 1 for v in key.values())
+            or key[partition_key]['S'] != partition_value):
+        raise ApiError(400, 'Invalid cursor')
+    return key
+
+
+def choose_index(params):
+    """
+    Pick the index and partition value for the query parameters:
+    phone, else course, else status (default "pending").
+    """
+    if params.get('phone'):
+        phone = core.to_e164(params['phone'])
+        if not phone:
+            raise ApiError(400, 'Invalid phone number')
+        return 'PhoneIndex', phone
+    if params.get('course'):
+        return 'CourseIndex', params['course'].strip().lower()
+    return 'StatusIndex', params.get('status', 'pending').strip().lower()
+
+
+@api_handler
+def lambda_handler(body, event, context):
+    """
+    Lambda handler for GET /enquiries (IAM-authenticated, for staff)
+
+    Query parameters (one of phone / course / status picks the index):
+        phone   - enquiries for a phone number (any format to_e164 accepts)
+        course  - enquiries whose primary course is ucmas / imaths / obotz
+        status  - enquiries with this status (default "pending")
+        date    - only those submitted on YYYY-MM-DD (or in YYYY-MM)
+        order   - "desc" (newest first, default) or "asc"
+        limit   - page size, 1-100 (default 50)
+        cursor  - nextCursor from the previous page
+
+    Returns:
+    {
+        "items": [ { enquiry }, ... ],
+        "nextCursor": "opaque-string" | null
+    }
+
+    Every page is one Query against a global secondary index, so the cost
+    grows with the page size, not the table size.
+    """
+    params = event.get('queryStringParameters') or {}
+    index_name, partition_value = choose_index(params)
+    partition_key, parameter = INDEXES[index_name]
+    if index_name not in ENQUIRY_INDEXES:
+        raise ApiError(400, f'Listing by {parameter} is not available yet')
+
+    try:
+        limit = int(params.get('limit', DEFAULT_PAGE_SIZE))
+    except ValueError:
+        raise ApiError(400, 'limit must be a number')
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise ApiError(400, f'limit must be between 1 and {MAX_PAGE_SIZE}')
+
+    key_condition = '#pk = :pk'
+    names = {'#pk': partition_key}
+    values = {':pk': {'S': partition_value}}
+
+    date = params.get('date')
+    if date:
+        if not _DATE_PATTERN.match(date):
+            raise ApiError(400, 'date must be YYYY-MM-DD or YYYY-MM')
+        key_condition += ' AND begins_with(submittedAt, :date)'
+        values[':date'] = {'S': date}
+
+    query = {
+        'TableName': ENQUIRY_TABLE,
+        'IndexName': index_name,
+        'KeyConditionExpression': key_condition,
+        'ExpressionAttributeNames': names,
+        'ExpressionAttributeValues': values,
+        'ScanIndexForward': params.get('order', 'desc') == 'asc',
+        'Limit': limit,
+    }
+    if params.get('cursor'):
+        query['ExclusiveStartKey'] = decode_cursor(params['cursor'], index_name, partition_value)
+
+    try:
+        response = core.dynamodb().query(**query)
+    except Exception as e:
+        metrics.log(f"DynamoDB query error: {str(e)}")
+        raise ApiError(500, 'Failed to list enquiries')
+
+    last_key = response.get('LastEvaluatedKey')
+    return {
+        'items': [core.from_item(item) for item in response.get('Items', [])],
+        'nextCursor': encode_cursor(last_key) if last_key else None
+    }
+
+
+INIT_DURATION_MS = (time.perf_counter() - _INIT_START) * 1000
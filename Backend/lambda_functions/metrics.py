@@ -0,0 +1,190 @@
+"""
+Timing of external calls, emitted as CloudWatch Embedded Metric Format.
+
+Every client returned by core.client() is wrapped so each API call is timed
+as "<service>.<operation>" (e.g. dynamodb.put_item, sns.publish); Google
+Sheets calls are timed with timer() in sheets.py. A handler invocation is
+bracketed by begin() and flush(), which writes one EMF line to stdout with
+FunctionName/ColdStart dimensions. CloudWatch turns that into metrics with
+no API calls from the function.
+
+Outside Lambda (METRICS_MODE=local, the default there) nothing is printed;
+samples are kept in memory and summary() returns percentiles, so a harness
+driving the handlers against fakes can see where the time goes.
+
+log() is print() with secrets scrubbed; use it for anything that may
+contain request data or exception text.
+"""
+import contextlib
+import json
+import os
+import re
+import time
+
+
+# Environment variables
+FUNCTION_NAME = os.environ.get('AWS_LAMBDA_FUNCTION_NAME', 'local')
+METRICS_MODE = os.environ.get('METRICS_MODE') or ('emf' if 'AWS_LAMBDA_FUNCTION_NAME' in os.environ else 'local')
+METRICS_NAMESPACE = os.environ.get('METRICS_NAMESPACE', 'EnquiryApp')
+
+# Metric name -> [milliseconds, ...] for the current invocation
+_current = {}
+_counts = {}
+_dimensions = {'FunctionName': FUNCTION_NAME, 'ColdStart': 'cold'}
+# Called by flush() before emitting, to add metrics sampled from elsewhere
+_collectors = []
+
+# Local mode: (metric name, cold/warm) -> every sample seen
+_samples = {}
+
+_SCRUB_PATTERNS = [
+    # Key/value pairs that must never be logged: "otp": "1234", otp_hash=...
+    (re.compile(r'''(["']?(?:otp|code|otp_mac|otp_hash|otp_salt|verificationToken|SecretString|private_key)["']?\s*[:=]\s*)'''
+                r'''(?:"[^"]*"|'[^']*'|[^\s,}]+)''', re.IGNORECASE), r'\1"[redacted]"'),
+    # Verification tokens (kid.payload.signature)
+    (re.compile(r'\b[\w-]{1,32}\.[A-Za-z0-9_-]{16,}\.[A-Za-z0-9_-]{16,}\b'), '[token]'),
+    # SHA-256 hex digests
+    (re.compile(r'\b[0-9a-f]{64}\b'), '[hash]'),
+    # Phone numbers: keep the last four digits
+    (re.compile(r'\+\d{3,11}(\d{4})\b'), r'+***\1'),
+]
+
+
+def scrub(text):
+    text = str(text)
+    for pattern, replacement in _SCRUB_PATTERNS:
+        text = pattern.sub(replacement, text)
+    return text
+
+
+def log(message):
+    print(scrub(message))
+
+
+def begin(cold_start):
+    """Start collecting metrics for a new invocation."""
+    _current.clear()
+    _counts.clear()
+    _dimensions['ColdStart'] = 'cold' if cold_start else 'warm'
+
+
+def record(name, milliseconds):
+    if METRICS_MODE == 'local':
+        # Straight into the aggregate, so concurrent harness threads don't
+        # lose samples to each other's begin()/flush()
+        _samples.setdefault((name, _dimensions['ColdStart']), []).append(milliseconds)
+    else:
+        _current.setdefault(name, []).append(milliseconds)
+
+
+def count(name, value=1):
+    _counts[name] = _counts.get(name, 0) + value
+
+
+@contextlib.contextmanager
+def timer(name):
+    """Time the block as `name`; failures also count as `name`.errors."""
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        count(f'{name}.errors')
+        raise
+    finally:
+        record(name, (time.perf_counter() - start) * 1000)
+
+
+class _InstrumentedClient:
+    """
+    Proxy for a boto3 client (or a fake) that times every method call.
+    Non-callable attributes such as `exceptions` pass straight through.
+    """
+
+    def __init__(self, service, client):
+        self._service = service
+        self._client = client
+
+    def __getattr__(self, attribute):
+        value = getattr(self._client, attribute)
+        if not callable(value) or attribute.startswith('_'):
+            return value
+        name = f'{self._service}.{attribute}'
+
+        def call(*args, **kwargs):
+            with timer(name):
+                return value(*args, **kwargs)
+
+        # Cache on the proxy so later lookups skip __getattr__
+        setattr(self, attribute, call)
+        return call
+
+
+def instrument(service, client):
+    if METRICS_MODE == 'off' or isinstance(client, _InstrumentedClient):
+        return client
+    return _InstrumentedClient(service, client)
+
+
+def add_collector(collector):
+    """Call `collector()` at every flush(), e.g. to count() from a sampled total."""
+    _collectors.append(collector)
+
+
+def flush(properties=None):
+    """
+    Emit (or, locally, aggregate) the metrics collected since begin().
+    `properties` are logged alongside the metrics but are not dimensions.
+    """
+    for collector in _collectors:
+        collector()
+    if METRICS_MODE == 'emf' and (_current or _counts):
+        document = {
+            '_aws': {
+                'Timestamp': int(time.time() * 1000),
+                'CloudWatchMetrics': [{
+                    'Namespace': METRICS_NAMESPACE,
+                    'Dimensions': [['FunctionName', 'ColdStart'], ['FunctionName']],
+                    'Metrics': [{'Name': name, 'Unit': 'Milliseconds'} for name in _current]
+                    + [{'Name': name, 'Unit': 'Count'} for name in _counts],
+                }],
+            },
+            **_dimensions,
+            **_current,
+            **_counts,
+        }
+        trace_id = os.environ.get('_X_AMZN_TRACE_ID')
+        if trace_id:
+            document['traceId'] = trace_id
+        document.update({key: value for key, value in (properties or {}).items() if value is not None})
+        print(json.dumps(document, separators=(',', ':')))
+
+    _current.clear()
+    _counts.clear()
+
+
+def summary():
+    """
+    Local mode: percentiles per metric and cold/warm, in milliseconds.
+    """
+    result = {}
+    for (name, start), values in sorted(_samples.items()):
+        ordered = sorted(values)
+
+        def percentile(p):
+            return ordered[min(len(ordered) - 1, int(len(ordered) * p))]
+
+        result[f'{name} ({start})'] = {
+            'count': len(ordered),
+            'p50': percentile(0.50),
+            'p90': percentile(0.90),
+            'p95': percentile(0.95),
+            'p99': percentile(0.99),
+            'max': ordered[-1],
+        }
+    return result
+
+
+def reset():
+    _samples.clear()
+    _current.clear()
+    _counts.clear()
@@ -0,0 +1,89 @@
+import hashlib
+import hmac
+
+import tokens
+
+
+# Bytes of HMAC-SHA256 kept on the OTP# item
+MAC_BYTES = 16
+
+# HMAC state keyed with the OTP key for each verification key:
+# {(key id, verification key): hmac object}. Keying HMAC hashes the key
+# pads once; each code then only copies the state, so the key is derived
+# and padded once per container (and again after a rotation)
+_otp_macs = {}
+
+
+def _otp_mac_state(kid, key):
+    state = _otp_macs.get((kid, key))
+    if state is None:
+        # A key of its own, so an OTP MAC can never double as a token signature
+        otp_key = hmac.new(key, b'otp', hashlib.sha256).digest()
+        state = _otp_macs[(kid, key)] = hmac.new(otp_key, digestmod=hashlib.sha256)
+    return state
+
+
+def otp_mac(request_id, otp_code, kid=None):
+    """
+    Return (key id, MAC) for an OTP bound to its request, keyed with the
+    verification key `kid` (the current one by default). Without the key,
+    a leaked item can't be checked against the 10,000 possible codes.
+    The MAC is None if `kid` is not in the key set.
+    """
+    current, keys = tokens.get_key_set()
+    kid = kid or current
+    if kid not in keys:
+        return kid, None
+    state = _otp_mac_state(kid, keys[kid]).copy()
+    state.update(f'{request_id}:{otp_code}'.encode())
+    return kid, state.digest()[:MAC_BYTES]
+
+
+def otp_hash(request_id, otp_code):
+    """
+    Unkeyed hash stored as `otp_hash` by items written before otp_mac().
+    """
+    return hashlib.sha256(f'{request_id}:{otp_code}'.encode()).hexdigest()
+
+
+def legacy_otp_hash(salt, otp_code):
+    """
+    Hash used for items written with a separate random `otp_salt`.
+    """
+    return hashlib.sha256((salt + otp_code).encode()).hexdigest()
+
+
+def expires_at(item):
+    """
+    Expiry of an OTP# item: the TTL attribute, or expiresAt on items
+    written before TTL was the only copy.
+    """
+    return int((item.get('TTL') or item.get('expiresAt') or {'N': '0'})['N'])
+
+
+def match(item, request_id, otp_code):
+    """
+    Check `otp_code` against the digest stored on `item`, in whichever
+    format it was written, in constant time.
+
+    Returns (digest attribute, value, expiry attribute) to consume the item
+    with if the code matches, otherwise None.
+    """
+    if 'otp_mac' in item:
+        _, expected = otp_mac(request_id, otp_code, item['kid']['S'])
+        stored = item['otp_mac']['B']
+        if expected is not None and hmac.compare_digest(expected, stored):
+            return 'otp_mac', {'B': stored}, 'TTL'
+        return None
+
+    # Old-format items, accepted until they expire
+    if 'otp_hash' not in item:
+        return None
+    if 'otp_salt' in item:
+        expected = legacy_otp_hash(item['otp_salt']['S'], otp_code)
+    else:
+        expected = otp_hash(request_id, otp_code)
+    stored = item['otp_hash']['S']
+    if hmac.compare_digest(expected.encode(), stored.encode()):
+        return 'otp_hash', {'S': stored}, 'expiresAt'
+    return None
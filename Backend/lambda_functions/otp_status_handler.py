@@ -0,0 +1,52 @@
+import time
+
+_INIT_START = time.perf_counter()
+
+import os
+
+import core
+import metrics
+import otp
+from core import ApiError, api_handler
+
+# Environment variables
+OTP_TABLE = os.environ.get('OTP_TABLE')
+
+
+@api_handler
+def lambda_handler(body, event, context):
+    """
+    Lambda handler for GET /request/{requestId}
+
+    Returns the SMS delivery state recorded by sms_dispatch_handler:
+    {
+        "requestId": "uuid-string",
+        "deliveryStatus": "queued" | "retrying" | "sent" | "failed"
+    }
+    """
+    request_id = ((event.get('pathParameters') or {}).get('requestId') or '').strip()
+    if not request_id:
+        raise ApiError(400, 'Missing required fields')
+
+    try:
+        response = core.dynamodb().get_item(
+            TableName=OTP_TABLE,
+            Key={'PK': {'S': f'OTP#{request_id}'}},
+            ProjectionExpression='deliveryStatus, #ttl, expiresAt',
+            ExpressionAttributeNames={'#ttl': 'TTL'}
+        )
+    except Exception as e:
+        metrics.log(f"DynamoDB get error: {str(e)}")
+        raise ApiError(500, 'Failed to retrieve OTP')
+
+    item = response.get('Item')
+    if not item or otp.expires_at(item) <= int(time.time()):
+        raise ApiError(404, 'OTP not found or already used')
+
+    return {
+        'requestId': request_id,
+        'deliveryStatus': item.get('deliveryStatus', {}).get('S', 'queued')
+    }
+
+
+INIT_DURATION_MS = (time.perf_counter() - _INIT_START) * 1000
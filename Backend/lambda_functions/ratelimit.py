@@ -0,0 +1,123 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import core
+from core import ApiError
+
+
+# Environment variables
+RATE_LIMIT_TABLE = os.environ.get('RATE_LIMIT_TABLE')
+OTP_REQUESTS_PER_WINDOW = int(os.environ.get('OTP_REQUESTS_PER_WINDOW', '5'))
+OTP_REQUEST_WINDOW_SECONDS = int(os.environ.get('OTP_REQUEST_WINDOW_SECONDS', '3600'))
+OTP_RESEND_COOLDOWN_SECONDS = int(os.environ.get('OTP_RESEND_COOLDOWN_SECONDS', '30'))
+OTP_MAX_VERIFY_ATTEMPTS = int(os.environ.get('OTP_MAX_VERIFY_ATTEMPTS', '5'))
+LOCAL_BURST = int(os.environ.get('RATE_LIMIT_LOCAL_BURST', '3'))
+LOCAL_REFILL_PER_SECOND = float(os.environ.get('RATE_LIMIT_LOCAL_REFILL_PER_SECOND', '0.2'))
+
+
+class TokenBucket:
+    """
+    Per-key token bucket kept in the container. It only sees the traffic
+    that reaches this container, so it is a cheap first filter for obvious
+    bursts; the DynamoDB counters are the real limit.
+    """
+
+    def __init__(self, capacity, refill_per_second, max_keys=10000):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key, now=None):
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            tokens, updated_at = self._buckets.pop(key, (self.capacity, now))
+            tokens = min(self.capacity, tokens + (now - updated_at) * self.refill_per_second)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return allowed
+
+
+_request_buckets = TokenBucket(LOCAL_BURST, LOCAL_REFILL_PER_SECOND)
+# Never tighter than the attempt limit, so someone retyping a code reaches
+# that limit (and its "request a new code" message) before this filter
+_verify_buckets = TokenBucket(max(LOCAL_BURST, OTP_MAX_VERIFY_ATTEMPTS), LOCAL_REFILL_PER_SECOND)
+
+
+def check_otp_request(phone, now=None):
+    """
+    Enforce the per-phone OTP quota and resend cooldown with one atomic
+    conditional update. The counter is only incremented when the request is
+    allowed, and the item expires with its window. Raises ApiError(429).
+    """
+    if not _request_buckets.take(phone):
+        raise ApiError(429, 'Too many verification requests. Please try again later.')
+
+    now = int(time.time()) if now is None else now
+    window_start = now - now % OTP_REQUEST_WINDOW_SECONDS
+
+    try:
+        core.dynamodb().update_item(
+            TableName=RATE_LIMIT_TABLE,
+            Key={'PK': {'S': f'OTP_REQUEST#{phone}#{window_start}'}},
+            UpdateExpression='ADD requestCount :one SET lastRequestAt = :now, #ttl = :ttl',
+            ConditionExpression='attribute_not_exists(PK) OR (requestCount < :limit AND lastRequestAt <= :cooldown_cutoff)',
+            ExpressionAttributeNames={'#ttl': 'TTL'},
+            ExpressionAttributeValues={
+                ':one': {'N': '1'},
+                ':now': {'N': str(now)},
+                ':ttl': {'N': str(window_start + OTP_REQUEST_WINDOW_SECONDS)},
+                ':limit': {'N': str(OTP_REQUESTS_PER_WINDOW)},
+                ':cooldown_cutoff': {'N': str(now - OTP_RESEND_COOLDOWN_SECONDS)},
+            },
+            ReturnValuesOnConditionCheckFailure='ALL_OLD',
+        )
+    except Exception as e:
+        if core.error_code(e) != 'ConditionalCheckFailedException':
+            raise
+        item = getattr(e, 'response', {}).get('Item') or {}
+        last_request_at = int(item.get('lastRequestAt', {}).get('N', '0'))
+        wait = last_request_at + OTP_RESEND_COOLDOWN_SECONDS - now
+        if wait > 0 and int(item.get('requestCount', {}).get('N', '0')) < OTP_REQUESTS_PER_WINDOW:
+            raise ApiError(429, f'Please wait {wait} seconds before requesting another code.')
+        raise ApiError(429, 'Too many verification requests. Please try again later.')
+
+
+def check_verify_burst(request_id):
+    """
+    In-process filter for rapid-fire guesses against one request ID. The
+    persistent attempt limit is enforced on the OTP# item (see
+    record_failed_attempt). Its message must not read like that limit's:
+    the app offers a new code on "Too many attempts".
+    """
+    if not _verify_buckets.take(request_id):
+        raise ApiError(429, 'Slow down. Please wait a few seconds and try again.')
+
+
+def record_failed_attempt(table, key):
+    """
+    Count a failed verification on the OTP# item with one atomic ADD; the
+    counter expires with the item's TTL. Returns the new attempt count, or
+    None if the item no longer exists.
+    """
+    try:
+        response = core.dynamodb().update_item(
+            TableName=table,
+            Key=key,
+            UpdateExpression='ADD verifyAttempts :one',
+            ConditionExpression='attribute_exists(PK)',
+            ExpressionAttributeValues={':one': {'N': '1'}},
+            ReturnValues='UPDATED_NEW',
+        )
+    except Exception as e:
+        if core.error_code(e) != 'ConditionalCheckFailedException':
+            raise
+        return None
+    return int(response['Attributes']['verifyAttempts']['N'])
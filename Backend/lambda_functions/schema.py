@@ -0,0 +1,281 @@
+"""
+Request body schemas and the compiler that turns them into validators.
+
+Schemas are plain JSON Schema (the draft-4 subset API Gateway models also
+understand): type, properties, required, minLength, maxLength, pattern,
+enum, items, minItems and maxItems. `description` names the field in error
+messages and `x-error` overrides the message for a failed pattern, enum or
+item count.
+
+compile_schema() walks a schema once, at import, and returns a function
+that validates a parsed body in a single pass, collecting every field
+error instead of stopping at the first. The cleaned body keeps only the
+declared properties of each object. gateway_model() derives the API
+Gateway request model from the same schema.
+"""
+import re
+
+from core import ApiError
+
+
+COURSES = ['imaths', 'ucmas', 'obotz']
+MAX_CHILDREN = 5
+
+E164_PATTERN = r'^\+[1-9]\d{6,14}$'
+
+_TYPES = {
+    'boolean': (bool,),
+    'integer': (int,),
+}
+
+_TYPE_NAMES = {
+    'string': 'a string',
+    'boolean': 'true or false',
+    'integer': 'an integer',
+    'array': 'a list',
+    'object': 'an object',
+}
+
+
+def _path(parent, key):
+    """The error path of `key`, a property name or list index, in `parent`."""
+    if type(key) is int:
+        return f"{parent}[{key}]"
+    return f"{parent}.{key}" if parent else key
+
+
+def _compile(schema, label):
+    """
+    Return check(value, parent, key, errors) -> cleaned value for one
+    schema node, the value at `key` in the container at path `parent`.
+    Errors are added to `errors` as {path: message}; strings are stripped.
+
+    Each type gets its own closure with the schema's limits bound as
+    locals, so validating a body does no schema lookups at all. Paths are
+    only built for errors and for the containers a property sits in.
+    """
+    kind = schema['type']
+    name = schema.get('description', label)
+    type_error = f"{name} must be {_TYPE_NAMES[kind]}"
+    custom_error = schema.get('x-error')
+
+    allowed = frozenset(schema['enum']) if 'enum' in schema else None
+    if allowed is None:
+        enum_error = None
+    elif schema['enum'] == [True]:
+        enum_error = custom_error or f"{name} is required"
+    else:
+        enum_error = custom_error or f"{name} must be one of: {', '.join(str(v) for v in schema['enum'] if v != '')}"
+
+    if kind == 'string':
+        return _compile_string(schema, name, type_error, custom_error, allowed, enum_error)
+    if kind == 'array':
+        return _compile_array(schema, label, name, type_error, custom_error)
+    if kind == 'object':
+        return _compile_object(schema, type_error)
+
+    types = _TYPES[kind]
+
+    def check_scalar(value, parent, key, errors):
+        # bool is an int subclass, so it never counts as an integer
+        if type(value) not in types:
+            errors[_path(parent, key) or label] = type_error
+        elif allowed is not None and value not in allowed:
+            errors[_path(parent, key) or label] = enum_error
+        return value
+
+    return check_scalar
+
+
+def _compile_string(schema, name, type_error, custom_error, allowed, enum_error):
+    min_length = schema.get('minLength', 0)
+    max_length = schema.get('maxLength', float('inf'))
+    match = re.compile(schema['pattern']).match if 'pattern' in schema else None
+    too_short = f"{name} is required" if min_length == 1 else f"{name} must be at least {min_length} characters"
+    too_long = f"{name} must be at most {max_length} characters"
+    pattern_error = custom_error or f"{name} is not in a valid format"
+
+    def check_string(value, parent, key, errors):
+        if type(value) is not str:
+            errors[_path(parent, key)] = type_error
+            return value
+        value = value.strip()
+        length = len(value)
+        if length < min_length:
+            errors[_path(parent, key)] = too_short
+        elif length > max_length:
+            errors[_path(parent, key)] = too_long
+        # Empty optional strings are not pattern-checked
+        elif match is not None and value and match(value) is None:
+            errors[_path(parent, key)] = pattern_error
+        elif allowed is not None and value not in allowed:
+            errors[_path(parent, key)] = enum_error
+        return value
+
+    return check_string
+
+
+def _compile_array(schema, label, name, type_error, custom_error):
+    min_items = schema.get('minItems', 0)
+    max_items = schema.get('maxItems', float('inf'))
+    too_few = custom_error or f"{name} must have at least {min_items} items"
+    too_many = custom_error or f"{name} must have at most {max_items} items"
+    check_item = _compile(schema['items'], label) if 'items' in schema else None
+
+    def check_array(value, parent, key, errors):
+        if type(value) is not list:
+            errors[_path(parent, key)] = type_error
+            return value
+        count = len(value)
+        if count < min_items:
+            errors[_path(parent, key)] = too_few
+            return value
+        if count > max_items:
+            errors[_path(parent, key)] = too_many
+            return value
+        if check_item is None:
+            return value
+        path = _path(parent, key)
+        return [check_item(item, path, index, errors) for index, item in enumerate(value)]
+
+    return check_array
+
+
+def _compile_object(schema, type_error):
+    required = set(schema.get('required', ()))
+    properties = [
+        (key, _compile(child, key), key in required, f"{child.get('description', key)} is required")
+        for key, child in schema.get('properties', {}).items()
+    ]
+
+    def check_object(value, parent, key, errors):
+        if type(value) is not dict:
+            errors[_path(parent, key) or 'body'] = type_error
+            return value
+        # Undeclared properties are dropped rather than stored
+        cleaned = {}
+        path = _path(parent, key)
+        for name, check_property, is_required, missing_error in properties:
+            item = value.get(name)
+            if item is not None:
+                cleaned[name] = check_property(item, path, name, errors)
+            elif is_required:
+                errors[_path(path, name)] = missing_error
+        return cleaned
+
+    return check_object
+
+
+def compile_schema(schema):
+    """
+    Compile `schema` into validate(body) -> cleaned body, which raises one
+    ApiError(400) listing every field error (see ApiError.details).
+    """
+    check = _compile(schema, 'body')
+
+    def validate(body):
+        errors = {}
+        cleaned = check(body, '', '', errors)
+        if errors:
+            raise ApiError(400, next(iter(errors.values())), details=errors)
+        return cleaned
+
+    return validate
+
+
+# Constraints API Gateway checks before invoking the function. String
+# constraints stay with the function, which strips whitespace before
+# checking them; the gateway would reject values the function accepts.
+_GATEWAY_KEYWORDS = ('type', 'description', 'required', 'minItems', 'maxItems')
+
+
+def gateway_model(schema):
+    """
+    Return a draft-4 copy of `schema` for an API Gateway request model,
+    keeping only the checks it shares with the compiled validator.
+    """
+    model = {key: schema[key] for key in _GATEWAY_KEYWORDS if key in schema}
+    if 'enum' in schema and schema['type'] != 'string':
+        model['enum'] = schema['enum']
+    if 'properties' in schema:
+        required = schema.get('required', ())
+        model['properties'] = {}
+        for name, child in schema['properties'].items():
+            model['properties'][name] = gateway_model(child)
+            if name not in required:
+                # The validator treats an optional null like a missing field
+                model['properties'][name]['type'] = [child['type'], 'null']
+    if 'items' in schema:
+        model['items'] = gateway_model(schema['items'])
+    return model
+
+
+CHILD = {
+    'type': 'object',
+    'properties': {
+        'id': {'type': 'string', 'maxLength': 64},
+        'name': {'type': 'string', 'description': 'Child name', 'maxLength': 100},
+        # Ages like 4.5 (or 4,5) come from the app's decimal keypad
+        'age': {
+            'type': 'string', 'description': 'Child age', 'maxLength': 5,
+            'pattern': r'^\d{1,2}([.,]\d{0,2})?$', 'x-error': 'Child age must be a number',
+        },
+        'selectedCourse': {'type': 'string', 'description': 'Course', 'enum': [''] + COURSES},
+    },
+}
+
+ENQUIRY = {
+    'type': 'object',
+    'required': ['children', 'parentName', 'contactNumber', 'consent'],
+    'properties': {
+        'children': {
+            'type': 'array', 'description': 'Children', 'minItems': 1, 'maxItems': MAX_CHILDREN, 'items': CHILD,
+            'x-error': f'Between 1 and {MAX_CHILDREN} children are required',
+        },
+        'parentName': {'type': 'string', 'description': 'Parent name', 'minLength': 1, 'maxLength': 100},
+        'contactNumber': {
+            'type': 'string', 'description': 'Contact number', 'minLength': 1, 'maxLength': 20,
+            'pattern': r'^\+?[\d\s().-]{7,20}$', 'x-error': 'Contact number is not a valid phone number',
+        },
+        'email': {
+            'type': 'string', 'description': 'Email', 'maxLength': 254,
+            'pattern': r'^[^@\s]+@[^@\s]+\.[^@\s]+$', 'x-error': 'Email is not a valid email address',
+        },
+        'consent': {'type': 'boolean', 'description': 'Consent', 'enum': [True]},
+        'todaysDate': {'type': 'string', 'maxLength': 32},
+        'verificationToken': {'type': 'string', 'maxLength': 1024},
+        'idempotencyKey': {'type': 'string', 'maxLength': 128},
+        'clientId': {'type': 'string', 'maxLength': 128},
+    },
+}
+
+REQUEST_OTP = {
+    'type': 'object',
+    'required': ['phone'],
+    'properties': {
+        'phone': {
+            'type': 'string', 'description': 'Phone', 'minLength': 1, 'pattern': E164_PATTERN,
+            'x-error': 'Invalid phone format. Expected E.164 format (e.g., +11234567890)',
+        },
+    },
+}
+
+VERIFY_OTP = {
+    'type': 'object',
+    'required': ['requestId', 'otp'],
+    'properties': {
+        'requestId': {
+            'type': 'string', 'description': 'Request ID', 'minLength': 1,
+            'pattern': r'^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$',
+            'x-error': 'Invalid request ID',
+        },
+        'otp': {
+            'type': 'string', 'description': 'OTP code', 'minLength': 1,
+            'pattern': r'^\d{4}$', 'x-error': 'OTP code must be 4 digits',
+        },
+    },
+}
+
+validate_enquiry = compile_schema(ENQUIRY)
+validate_request_otp = compile_schema(REQUEST_OTP)
+validate_verify_otp = compile_schema(VERIFY_OTP)
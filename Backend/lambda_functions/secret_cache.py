@@ -0,0 +1,176 @@
+"""
+In-process cache for Secrets Manager secret strings.
+
+Each secret is cached for its TTL. Within SECRET_REFRESH_AHEAD_SECONDS of
+expiry, a read still returns the cached value but starts a background
+refresh, so warm invocations don't wait on Secrets Manager. Only a missing
+or fully expired value is fetched synchronously.
+
+Rotation: the secret's VersionId is tracked (see version()), so callers that
+build clients from a secret can rebuild them when it changes, and
+expire() lets a caller that hit an auth error force a re-read (at most every
+MIN_FORCED_REFRESH_SECONDS).
+
+prefetch() starts the first fetch in a background thread, typically at
+module import. The Lambda init phase then overlaps it with the remaining
+imports, and with provisioned concurrency it completes before the first
+request arrives.
+"""
+import os
+import threading
+import time
+
+import core
+import metrics
+
+
+# Environment variables
+SECRET_CACHE_TTL_SECONDS = int(os.environ.get('SECRET_CACHE_TTL_SECONDS', '3600'))
+SECRET_REFRESH_AHEAD_SECONDS = int(os.environ.get('SECRET_REFRESH_AHEAD_SECONDS', '300'))
+SECRET_PREFETCH = os.environ.get('SECRET_PREFETCH', '0') == '1'
+
+# Forced refreshes (unknown key ids, auth failures) hit Secrets Manager at
+# most this often per secret
+MIN_FORCED_REFRESH_SECONDS = 30
+
+_entries = {}
+_entries_lock = threading.Lock()
+
+# Exposed so callers can log how often the cache avoids a fetch
+cache_stats = {
+    'hits': 0,
+    'fetches': 0,
+    'backgroundRefreshes': 0,
+    'rotations': 0,
+}
+
+
+class _Entry:
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self.value = None
+        self.version = None
+        self.expires_at = 0.0
+        self.loaded_at = float('-inf')
+        self.refreshing = False
+        # Held while a synchronous fetch is in flight, so concurrent readers
+        # wait for it instead of fetching the same secret again
+        self.lock = threading.Lock()
+
+
+def _entry(secret_id, ttl=None):
+    entry = _entries.get(secret_id)
+    if entry is None:
+        with _entries_lock:
+            entry = _entries.setdefault(secret_id, _Entry(ttl or SECRET_CACHE_TTL_SECONDS))
+    if ttl is not None:
+        entry.ttl = ttl
+    return entry
+
+
+def _store(entry, response, now):
+    version = response.get('VersionId')
+    if entry.version is not None and version != entry.version:
+        cache_stats['rotations'] += 1
+    entry.value = response['SecretString']
+    entry.version = version
+    entry.loaded_at = now
+    entry.expires_at = now + entry.ttl
+
+
+def _fetch(secret_id, entry):
+    cache_stats['fetches'] += 1
+    response = core.client('secretsmanager').get_secret_value(SecretId=secret_id)
+    _store(entry, response, time.monotonic())
+
+
+def _refresh_in_background(secret_id, entry):
+    def refresh():
+        try:
+            response = core.client('secretsmanager').get_secret_value(SecretId=secret_id)
+            cache_stats['backgroundRefreshes'] += 1
+            with entry.lock:
+                _store(entry, response, time.monotonic())
+        except Exception as e:
+            # Keep serving the cached value; it is fetched synchronously once expired
+            metrics.log(f"Background refresh of {secret_id} failed: {str(e)}")
+        finally:
+            entry.refreshing = False
+
+    entry.refreshing = True
+    threading.Thread(target=refresh, daemon=True).start()
+
+
+def get(secret_id, force_refresh=False, ttl=None):
+    """
+    Return the SecretString of `secret_id`, cached for `ttl` seconds
+    (default SECRET_CACHE_TTL_SECONDS).
+    """
+    entry = _entry(secret_id, ttl)
+    now = time.monotonic()
+    if force_refresh and now - entry.loaded_at < MIN_FORCED_REFRESH_SECONDS:
+        force_refresh = False
+
+    if entry.value is None or force_refresh or now >= entry.expires_at:
+        with entry.lock:
+            # Another thread (or the prefetch) may have fetched it meanwhile
+            if entry.value is None or force_refresh or time.monotonic() >= entry.expires_at:
+                _fetch(secret_id, entry)
+            return entry.value
+
+    cache_stats['hits'] += 1
+    if now >= entry.expires_at - SECRET_REFRESH_AHEAD_SECONDS and not entry.refreshing:
+        _refresh_in_background(secret_id, entry)
+    return entry.value
+
+
+def version(secret_id):
+    """VersionId of the cached value, or None if nothing is cached."""
+    entry = _entries.get(secret_id)
+    return entry.version if entry else None
+
+
+def expire(secret_id):
+    """
+    Mark the cached value stale (e.g. after an auth failure) so the next
+    get() re-reads it, unless it was loaded in the last
+    MIN_FORCED_REFRESH_SECONDS.
+    """
+    entry = _entries.get(secret_id)
+    if entry and time.monotonic() - entry.loaded_at >= MIN_FORCED_REFRESH_SECONDS:
+        entry.expires_at = 0.0
+
+
+def prefetch(secret_id, ttl=None):
+    """
+    Start fetching `secret_id` in a background thread if SECRET_PREFETCH is
+    enabled. A get() issued before it finishes waits for it.
+    """
+    if not SECRET_PREFETCH or not secret_id:
+        return
+    entry = _entry(secret_id, ttl)
+
+    def load():
+        with entry.lock:
+            if entry.value is not None:
+                return
+            try:
+                _fetch(secret_id, entry)
+            except Exception as e:
+                # get() will retry synchronously
+                metrics.log(f"Prefetch of {secret_id} failed: {str(e)}")
+
+    threading.Thread(target=load, daemon=True).start()
+
+
+def put(secret_id, value, version=None):
+    """
+    Install a secret string directly, e.g. for local runs without
+    Secrets Manager. It never expires.
+    """
+    entry = _entry(secret_id)
+    with entry.lock:
+        entry.value = value
+        entry.version = version
+        entry.loaded_at = time.monotonic()
+        entry.expires_at = float('inf')
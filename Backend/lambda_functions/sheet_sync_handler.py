@@ -0,0 +1,168 @@
+import time
+
+_INIT_START = time.perf_counter()
+
+import os
+
+import core
+import metrics
+import sheets
+
+
+# Environment variables
+ENQUIRY_TABLE = os.environ.get('ENQUIRY_TABLE')
+
+# Fetch the Sheets credential in the background during init (SECRET_PREFETCH)
+sheets.prefetch()
+
+_cold_start = True
+
+
+def extract_enquiries(records):
+    """
+    Turn DynamoDB stream records into deserialized enquiry items: newly
+    inserted ENQUIRY# items, except those /submit appends itself (written
+    with sheetWriter), and items /submit handed back after a failed append
+    (modified to carry sheetRetry).
+    """
+    items = []
+    for record in records:
+        event_name = record.get('eventName')
+        if event_name not in ('INSERT', 'MODIFY'):
+            continue
+        image = record.get('dynamodb', {}).get('NewImage')
+        if not image:
+            continue
+        item = core.from_item(image)
+        if not str(item.get('PK', '')).startswith('ENQUIRY#'):
+            continue
+        if event_name == 'INSERT' and item.get('sheetWriter'):
+            continue
+        if event_name == 'MODIFY' and not item.get('sheetRetry'):
+            continue
+        items.append(item)
+    return items
+
+
+def sync_items(items):
+    """
+    Append the enquiries that are not already in the sheet with a single
+    append_rows call. Membership is checked against the cached ID set in
+    the sheets module, so a batch costs O(batch) rather than a read of the
+    whole sheet. A local fake client can be installed with sheets.set_client().
+
+    Returns the list of enquiry IDs written.
+    """
+    if not items:
+        return []
+
+    written = sheets.append_missing([sheets.build_row(item) for item in items])
+    return [row[0] for row in written]
+
+
+def clear_retry(item):
+    """Drop the sheetRetry flag once a released enquiry's row is written."""
+    core.dynamodb().update_item(
+        TableName=ENQUIRY_TABLE,
+        Key={'PK': {'S': item['PK']}},
+        UpdateExpression='REMOVE sheetRetry',
+        ConditionExpression='attribute_exists(PK)',
+    )
+
+
+def sync_records(records):
+    items = extract_enquiries(records)
+    # /submit releases a row whose append missed its deadline, and that
+    # append may land after all: check released items against a fresh read
+    # of the ID column, not the cached set
+    if any(item.get('sheetRetry') for item in items):
+        sheets.forget_known_ids()
+    written = sync_items(items)
+    for item in items:
+        if item.get('sheetRetry'):
+            try:
+                clear_retry(item)
+            except Exception as e:
+                # Harmless: a later MODIFY is then checked against the sheet
+                metrics.log(f"Failed to clear sheetRetry on {item.get('enquiryId')}: {str(e)}")
+    return written
+
+
+def scan_enquiries(since=None):
+    """
+    Yield every ENQUIRY# item in EnquiryTable (submitted at or after
+    `since`, if given), deserialized.
+    """
+    filter_expression = 'begins_with(PK, :prefix)'
+    values = {':prefix': {'S': 'ENQUIRY#'}}
+    if since:
+        filter_expression += ' AND submittedAt >= :since'
+        values[':since'] = {'S': since}
+
+    kwargs = {
+        'TableName': ENQUIRY_TABLE,
+        'FilterExpression': filter_expression,
+        'ExpressionAttributeValues': values,
+    }
+    while True:
+        response = core.dynamodb().scan(**kwargs)
+        for item in response.get('Items', []):
+            yield core.from_item(item)
+        if 'LastEvaluatedKey' not in response:
+            return
+        kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+
+def backfill(since=None, batch_size=500):
+    """
+    Reconcile the sheet against EnquiryTable, appending any enquiry that is
+    missing (e.g. a stream batch that ended up in the DLQ). Reads the table,
+    so it is run on demand rather than per stream batch.
+    """
+    # Start from a fresh read of the ID column
+    sheets.forget_known_ids()
+    written, batch = [], []
+    for item in scan_enquiries(since):
+        batch.append(item)
+        if len(batch) >= batch_size:
+            written.extend(sync_items(batch))
+            batch = []
+    written.extend(sync_items(batch))
+    return written
+
+
+def lambda_handler(event, context):
+    """
+    Lambda handler for the EnquiryTable stream.
+
+    Receives batches of stream records (see the event source in
+    BackendStack) and writes them to Google Sheets in one call per batch,
+    skipping enquiries already in the sheet so redelivered batches don't
+    duplicate rows. Any failure is raised so Lambda retries the batch;
+    DynamoDB stays the source of truth.
+
+    Invoked directly with {"backfill": {"since": "<ISO timestamp>"}} (since
+    is optional), it scans EnquiryTable and appends whatever is missing.
+    """
+    global _cold_start
+    metrics.begin(_cold_start)
+    if _cold_start:
+        _cold_start = False
+        print(f"Module init: {INIT_DURATION_MS:.1f} ms")
+        metrics.record('init', INIT_DURATION_MS)
+
+    try:
+        if 'backfill' in event:
+            written = backfill((event.get('backfill') or {}).get('since'))
+        else:
+            written = sync_records(event.get('Records', []))
+    finally:
+        metrics.flush({'requestId': getattr(context, 'aws_request_id', None)})
+    if written:
+        print(f"Successfully wrote {len(written)} enquiries to Google Sheets")
+    print(f"Sheet handle cache: {sheets.cache_stats}")
+
+    return {'synced': len(written)}
+
+
+INIT_DURATION_MS = (time.perf_counter() - _INIT_START) * 1000
@@ -0,0 +1,272 @@
+import json
+import os
+import time
+
+import clients
+import metrics
+import secret_cache
+
+
+# Environment variables
+SHEET_ID = os.environ.get('SHEET_ID')
+WORKSHEET_NAME = os.environ.get('WORKSHEET_NAME', 'Sheet1')
+SHEET_HANDLE_TTL_SECONDS = int(os.environ.get('SHEET_HANDLE_TTL_SECONDS', '900'))
+GOOGLE_SHEETS_SECRET = os.environ.get('GOOGLE_SHEETS_SECRET')
+
+# HTTP status codes that mean a cached handle can no longer be used
+_AUTH_ERROR_CODES = (401, 403)
+_NOT_FOUND_ERROR_CODES = (404,)
+
+# Column holding enquiryId (see build_row)
+ID_COLUMN = 1
+
+_cached_client = None
+# Secret string the client was authorized with (None for set_client())
+_cached_client_source = None
+_cached_spreadsheet = None
+_cached_worksheet = None
+_handles_expire_at = 0.0
+
+# enquiryIds already in the sheet, read with one col_values call and then
+# kept up to date with every row this container appends
+_known_ids = None
+_known_ids_expire_at = 0.0
+
+# Exposed so callers can log how often warm invocations reuse the handles
+cache_stats = {
+    'hits': 0,
+    'misses': 0,
+    'evictions': 0,
+    'idLoads': 0,
+}
+
+
+def build_row(item):
+    """
+    Build a Google Sheets row from a deserialized ENQUIRY# item.
+    Column order matches the sheet staff already work from.
+    """
+    children = item.get('children') or []
+    children_info = " | ".join([
+        f"{child.get('name', 'N/A')} (Age: {child.get('age', 'N/A')}, Course: {child.get('selectedCourse', 'N/A')})"
+        for child in children
+    ])
+
+    return [
+        item.get('enquiryId', ''),
+        item.get('parentName', ''),
+        item.get('contactNumber', ''),
+        item.get('email') or '',
+        str(item.get('consent', False)),
+        item.get('formDate', ''),
+        children_info,
+        item.get('submittedAt', ''),
+        item.get('status', 'pending'),
+    ]
+
+
+def get_gspread_client():
+    """
+    Return the authorized client. It is rebuilt whenever the cached
+    credential changes, so a rotated service-account key is picked up
+    without waiting for a new container.
+    """
+    global _cached_client, _cached_client_source
+    if _cached_client is not None and _cached_client_source is None:
+        return _cached_client
+
+    # Imported here so the google-auth stack only loads when a sheet is opened
+    # (and before waiting on the secret, so a prefetch overlaps the import);
+    # clients.gspread_client is what uses it
+    import gspread  # noqa: F401
+    secret_string = secret_cache.get(GOOGLE_SHEETS_SECRET)
+    if _cached_client is None or secret_string is not _cached_client_source:
+        secret_dict = json.loads(secret_string)
+        with metrics.timer('sheets.authorize'):
+            _cached_client = clients.gspread_client(secret_dict)
+        _cached_client_source = secret_string
+    return _cached_client
+
+
+def prefetch():
+    """
+    Start loading the service-account credential during module init
+    (see secret_cache.prefetch).
+    """
+    secret_cache.prefetch(GOOGLE_SHEETS_SECRET)
+
+
+def set_client(client):
+    """
+    Replace the authorized client, e.g. with a local fake exposing
+    open_by_key(). Any cached handles are dropped.
+    """
+    global _cached_client, _cached_client_source
+    invalidate()
+    forget_known_ids()
+    _cached_client = client
+    _cached_client_source = None
+
+
+def get_worksheet():
+    """
+    Return the cached worksheet handle, opening the spreadsheet and
+    worksheet (two metadata calls) only on a miss or after the TTL.
+    """
+    global _cached_spreadsheet, _cached_worksheet, _handles_expire_at
+
+    now = time.monotonic()
+    if _cached_worksheet is not None and now < _handles_expire_at:
+        cache_stats['hits'] += 1
+        return _cached_worksheet
+
+    cache_stats['misses'] += 1
+    client = get_gspread_client()
+    with metrics.timer('sheets.open_by_key'):
+        _cached_spreadsheet = client.open_by_key(SHEET_ID)
+    with metrics.timer('sheets.worksheet'):
+        _cached_worksheet = _cached_spreadsheet.worksheet(WORKSHEET_NAME)
+    _handles_expire_at = now + SHEET_HANDLE_TTL_SECONDS
+    return _cached_worksheet
+
+
+def invalidate(reset_client=False):
+    global _cached_client, _cached_spreadsheet, _cached_worksheet, _handles_expire_at
+
+    if _cached_worksheet is not None:
+        cache_stats['evictions'] += 1
+    _cached_spreadsheet = None
+    _cached_worksheet = None
+    _handles_expire_at = 0.0
+    if reset_client:
+        # An auth failure may mean the key was rotated: re-read it too
+        _cached_client = None
+        secret_cache.expire(GOOGLE_SHEETS_SECRET)
+
+
+def _error_code(error):
+    code = getattr(error, 'code', None)
+    if code is None:
+        response = getattr(error, 'response', None)
+        code = getattr(response, 'status_code', None)
+    return code
+
+
+def is_auth_error(error):
+    # Only reached after a gspread call has failed, so gspread is already loaded
+    import gspread
+    return isinstance(error, gspread.exceptions.APIError) and _error_code(error) in _AUTH_ERROR_CODES
+
+
+def is_stale_handle_error(error):
+    import gspread
+    if isinstance(error, (gspread.exceptions.SpreadsheetNotFound, gspread.exceptions.WorksheetNotFound)):
+        return True
+    if isinstance(error, gspread.exceptions.APIError):
+        return _error_code(error) in _AUTH_ERROR_CODES + _NOT_FOUND_ERROR_CODES
+    return False
+
+
+def with_worksheet(operation):
+    """
+    Run `operation(worksheet)` against the cached worksheet. On an auth or
+    not-found error the handles are evicted (and the client too, for auth
+    errors), rebuilt, and the operation is retried once.
+    """
+    try:
+        return operation(get_worksheet())
+    except Exception as e:
+        if not is_stale_handle_error(e):
+            raise
+        metrics.log(f"Evicting cached Google Sheets handles: {str(e)}")
+        invalidate(reset_client=is_auth_error(e))
+        return operation(get_worksheet())
+
+
+def append_rows(rows):
+    def append(worksheet):
+        with metrics.timer('sheets.append_rows'):
+            return worksheet.append_rows(rows)
+
+    return with_worksheet(append)
+
+
+def known_ids():
+    """
+    Return the set of enquiryIds in the sheet. The ID column is read once
+    per SHEET_HANDLE_TTL_SECONDS; in between, the set is maintained from
+    the rows appended through append_missing().
+    """
+    global _known_ids, _known_ids_expire_at
+
+    now = time.monotonic()
+    if _known_ids is None or now >= _known_ids_expire_at:
+        cache_stats['idLoads'] += 1
+        def read_ids(worksheet):
+            with metrics.timer('sheets.col_values'):
+                return worksheet.col_values(ID_COLUMN)
+
+        _known_ids = set(with_worksheet(read_ids))
+        _known_ids_expire_at = now + SHEET_HANDLE_TTL_SECONDS
+    return _known_ids
+
+
+def forget_known_ids():
+    global _known_ids, _known_ids_expire_at
+    _known_ids = None
+    _known_ids_expire_at = 0.0
+
+
+def append_missing(rows):
+    """
+    Append the rows whose enquiryId is not already in the sheet (or
+    earlier in `rows`) with a single append_rows call.
+
+    After a failed append the ID set is dropped, because some rows may have
+    landed; the retry then re-reads the column instead of duplicating them.
+    Returns the rows written.
+    """
+    known = known_ids()
+    missing, seen = [], set()
+    for row in rows:
+        enquiry_id = row[ID_COLUMN - 1]
+        if enquiry_id in known or enquiry_id in seen:
+            continue
+        seen.add(enquiry_id)
+        missing.append(row)
+
+    if not missing:
+        return []
+
+    try:
+        append_rows(missing)
+    except Exception:
+        forget_known_ids()
+        raise
+    known.update(seen)
+    return missing
+
+
+def remove_rows(enquiry_ids):
+    """
+    Delete the rows of `enquiry_ids`, e.g. one appended for an enquiry that
+    was then not stored. Row positions matter here, so the ID column is
+    read fresh rather than taken from the cached set, and rows are deleted
+    bottom-up so each deletion leaves the positions above it alone.
+    Returns the number of rows deleted.
+    """
+    ids = set(enquiry_ids)
+
+    def remove(worksheet):
+        with metrics.timer('sheets.col_values'):
+            column = worksheet.col_values(ID_COLUMN)
+        rows = [index for index, value in enumerate(column, start=1) if value in ids]
+        for row in reversed(rows):
+            with metrics.timer('sheets.delete_rows'):
+                worksheet.delete_rows(row)
+        return len(rows)
+
+    removed = with_worksheet(remove)
+    if _known_ids is not None:
+        _known_ids.difference_update(ids)
+    return removed
@@ -0,0 +1,165 @@
+import time
+
+_INIT_START = time.perf_counter()
+
+import json
+import os
+import random
+
+import core
+import metrics
+
+
+# Environment variables
+OTP_TABLE = os.environ.get('OTP_TABLE')
+SMS_PUBLISH_ATTEMPTS = int(os.environ.get('SMS_PUBLISH_ATTEMPTS', '3'))
+SMS_BACKOFF_BASE_SECONDS = float(os.environ.get('SMS_BACKOFF_BASE_SECONDS', '0.2'))
+SMS_MAX_RECEIVES = int(os.environ.get('SMS_MAX_RECEIVES', '3'))
+
+# SNS errors worth retrying; anything else (bad number, opted out, ...) fails at once
+RETRYABLE_ERROR_CODES = {
+    'Throttling',
+    'ThrottlingException',
+    'ThrottledException',
+    'InternalError',
+    'InternalFailure',
+    'ServiceUnavailable',
+    'KMSThrottlingException',
+}
+
+_cold_start = True
+
+
+def is_retryable(error):
+    code = core.error_code(error)
+    # Errors without an AWS error code are connection problems
+    return code is None or code in RETRYABLE_ERROR_CODES
+
+
+def publish_with_retries(phone, message, sleep=time.sleep):
+    """
+    Publish an SMS, retrying retryable errors with exponential backoff and
+    full jitter. Returns (message_id, attempts); raises the last error.
+    """
+    for attempt in range(1, SMS_PUBLISH_ATTEMPTS + 1):
+        try:
+            response = core.client('sns').publish(
+                PhoneNumber=phone,
+                Message=message,
+                MessageAttributes={
+                    'AWS.SNS.SMS.SMSType': {
+                        'DataType': 'String',
+                        'StringValue': 'Transactional'
+                    }
+                }
+            )
+            return response.get('MessageId'), attempt
+        except Exception as e:
+            if attempt == SMS_PUBLISH_ATTEMPTS or not is_retryable(e):
+                e.attempts = attempt
+                raise
+            sleep(random.uniform(0, SMS_BACKOFF_BASE_SECONDS * (2 ** (attempt - 1))))
+
+
+def record_status(request_id, status, attempts, message_id=None, error=None):
+    """
+    Write the delivery state onto the OTP# item. The item may already have
+    been consumed or expired, in which case there is nothing to update.
+    """
+    update = ('SET deliveryStatus = :status, '
+              'deliveryAttempts = if_not_exists(deliveryAttempts, :zero) + :attempts, '
+              'deliveryUpdatedAt = :now')
+    values = {
+        ':status': {'S': status},
+        ':attempts': {'N': str(attempts)},
+        ':zero': {'N': '0'},
+        ':now': {'N': str(int(time.time()))},
+    }
+    if message_id:
+        update += ', deliveryMessageId = :message_id'
+        values[':message_id'] = {'S': message_id}
+    if error:
+        update += ', deliveryError = :error'
+        values[':error'] = {'S': metrics.scrub(error)[:200]}
+    else:
+        update += ' REMOVE deliveryError'
+
+    try:
+        core.dynamodb().update_item(
+            TableName=OTP_TABLE,
+            Key={'PK': {'S': f'OTP#{request_id}'}},
+            UpdateExpression=update,
+            ConditionExpression='attribute_exists(PK)',
+            ExpressionAttributeValues=values,
+        )
+    except Exception as e:
+        if core.error_code(e) != 'ConditionalCheckFailedException':
+            raise
+
+
+def dispatch(message, receive_count=1):
+    """
+    Send one queued OTP. Returns True when the message is done with (sent,
+    permanently failed or expired) and False when SQS should redeliver it.
+    """
+    request_id = message['requestId']
+    remaining_seconds = message['expiresAt'] - int(time.time())
+
+    if remaining_seconds <= 0:
+        record_status(request_id, 'failed', 0, error='Expired before it could be sent')
+        return True
+
+    text = f"Your UCMAS verification code is {message['code']}. It expires in {max(1, remaining_seconds // 60)} minutes."
+    try:
+        message_id, attempts = publish_with_retries(message['phone'], text)
+    except Exception as e:
+        attempts = getattr(e, 'attempts', 1)
+        if is_retryable(e) and receive_count < SMS_MAX_RECEIVES:
+            metrics.log(f"SMS send for {request_id} will be retried: {str(e)}")
+            record_status(request_id, 'retrying', attempts, error=str(e))
+            return False
+        metrics.log(f"SMS send for {request_id} failed: {str(e)}")
+        record_status(request_id, 'failed', attempts, error=str(e))
+        return True
+
+    # The SMS is out, so the message is done with even if the status write
+    # fails: redelivering it would send the code a second time
+    try:
+        record_status(request_id, 'sent', attempts, message_id=message_id)
+    except Exception as e:
+        metrics.log(f"SMS for {request_id} was sent but its status was not recorded: {str(e)}")
+        metrics.count('sms.status_errors')
+    return True
+
+
+def lambda_handler(event, context):
+    """
+    Lambda handler for the SMS queue filled by request_otp_handler.
+
+    Each record carries {"requestId", "phone", "code", "expiresAt"}.
+    Records that should be retried are reported as batch item failures so
+    SQS redelivers only those.
+    """
+    global _cold_start
+    metrics.begin(_cold_start)
+    if _cold_start:
+        _cold_start = False
+        print(f"Module init: {INIT_DURATION_MS:.1f} ms")
+        metrics.record('init', INIT_DURATION_MS)
+
+    failures = []
+    for record in event.get('Records', []):
+        try:
+            receive_count = int(record.get('attributes', {}).get('ApproximateReceiveCount', '1'))
+            if not dispatch(json.loads(record['body']), receive_count):
+                failures.append({'itemIdentifier': record['messageId']})
+        except Exception as e:
+            metrics.log(f"SMS dispatch error: {str(e)}")
+            failures.append({'itemIdentifier': record['messageId']})
+
+    metrics.count('sms.failures', len(failures))
+    metrics.flush({'requestId': getattr(context, 'aws_request_id', None)})
+    return {'batchItemFailures': failures}
+
+
+INIT_DURATION_MS = (time.perf_counter() - _INIT_START) * 1000
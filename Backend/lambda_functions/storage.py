@@ -0,0 +1,732 @@
+"""
+Local storage engines behind core.dynamodb().
+
+The handlers use a small part of the low-level DynamoDB client API:
+put_item and get_item, conditional delete_item (consuming an OTP),
+update_item, query on a global secondary index, batch_write_item, scan and
+transact_write_items. This module implements that subset on two local
+engines, so the handlers, benchmarks and load test can run at in-process
+speed without AWS, moto or DynamoDB Local:
+
+    MemoryEngine  dicts behind a lock, with per-index partitions and TTL
+                  eviction
+    SQLiteEngine  one SQLite table per DynamoDB table, with indexes for the
+                  primary key, each GSI and the TTL
+
+STORAGE_ENGINE (see core.client) selects dynamodb (the default, boto3),
+memory or sqlite. Both engines take items, keys and expressions exactly as
+the client does and raise ClientError for failed conditions, so handler
+code can't tell them apart from DynamoDB.
+"""
+import bisect
+import contextlib
+import functools
+import heapq
+import os
+import pickle
+import re
+import sqlite3
+import threading
+import time
+from decimal import Decimal
+
+
+# Environment variables
+STORAGE_SQLITE_PATH = os.environ.get('STORAGE_SQLITE_PATH', ':memory:')
+
+# Global secondary indexes on EnquiryTable: name -> (partition key, sort key).
+# Items missing either attribute are not in the index, as in DynamoDB.
+INDEXES = {
+    'StatusIndex': ('status', 'submittedAt'),
+    'PhoneIndex': ('phone', 'submittedAt'),
+    'CourseIndex': ('course', 'submittedAt'),
+}
+
+# Every table expires items on this attribute (epoch seconds)
+TTL_ATTRIBUTE = 'TTL'
+
+# Expired items are swept at most this often
+EVICTION_INTERVAL_SECONDS = 1.0
+
+
+class ClientError(Exception):
+    """Mimics botocore's ClientError closely enough for core.error_code()."""
+
+    def __init__(self, code, message='', item=None, cancellation_reasons=None):
+        super().__init__(f"{code}: {message}")
+        self.response = {'Error': {'Code': code, 'Message': message}}
+        if item is not None:
+            self.response['Item'] = item
+        if cancellation_reasons is not None:
+            self.response['CancellationReasons'] = cancellation_reasons
+
+
+_TOKEN = re.compile(r"\s*(<>|<=|>=|[=<>(),+-]|[#:]?[A-Za-z_][A-Za-z0-9_.]*)")
+
+
+@functools.lru_cache(maxsize=256)
+def _tokenize(expression):
+    # Handlers build a handful of distinct expressions, so each is only
+    # tokenized once
+    tokens, pos = [], 0
+    expression = expression.strip()
+    while pos < len(expression):
+        match = _TOKEN.match(expression, pos)
+        if not match:
+            raise ValueError(f"Cannot parse expression at: {expression[pos:]!r}")
+        tokens.append(match.group(1))
+        pos = match.end()
+    return tuple(tokens)
+
+
+def _plain(attribute):
+    """Attribute value -> comparable Python value (None if missing)."""
+    if attribute is None:
+        return None
+    (kind, data), = attribute.items()
+    return Decimal(data) if kind == 'N' else data
+
+
+class _Expression:
+    """
+    Evaluator for the subset of DynamoDB condition and update expressions
+    the handlers use: comparisons, AND/OR/NOT, attribute_exists,
+    attribute_not_exists, begins_with, SET (with + / - and if_not_exists),
+    ADD and REMOVE on top-level attributes.
+    """
+
+    def __init__(self, expression, names, values):
+        self.tokens = _tokenize(expression)
+        self.pos = 0
+        self.names = names or {}
+        self.values = values or {}
+
+    def _peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def _next(self):
+        token = self._peek()
+        self.pos += 1
+        return token
+
+    def _expect(self, token):
+        if self._next() != token:
+            raise ValueError(f"Expected {token!r} in expression")
+
+    def _name(self, token):
+        return self.names.get(token, token)
+
+    # Conditions
+
+    def condition(self, item):
+        self.pos = 0
+        result = self._or(item)
+        if self._peek() is not None:
+            raise ValueError(f"Unexpected token {self._peek()!r}")
+        return result
+
+    def _or(self, item):
+        result = self._and(item)
+        while self._peek() and self._peek().upper() == 'OR':
+            self._next()
+            right = self._and(item)
+            result = result or right
+        return result
+
+    def _and(self, item):
+        result = self._not(item)
+        while self._peek() and self._peek().upper() == 'AND':
+            self._next()
+            right = self._not(item)
+            result = result and right
+        return result
+
+    def _not(self, item):
+        if self._peek() and self._peek().upper() == 'NOT':
+            self._next()
+            return not self._not(item)
+        return self._primary(item)
+
+    def _primary(self, item):
+        token = self._peek()
+        if token == '(':
+            self._next()
+            result = self._or(item)
+            self._expect(')')
+            return result
+        if token in ('attribute_exists', 'attribute_not_exists'):
+            self._next()
+            self._expect('(')
+            name = self._name(self._next())
+            self._expect(')')
+            return (name in item) == (token == 'attribute_exists')
+        if token == 'begins_with':
+            self._next()
+            self._expect('(')
+            left = self._operand(item)
+            self._expect(',')
+            right = self._operand(item)
+            self._expect(')')
+            return isinstance(left, (str, bytes)) and left.startswith(right)
+
+        left = self._operand(item)
+        op = self._next()
+        right = self._operand(item)
+        if left is None or right is None:
+            return op == '<>' and left != right
+        if op == '=':
+            return left == right
+        if op == '<>':
+            return left != right
+        if type(left) is not type(right):
+            return False
+        return {'<': left < right, '<=': left <= right, '>': left > right, '>=': left >= right}[op]
+
+    def _operand(self, item):
+        token = self._next()
+        if token.startswith(':'):
+            return _plain(self.values[token])
+        if token == 'size':
+            self._expect('(')
+            value = _plain(item.get(self._name(self._next())))
+            self._expect(')')
+            return None if value is None else Decimal(len(value))
+        return _plain(item.get(self._name(token)))
+
+    def equality(self, name):
+        """
+        The value `name` is compared to with '=' at the top level of a key
+        condition (e.g. the partition value), or None.
+        """
+        tokens = self.tokens
+        for i in range(len(tokens) - 2):
+            if tokens[i + 1] == '=' and self._name(tokens[i]) == name and tokens[i + 2].startswith(':'):
+                return _plain(self.values[tokens[i + 2]])
+        return None
+
+    def prefix(self, name):
+        """The prefix begins_with matches `name` against, or None."""
+        tokens = self.tokens
+        for i in range(len(tokens) - 4):
+            if tokens[i] == 'begins_with' and self._name(tokens[i + 2]) == name and tokens[i + 4].startswith(':'):
+                return _plain(self.values[tokens[i + 4]])
+        return None
+
+    # Updates
+
+    def update(self, item):
+        self.pos = 0
+        while self._peek() is not None:
+            clause = self._next().upper()
+            if clause == 'SET':
+                self._set(item)
+            elif clause == 'ADD':
+                self._add(item)
+            elif clause == 'REMOVE':
+                self._remove(item)
+            else:
+                raise ValueError(f"Unsupported update clause {clause!r}")
+
+    def _clause_continues(self):
+        if self._peek() == ',':
+            self._next()
+            return True
+        return False
+
+    def _set(self, item):
+        while True:
+            name = self._name(self._next())
+            self._expect('=')
+            value = self._set_value(item)
+            if self._peek() in ('+', '-'):
+                op = self._next()
+                other = self._set_value(item)
+                total = Decimal(value['N']) + (Decimal(other['N']) if op == '+' else -Decimal(other['N']))
+                value = {'N': str(total)}
+            item[name] = value
+            if not self._clause_continues():
+                return
+
+    def _set_value(self, item):
+        token = self._next()
+        if token.startswith(':'):
+            return self.values[token]
+        if token == 'if_not_exists':
+            self._expect('(')
+            name = self._name(self._next())
+            self._expect(',')
+            default = self._set_value(item)
+            self._expect(')')
+            return item.get(name, default)
+        return item[self._name(token)]
+
+    def _add(self, item):
+        while True:
+            name = self._name(self._next())
+            value = self.values[self._next()]
+            if 'N' in value:
+                current = Decimal(item.get(name, {'N': '0'})['N'])
+                item[name] = {'N': str(current + Decimal(value['N']))}
+            else:
+                (kind, members), = value.items()
+                existing = item.get(name, {kind: []})[kind]
+                item[name] = {kind: existing + [m for m in members if m not in existing]}
+            if not self._clause_continues():
+                return
+
+    def _remove(self, item):
+        while True:
+            item.pop(self._name(self._next()), None)
+            if not self._clause_continues():
+                return
+
+
+def _expression(params, key):
+    return _Expression(
+        params[key],
+        params.get('ExpressionAttributeNames'),
+        params.get('ExpressionAttributeValues'),
+    )
+
+
+def _check(item, params):
+    if not params.get('ConditionExpression'):
+        return True
+    return _expression(params, 'ConditionExpression').condition(item or {})
+
+
+def _ttl(item):
+    attribute = item.get(TTL_ATTRIBUTE)
+    return int(attribute['N']) if attribute and 'N' in attribute else None
+
+
+class _Engine:
+    """
+    The client methods, written against five primitives each engine
+    provides: _get, _put, _delete, _index_items and _scan_items. Every
+    call runs inside _transaction(), so conditions and writes are atomic.
+
+    _index_items(table, index, partition, ascending, after, prefix) yields
+    the partition's items in sort-key order, starting after the
+    (sort value, PK) pair `after` and limited to sort values starting with
+    `prefix` when one is given.
+    """
+
+    def _call(self, name):
+        """Hook for subclasses that count calls or add latency."""
+
+    def _condition_failed(self, old, params):
+        item = old if params.get('ReturnValuesOnConditionCheckFailure') == 'ALL_OLD' else None
+        return ClientError('ConditionalCheckFailedException', 'The conditional request failed', item)
+
+    def put_item(self, TableName, Item, **kwargs):
+        self._call('put_item')
+        with self._transaction():
+            old = self._get(TableName, Item['PK']['S'])
+            if not _check(old, kwargs):
+                raise self._condition_failed(old, kwargs)
+            self._put(TableName, dict(Item))
+        if kwargs.get('ReturnValues') == 'ALL_OLD' and old is not None:
+            return {'Attributes': old}
+        return {}
+
+    def get_item(self, TableName, Key, **kwargs):
+        self._call('get_item')
+        with self._transaction():
+            item = self._get(TableName, Key['PK']['S'])
+        return {'Item': dict(item)} if item is not None else {}
+
+    def delete_item(self, TableName, Key, **kwargs):
+        self._call('delete_item')
+        with self._transaction():
+            old = self._get(TableName, Key['PK']['S'])
+            if not _check(old, kwargs):
+                raise self._condition_failed(old, kwargs)
+            if old is not None:
+                self._delete(TableName, Key['PK']['S'])
+        if kwargs.get('ReturnValues') == 'ALL_OLD' and old is not None:
+            return {'Attributes': old}
+        return {}
+
+    def _apply_update(self, table, key, old, params):
+        new = dict(old) if old is not None else dict(key)
+        _expression(params, 'UpdateExpression').update(new)
+        self._put(table, new)
+        return new
+
+    def update_item(self, TableName, Key, UpdateExpression, **kwargs):
+        self._call('update_item')
+        with self._transaction():
+            old = self._get(TableName, Key['PK']['S'])
+            if not _check(old, kwargs):
+                raise self._condition_failed(old, kwargs)
+            new = self._apply_update(TableName, Key, old, {**kwargs, 'UpdateExpression': UpdateExpression})
+        return_values = kwargs.get('ReturnValues', 'NONE')
+        if return_values == 'ALL_NEW':
+            return {'Attributes': dict(new)}
+        if return_values == 'ALL_OLD' and old is not None:
+            return {'Attributes': old}
+        if return_values == 'UPDATED_NEW':
+            return {'Attributes': {k: v for k, v in new.items() if old is None or old.get(k) != v}}
+        return {}
+
+    def query(self, TableName, IndexName, KeyConditionExpression, **kwargs):
+        """
+        Query a global secondary index (see INDEXES). The engine reads the
+        partition in sort-key order, narrowed to a begins_with prefix on
+        the sort key; the full key condition is still checked here.
+        """
+        self._call('query')
+        partition_key, sort_key = INDEXES[IndexName]
+        expression = _expression({**kwargs, 'KeyConditionExpression': KeyConditionExpression},
+                                 'KeyConditionExpression')
+        partition = expression.equality(partition_key)
+        if partition is None:
+            raise ClientError('ValidationException', f'Query condition missed key schema element: {partition_key}')
+
+        prefix = expression.prefix(sort_key)
+        ascending = kwargs.get('ScanIndexForward', True)
+        start = kwargs.get('ExclusiveStartKey')
+        after = (_plain(start[sort_key]), start['PK']['S']) if start else None
+        limit = kwargs.get('Limit')
+
+        page, more = [], False
+        with self._transaction():
+            for item in self._index_items(TableName, IndexName, partition, ascending, after, prefix):
+                if not expression.condition(item):
+                    continue
+                if limit is not None and len(page) == limit:
+                    more = True
+                    break
+                page.append(dict(item))
+
+        response = {'Items': page, 'Count': len(page)}
+        if more:
+            last = page[-1]
+            response['LastEvaluatedKey'] = {
+                'PK': last['PK'], partition_key: last[partition_key], sort_key: last[sort_key],
+            }
+        return response
+
+    def batch_write_item(self, RequestItems, **kwargs):
+        self._call('batch_write_item')
+        unprocessed = {}
+        with self._transaction():
+            for table_name, requests in RequestItems.items():
+                for request in requests:
+                    if self._unprocessed(request):
+                        unprocessed.setdefault(table_name, []).append(request)
+                    elif 'PutRequest' in request:
+                        self._put(table_name, dict(request['PutRequest']['Item']))
+                    else:
+                        self._delete(table_name, request['DeleteRequest']['Key']['PK']['S'])
+        return {'UnprocessedItems': unprocessed}
+
+    def _unprocessed(self, request):
+        """Hook for subclasses that simulate throttling."""
+        return False
+
+    def scan(self, TableName, **kwargs):
+        """
+        Scan the table in key order, applying FilterExpression after Limit
+        like DynamoDB does. Segment/TotalSegments split the keys by hash.
+        """
+        self._call('scan')
+        start = kwargs.get('ExclusiveStartKey')
+        limit = kwargs.get('Limit')
+        segments = kwargs.get('TotalSegments')
+        page, more = [], False
+        with self._transaction():
+            for item in self._scan_items(TableName, start['PK']['S'] if start else None):
+                if segments and hash(item['PK']['S']) % segments != kwargs['Segment']:
+                    continue
+                if limit is not None and len(page) == limit:
+                    more = True
+                    break
+                page.append(item)
+
+        if 'FilterExpression' in kwargs:
+            expression = _expression(kwargs, 'FilterExpression')
+            matches = [item for item in page if expression.condition(item)]
+        else:
+            matches = page
+
+        response = {'Items': [dict(item) for item in matches], 'Count': len(matches)}
+        if more:
+            response['LastEvaluatedKey'] = {'PK': page[-1]['PK']}
+        return response
+
+    def transact_write_items(self, TransactItems, **kwargs):
+        """
+        All-or-nothing: every condition is checked before anything is
+        written, and a failure raises TransactionCanceledException with
+        per-item CancellationReasons like the real API.
+        """
+        self._call('transact_write_items')
+        with self._transaction():
+            reasons, old_items, failed = [], [], False
+            for entry in TransactItems:
+                (op, params), = entry.items()
+                key = params['Item']['PK']['S'] if op == 'Put' else params['Key']['PK']['S']
+                old = self._get(params['TableName'], key)
+                old_items.append(old)
+                if _check(old, params):
+                    reasons.append({'Code': 'None'})
+                    continue
+                failed = True
+                reason = {'Code': 'ConditionalCheckFailed', 'Message': 'The conditional request failed'}
+                if params.get('ReturnValuesOnConditionCheckFailure') == 'ALL_OLD' and old is not None:
+                    reason['Item'] = old
+                reasons.append(reason)
+            if failed:
+                raise ClientError('TransactionCanceledException', 'Transaction cancelled',
+                                  cancellation_reasons=reasons)
+
+            for entry, old in zip(TransactItems, old_items):
+                (op, params), = entry.items()
+                if op == 'Put':
+                    self._put(params['TableName'], dict(params['Item']))
+                elif op == 'Delete':
+                    if old is not None:
+                        self._delete(params['TableName'], params['Key']['PK']['S'])
+                elif op == 'Update':
+                    self._apply_update(params['TableName'], params['Key'], old, params)
+        return {}
+
+
+class MemoryEngine(_Engine):
+    """
+    Items in a dict per table, guarded by one lock. Each GSI partition is
+    a sorted list of (sort value, PK), so a query bisects straight to its
+    first item. Scans bisect a sorted list of the table's keys, which is
+    only re-sorted after new keys were added. Items whose TTL has
+    passed are swept from a heap at most every EVICTION_INTERVAL_SECONDS;
+    like DynamoDB, reads may still see them until then.
+    """
+
+    def __init__(self):
+        self.tables = {}
+        self._indexes = {}
+        # Per table: sorted keys for scans (may include deleted keys), and
+        # the keys added since they were sorted
+        self._scan_keys = {}
+        self._new_keys = {}
+        self._expiry = []
+        self._next_eviction = 0.0
+        self._lock = threading.RLock()
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        with self._lock:
+            yield
+
+    def _table(self, name):
+        table = self.tables.get(name)
+        if table is None:
+            table = self.tables[name] = {}
+            self._indexes[name] = {index: {} for index in INDEXES}
+            self._scan_keys[name] = []
+            self._new_keys[name] = set()
+        return table
+
+    def _get(self, table, key):
+        return self._table(table).get(key)
+
+    def _unindex(self, table, item):
+        for index, (partition_key, sort_key) in INDEXES.items():
+            if partition_key in item and sort_key in item:
+                entries = self._indexes[table][index].get(_plain(item[partition_key]))
+                entry = (_plain(item[sort_key]), item['PK']['S'])
+                position = bisect.bisect_left(entries, entry) if entries else 0
+                if entries and position < len(entries) and entries[position] == entry:
+                    del entries[position]
+
+    def _put(self, table, item):
+        key = item['PK']['S']
+        items = self._table(table)
+        old = items.get(key)
+        if old is not None:
+            self._unindex(table, old)
+        else:
+            self._new_keys[table].add(key)
+        items[key] = item
+        for index, (partition_key, sort_key) in INDEXES.items():
+            if partition_key in item and sort_key in item:
+                bisect.insort(self._indexes[table][index].setdefault(_plain(item[partition_key]), []),
+                              (_plain(item[sort_key]), key))
+
+        expires_at = _ttl(item)
+        if expires_at is not None:
+            heapq.heappush(self._expiry, (expires_at, table, key))
+        self._evict()
+
+    def _delete(self, table, key):
+        old = self._table(table).pop(key, None)
+        if old is not None:
+            self._unindex(table, old)
+
+    def _evict(self):
+        now = time.time()
+        if now < self._next_eviction:
+            return
+        self._next_eviction = now + EVICTION_INTERVAL_SECONDS
+        while self._expiry and self._expiry[0][0] <= now:
+            expires_at, table, key = heapq.heappop(self._expiry)
+            item = self.tables[table].get(key)
+            # The item may have been rewritten with a later TTL since
+            if item is not None and _ttl(item) == expires_at:
+                self._delete(table, key)
+
+    def _index_items(self, table, index, partition, ascending, after, prefix):
+        items = self._table(table)
+        entries = self._indexes[table][index].get(partition, [])
+        # Sort values in [low, high) start with the prefix
+        low = (prefix,) if prefix is not None else None
+        high = (prefix + '\uffff',) if prefix is not None else None
+
+        if ascending:
+            start = bisect.bisect_right(entries, after) if after else 0
+            if low:
+                start = max(start, bisect.bisect_left(entries, low))
+            stop = bisect.bisect_left(entries, high) if high else len(entries)
+            positions = range(start, stop)
+        else:
+            stop = bisect.bisect_left(entries, after) if after else len(entries)
+            if high:
+                stop = min(stop, bisect.bisect_left(entries, high))
+            start = bisect.bisect_left(entries, low) if low else 0
+            positions = range(stop - 1, start - 1, -1)
+
+        for position in positions:
+            yield items[entries[position][1]]
+
+    def _scan_items(self, table, after):
+        items = self._table(table)
+        keys, new_keys = self._scan_keys[table], self._new_keys[table]
+        if new_keys:
+            # One sorted run plus the new keys: the sort is close to a merge
+            keys = [key for key in keys if key in items and key not in new_keys]
+            keys += [key for key in new_keys if key in items]
+            keys.sort()
+            self._scan_keys[table] = keys
+            self._new_keys[table] = set()
+
+        start = bisect.bisect_right(keys, after) if after is not None else 0
+        for position in range(start, len(keys)):
+            item = items.get(keys[position])
+            if item is not None:
+                yield item
+
+
+class SQLiteEngine(_Engine):
+    """
+    Each DynamoDB table is a SQLite table holding the pickled item, with
+    the key, every GSI attribute and the TTL copied into indexed columns.
+    Queries read one index range in sort-key order. Conditions and updates
+    are evaluated in Python inside a SQLite transaction. A single
+    connection is shared, serialized by a lock.
+
+    `path` defaults to STORAGE_SQLITE_PATH; ':memory:' keeps nothing on disk.
+    """
+
+    _COLUMNS = sorted({attribute for pair in INDEXES.values() for attribute in pair})
+
+    def __init__(self, path=None):
+        self._db = sqlite3.connect(path or STORAGE_SQLITE_PATH, check_same_thread=False,
+                                   isolation_level=None)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        self._lock = threading.RLock()
+        self._depth = 0
+        self._tables = set()
+        self._next_eviction = 0.0
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        with self._lock:
+            if self._depth == 0:
+                self._db.execute('BEGIN')
+            self._depth += 1
+            try:
+                yield
+            except BaseException:
+                self._depth -= 1
+                if self._depth == 0:
+                    self._db.execute('ROLLBACK')
+                raise
+            self._depth -= 1
+            if self._depth == 0:
+                self._evict()
+                self._db.execute('COMMIT')
+
+    def _table(self, name):
+        if name not in self._tables:
+            quoted = f'"{name}"'
+            columns = ''.join(f', "{column}" TEXT' for column in self._COLUMNS)
+            self._db.execute(f'CREATE TABLE IF NOT EXISTS {quoted} '
+                             f'(pk TEXT PRIMARY KEY, item BLOB NOT NULL, ttl INTEGER{columns})')
+            for index, (partition_key, sort_key) in INDEXES.items():
+                self._db.execute(f'CREATE INDEX IF NOT EXISTS "{name}_{index}" ON {quoted} '
+                                 f'("{partition_key}", "{sort_key}", pk) '
+                                 f'WHERE "{partition_key}" IS NOT NULL AND "{sort_key}" IS NOT NULL')
+            self._db.execute(f'CREATE INDEX IF NOT EXISTS "{name}_ttl" ON {quoted} (ttl) WHERE ttl IS NOT NULL')
+            self._tables.add(name)
+        return f'"{name}"'
+
+    def _get(self, table, key):
+        row = self._db.execute(f'SELECT item FROM {self._table(table)} WHERE pk = ?', (key,)).fetchone()
+        return pickle.loads(row[0]) if row else None
+
+    def _put(self, table, item):
+        # GSI keys are strings on EnquiryTable, so TEXT columns sort correctly
+        values = [item['PK']['S'], pickle.dumps(item, pickle.HIGHEST_PROTOCOL), _ttl(item)]
+        values += [item[column].get('S') if column in item else None for column in self._COLUMNS]
+        placeholders = ', '.join('?' * len(values))
+        columns = ''.join(f', "{column}"' for column in self._COLUMNS)
+        self._db.execute(f'INSERT OR REPLACE INTO {self._table(table)} (pk, item, ttl{columns}) '
+                         f'VALUES ({placeholders})', values)
+
+    def _delete(self, table, key):
+        self._db.execute(f'DELETE FROM {self._table(table)} WHERE pk = ?', (key,))
+
+    def _evict(self):
+        now = time.time()
+        if now < self._next_eviction:
+            return
+        self._next_eviction = now + EVICTION_INTERVAL_SECONDS
+        for table in self._tables:
+            self._db.execute(f'DELETE FROM "{table}" WHERE ttl IS NOT NULL AND ttl <= ?', (int(now),))
+
+    def _index_items(self, table, index, partition, ascending, after, prefix):
+        partition_key, sort_key = INDEXES[index]
+        order, compare = ('ASC', '>') if ascending else ('DESC', '<')
+        sql = (f'SELECT item FROM {self._table(table)} '
+               f'WHERE "{partition_key}" = ? AND "{sort_key}" IS NOT NULL')
+        params = [partition]
+        if prefix is not None:
+            sql += f' AND "{sort_key}" >= ? AND "{sort_key}" < ?'
+            params += [prefix, prefix + '\uffff']
+        if after is not None:
+            sql += f' AND ("{sort_key}", pk) {compare} (?, ?)'
+            params += list(after)
+        sql += f' ORDER BY "{sort_key}" {order}, pk {order}'
+        for row in self._db.execute(sql, params):
+            yield pickle.loads(row[0])
+
+    def _scan_items(self, table, after):
+        sql = f'SELECT item FROM {self._table(table)}'
+        params = []
+        if after is not None:
+            sql += ' WHERE pk > ?'
+            params.append(after)
+        for row in self._db.execute(sql + ' ORDER BY pk', params):
+            yield pickle.loads(row[0])
+
+
+def create(name):
+    """Engine for a STORAGE_ENGINE value other than 'dynamodb'."""
+    if name == 'memory':
+        return MemoryEngine()
+    if name == 'sqlite':
+        return SQLiteEngine()
+    raise ValueError(f"Unknown STORAGE_ENGINE {name!r}; expected dynamodb, memory or sqlite")
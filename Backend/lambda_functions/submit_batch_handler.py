@@ -0,0 +1,167 @@
+import time
+
+_INIT_START = time.perf_counter()
+
+import os
+import random
+import uuid
+from datetime import datetime, timezone
+
+import core
+import enquiries
+import metrics
+from core import ApiError, api_handler
+
+
+# Environment variables
+ENQUIRY_TABLE = os.environ.get('ENQUIRY_TABLE')
+BATCH_MAX_ENQUIRIES = int(os.environ.get('BATCH_MAX_ENQUIRIES', '100'))
+BATCH_WRITE_ATTEMPTS = int(os.environ.get('BATCH_WRITE_ATTEMPTS', '5'))
+BATCH_BACKOFF_BASE_SECONDS = float(os.environ.get('BATCH_BACKOFF_BASE_SECONDS', '0.05'))
+
+# A tablet's backlog is much larger than one app form
+MAX_BODY_BYTES = int(os.environ.get('BATCH_MAX_BODY_BYTES', '1048576'))
+
+# Puts per TransactWriteItems call. An item that already exists cancels
+# its whole chunk, which is then retried without it
+BATCH_WRITE_SIZE = 25
+
+# Enquiry IDs for uploads that carry a clientId are derived from it, so a
+# re-uploaded backlog finds the items already stored instead of
+# duplicating or overwriting them
+_CLIENT_ID_NAMESPACE = uuid.UUID('5b0f7d3e-4c1a-4f55-9a8e-2f6f1b7c9d10')
+
+
+def enquiry_id_for(entry):
+    client_id = entry.get('clientId')
+    if client_id is None:
+        return str(uuid.uuid4())
+    if not isinstance(client_id, str) or not 1 <= len(client_id) <= 128:
+        raise ApiError(400, 'clientId must be a string of 1-128 characters')
+    return str(uuid.uuid5(_CLIENT_ID_NAMESPACE, client_id))
+
+
+def existing_items(error, items):
+    """
+    The `items` whose attribute_not_exists(PK) condition cancelled the
+    transaction that raised `error` (an empty list for any other error).
+    """
+    if core.error_code(error) != 'TransactionCanceledException':
+        return []
+    reasons = getattr(error, 'response', {}).get('CancellationReasons') or []
+    return [item for item, reason in zip(items, reasons) if reason.get('Code') == 'ConditionalCheckFailed']
+
+
+def write_items(items, sleep=time.sleep):
+    """
+    Put `items` with conditional TransactWriteItems calls in chunks of 25,
+    so an enquiry that is already stored is never overwritten. Items that
+    exist are dropped from their chunk, which is retried at once; other
+    failures (conflicts, throttling) are retried with exponential backoff
+    and full jitter.
+
+    Returns (IDs already present, IDs that could not be written).
+    """
+    present, failed = set(), set()
+    for offset in range(0, len(items), BATCH_WRITE_SIZE):
+        pending = items[offset:offset + BATCH_WRITE_SIZE]
+        for attempt in range(1, BATCH_WRITE_ATTEMPTS + 1):
+            existing = set()
+            try:
+                core.dynamodb().transact_write_items(TransactItems=[
+                    {'Put': {
+                        'TableName': ENQUIRY_TABLE,
+                        'Item': item,
+                        'ConditionExpression': 'attribute_not_exists(PK)',
+                    }}
+                    for item in pending
+                ])
+                pending = []
+            except Exception as e:
+                existing = {item['enquiryId']['S'] for item in existing_items(e, pending)}
+                if existing:
+                    present |= existing
+                    pending = [item for item in pending if item['enquiryId']['S'] not in existing]
+                else:
+                    metrics.log(f"DynamoDB transaction error: {str(e)}")
+            if not pending:
+                break
+            if attempt < BATCH_WRITE_ATTEMPTS and not existing:
+                sleep(random.uniform(0, BATCH_BACKOFF_BASE_SECONDS * (2 ** (attempt - 1))))
+        failed.update(item['enquiryId']['S'] for item in pending)
+    return present, failed
+
+
+@api_handler
+def lambda_handler(body, event, context):
+    """
+    Lambda handler for POST /submit/batch (IAM-authorized, staff devices)
+
+    Expected event body:
+    {
+        "enquiries": [
+            {
+                "clientId": "tablet-3:17",      (optional, makes re-uploads safe)
+                ...same fields as POST /submit, without verificationToken
+            }
+        ]
+    }
+
+    Returns one result per enquiry, in order:
+    {
+        "results": [
+            {"index": 0, "success": true, "enquiryId": "uuid-string"},
+            {"index": 1, "success": true, "enquiryId": "uuid-string", "alreadyPresent": true},
+            {"index": 2, "success": false, "error": "Parent name is required"}
+        ]
+    }
+
+    Each enquiry is validated like /submit; invalid ones are reported and
+    the rest are still written. An enquiry whose clientId was uploaded
+    before is left as stored and reported as alreadyPresent. Phones aren't OTP-verified on this path, so
+    items are tagged with source "batch". Google Sheets is fed by the
+    EnquiryTable stream, which appends a whole upload in one call.
+    """
+    entries = body.get('enquiries')
+    if not isinstance(entries, list) or not entries:
+        raise ApiError(400, 'enquiries must be a non-empty list')
+    if len(entries) > BATCH_MAX_ENQUIRIES:
+        raise ApiError(400, f'At most {BATCH_MAX_ENQUIRIES} enquiries can be uploaded at once')
+
+    submitted_at = datetime.now(timezone.utc).isoformat()
+    results, items, seen = [], [], set()
+    for index, entry in enumerate(entries):
+        try:
+            if not isinstance(entry, dict):
+                raise ApiError(400, 'Enquiry must be a JSON object')
+            enquiry = enquiries.validate(entry)
+            enquiry_id = enquiry_id_for(entry)
+        except ApiError as e:
+            results.append({'index': index, 'success': False, 'error': e.message})
+            continue
+
+        if enquiry_id in seen:
+            results.append({'index': index, 'success': False, 'error': 'Duplicate clientId in upload'})
+            continue
+        seen.add(enquiry_id)
+
+        phone = core.to_e164(enquiry['contactNumber'])
+        items.append(enquiries.build_item(enquiry, enquiry_id, phone, submitted_at, source='batch'))
+        results.append({'index': index, 'success': True, 'enquiryId': enquiry_id})
+
+    present, failed = write_items(items) if items else (set(), set())
+    for result in results:
+        if result.get('enquiryId') in failed:
+            result.update(success=False, error='Failed to store enquiry')
+            del result['enquiryId']
+        elif result.get('enquiryId') in present:
+            result['alreadyPresent'] = True
+
+    written = len(items) - len(present) - len(failed)
+    print(f"Batch upload: {written} written, {len(present)} already present, "
+          f"{len(entries) - written - len(present)} rejected or failed")
+
+    return {'results': results}
+
+
+INIT_DURATION_MS = (time.perf_counter() - _INIT_START) * 1000
@@ -1,21 +1,178 @@
-import json
-import boto3
+import time
+
+_INIT_START = time.perf_counter()
+
 import uuid
 import os
 from datetime import datetime, timezone
-from decimal import Decimal
-import gspread
 
+import core
+import dedup
+import enquiries
+import idempotency
+import metrics
+import sheets
+import tokens
+from core import ApiError, api_handler
 
-# Initialize AWS clients
-dynamodb = boto3.resource('dynamodb')
 
 # Environment variables
 ENQUIRY_TABLE = os.environ.get('ENQUIRY_TABLE')
+# When set, /submit appends the enquiry's row to Google Sheets itself,
+# alongside the DynamoDB write, and waits at most this long (from the start
+# of the write) for it. 0 leaves the sheet to the EnquiryTable stream alone
+SHEETS_DEADLINE_MS = int(os.environ.get('SUBMIT_SHEETS_DEADLINE_MS', '0'))
+
+# Fetch the verification keys in the background during init (SECRET_PREFETCH)
+tokens.prefetch()
+if SHEETS_DEADLINE_MS:
+    sheets.prefetch()
 
-_cached_client = None
 
-def lambda_handler(event, context):
+def write_enquiry(item, claims):
+    """
+    Write the enquiry item, in one transaction with the `claims`
+    (idempotency and dedup entries) if there are any.
+    """
+    if claims:
+        core.dynamodb().transact_write_items(
+            TransactItems=[*claims, {'Put': {'TableName': ENQUIRY_TABLE, 'Item': item}}]
+        )
+    else:
+        core.dynamodb().put_item(TableName=ENQUIRY_TABLE, Item=item)
+
+
+def idempotency_claims(idempotency_key, phone, response):
+    """The idempotency record storing `response`, if the client sent a key."""
+    return [idempotency.record_put(phone, idempotency_key, response)] if idempotency_key else []
+
+
+def store_enquiry(item, idempotency_key, dedup_keys, submitted_at):
+    """
+    Write the enquiry with its idempotency record, the dedup entries for
+    `dedup_keys` coming last, and return the response:
+    {"success", "enquiryId"} once stored, or the earlier enquiry's ID with
+    "duplicate": true when a repeat submission was merged into it. The
+    idempotency record holds that response and is written in the same
+    transaction as the enquiry or the merge, so a retry replays it.
+
+    Only a submission whose every child is a repeat is merged. With a new
+    child as well, a new enquiry is stored and the repeated children's keys
+    stay with their earlier enquiries.
+    """
+    enquiry_id, phone = item['enquiryId']['S'], item['phone']['S']
+    result = {'success': True, 'enquiryId': enquiry_id}
+    claims = idempotency_claims(idempotency_key, phone, result)
+    try:
+        write_enquiry(item, claims + dedup.record_puts(dedup_keys, enquiry_id))
+        return result
+    except Exception as e:
+        if claims and idempotency.replayed_response(e) is not None:
+            raise
+        held_by = dedup.holders(e, len(claims), len(dedup_keys))
+        if held_by is None:
+            raise
+
+    if all(held_by):
+        merged = None
+        for holder in dict.fromkeys(held_by):
+            if merged:
+                dedup.merge(holder, submitted_at)
+                continue
+            response = {'success': True, 'enquiryId': holder, 'duplicate': True}
+            # The idempotency record goes with the first merge that lands
+            if dedup.merge(holder, submitted_at, idempotency_claims(idempotency_key, phone, response)):
+                merged = response
+        if merged:
+            return merged
+        # The earlier enquiries are gone: this one takes over their keys
+        dedup_puts = dedup.record_puts(dedup_keys, enquiry_id, conditional=False)
+    else:
+        free = [key for key, holder in zip(dedup_keys, held_by) if holder is None]
+        dedup_puts = dedup.record_puts(free, enquiry_id)
+    write_enquiry(item, claims + dedup_puts)
+    return result
+
+
+def release_to_stream(item):
+    """
+    Hand a stored enquiry whose inline append failed, or missed the
+    deadline, back to sheet_sync_handler: dropping sheetWriter and setting
+    sheetRetry is a MODIFY the stream picks up. If even that fails, the
+    on-demand backfill restores the row.
+    """
+    try:
+        core.dynamodb().update_item(
+            TableName=ENQUIRY_TABLE,
+            Key={'PK': item['PK']},
+            UpdateExpression='REMOVE sheetWriter SET sheetRetry = :true',
+            ConditionExpression='attribute_exists(PK)',
+            ExpressionAttributeValues={':true': {'BOOL': True}},
+        )
+    except Exception as e:
+        metrics.count('submit.sheets_lost')
+        metrics.log(f"Failed to hand enquiry {item['enquiryId']['S']} back to the sheet sync: {str(e)}")
+
+
+def append_row(item):
+    """
+    Append the enquiry's row while DynamoDB is written (see settle_row).
+    The stream skips items written with sheetWriter, so this is the row's
+    only writer until it is released. Returns whether the row was appended.
+    """
+    try:
+        sheets.append_rows([sheets.build_row(core.from_item(item))])
+        return True
+    except Exception as e:
+        metrics.log(f"Google Sheets append error: {str(e)}")
+        return False
+
+
+def discard_row(sheet_write, enquiry_id):
+    """Remove the row appended for an enquiry that was not stored, once the append is done."""
+    if not sheet_write.result():
+        return
+    try:
+        sheets.remove_rows([enquiry_id])
+    except Exception as e:
+        metrics.count('submit.sheets_orphaned')
+        metrics.log(f"Failed to remove the sheet row of unstored enquiry {enquiry_id}: {str(e)}")
+
+
+def settle_row(sheet_write, item, stored, deadline):
+    """
+    Reconcile the inline append with the outcome of the DynamoDB write,
+    waiting until `deadline` (monotonic) at most:
+
+    - a stored enquiry whose append failed, or is still running at the
+      deadline, is released to the stream before the response. A late
+      append that lands anyway is found by the stream's fresh read of the
+      sheet's IDs, so the row isn't written twice;
+    - the row of an enquiry that was not stored (a replay, a merged repeat
+      or a failed write) is removed again. A removal still running at the
+      deadline carries on in the background.
+    """
+    timeout = max(0.0, deadline - time.monotonic())
+    if stored:
+        try:
+            appended = sheet_write.result(timeout=timeout)
+        except TimeoutError:
+            metrics.count('submit.sheets_deadline_missed')
+            appended = False
+        if not appended:
+            release_to_stream(item)
+        return
+
+    enquiry_id = item['enquiryId']['S']
+    try:
+        core.run_in_background(discard_row, sheet_write, enquiry_id).result(timeout=timeout)
+    except TimeoutError:
+        metrics.count('submit.sheets_deadline_missed')
+        metrics.log(f"Still removing the sheet row of unstored enquiry {enquiry_id}")
+
+
+@api_handler
+def lambda_handler(body, event, context):
     """
     Lambda handler for POST /submit
     
@@ -33,7 +190,8 @@ def lambda_handler(event, context):
         "contactNumber": "123-456-7890",
         "email": "jane@example.com",
         "consent": true,
-        "todaysDate": "10/23/2025"
+        "todaysDate": "10/23/2025",
+        "verificationToken": "<token from /verify>"
     }
     
     Returns:
@@ -41,177 +199,84 @@ def lambda_handler(event, context):
         "success": true,
         "enquiryId": "uuid-string"
     }
-    """
 
-    def get_gspread_client():
-        global _cached_client
-        if _cached_client is None:
-            response = boto3.client('secretsmanager').get_secret_value(SecretId=os.environ.get('GOOGLE_SHEETS_SECRET'))
-            secret_dict = json.loads(response['SecretString'])
-            _cached_client = gspread.service_account_from_dict(
-            info=secret_dict
-        )
-        return _cached_client
+    An Idempotency-Key header (or "idempotencyKey" body field) makes retries
+    safe: a repeat within IDEMPOTENCY_TTL_SECONDS returns the original
+    response without writing anything.
+
+    The verification token is checked locally (no DynamoDB read) and must
+    have been issued for the same phone number as contactNumber.
+
+    New ENQUIRY# items reach Google Sheets through the EnquiryTable stream
+    (see sheet_sync_handler). With SUBMIT_SHEETS_DEADLINE_MS set, this
+    handler appends the row instead, on the background pool while DynamoDB
+    is written, so the two cost the slower of them rather than their sum.
+    The response waits until the deadline at most; settle_row then hands a
+    stored enquiry without its row to the stream, and removes the row of a
+    replay, merged repeat or failed write. DynamoDB stays the source of
+    truth: its result alone decides the response.
+
+    Repeat submissions (the same child and course from the same phone
+    within DEDUP_WINDOW_SECONDS) are merged into the earlier enquiry, which
+    is returned with "duplicate": true; no new item or sheet row is
+    created.
+    """
+    enquiry = enquiries.validate(body)
     
-    # CORS headers
-    headers = {
-        'Access-Control-Allow-Origin': '*',
-        'Access-Control-Allow-Headers': 'Content-Type,x-api-key',
-        'Access-Control-Allow-Methods': 'POST, OPTIONS',
-        'Content-Type': 'application/json'
-    }
+    # Check the phone was verified through /verify
+    verification_token = body.get('verificationToken')
+    if not verification_token:
+        raise ApiError(401, 'Phone verification is required')
+    
+    try:
+        verified_phone = tokens.verify_token(verification_token)
+    except tokens.InvalidToken as e:
+        raise ApiError(401, str(e))
+    
+    if verified_phone != core.to_e164(enquiry['contactNumber']):
+        raise ApiError(403, 'Contact number does not match the verified phone')
+    
+    idempotency_key = idempotency.get_key(event, body)
+    
+    # Generate enquiry ID
+    enquiry_id = str(uuid.uuid4())
+    
+    # Get current timestamp
+    submitted_at = datetime.now(timezone.utc).isoformat()
+    
+    item = enquiries.build_item(enquiry, enquiry_id, verified_phone, submitted_at)
     
-    # Handle preflight OPTIONS request
-    if event.get('httpMethod') == 'OPTIONS':
-        return {
-            'statusCode': 200,
-            'headers': headers,
-            'body': ''
-        }
+    sheet_write = None
+    if SHEETS_DEADLINE_MS:
+        # sheet_sync_handler skips items with a sheetWriter
+        item['sheetWriter'] = {'S': 'submit'}
+        deadline = time.monotonic() + SHEETS_DEADLINE_MS / 1000
+        sheet_write = core.run_in_background(append_row, item)
     
+    dedup_keys = dedup.keys(verified_phone, enquiry['children']) if dedup.DEDUP_WINDOW_SECONDS else []
+    
+    stored = False
     try:
-        # Parse request body
-        if isinstance(event.get('body'), str):
-            body = json.loads(event['body'])
-        else:
-            body = event.get('body', {})
-        
-        # Extract form data
-        children = body.get('children', [])
-        parent_name = body.get('parentName', '').strip()
-        contact_number = body.get('contactNumber', '').strip()
-        email = body.get('email', '').strip()
-        consent = body.get('consent', False)
-        todays_date = body.get('todaysDate', '')
-        
-        # Validate required fields
-        if not children or len(children) == 0:
-            return {
-                'statusCode': 400,
-                'headers': headers,
-                'body': json.dumps({'error': 'At least one child is required'})
-            }
-        
-        if not parent_name:
-            return {
-                'statusCode': 400,
-                'headers': headers,
-                'body': json.dumps({'error': 'Parent name is required'})
-            }
-        
-        if not contact_number:
-            return {
-                'statusCode': 400,
-                'headers': headers,
-                'body': json.dumps({'error': 'Contact number is required'})
-            }
-        
-        if not consent:
-            return {
-                'statusCode': 400,
-                'headers': headers,
-                'body': json.dumps({'error': 'Consent is required'})
-            }
-        
-        # Validate at least one child has required fields
-        valid_child = False
-        for child in children:
-            if child.get('name', '').strip() and child.get('age', '').strip() and child.get('selectedCourse', '').strip():
-                valid_child = True
-                break
-        
-        if not valid_child:
-            return {
-                'statusCode': 400,
-                'headers': headers,
-                'body': json.dumps({'error': 'At least one child must have name, age, and course selected'})
-            }
-        
-        # Generate enquiry ID
-        enquiry_id = str(uuid.uuid4())
-        
-        # Get current timestamp
-        submitted_at = datetime.now(timezone.utc).isoformat()
-        
-        # Store in DynamoDB
-        table = dynamodb.Table(ENQUIRY_TABLE)
-        
-        # Format children data for Google Sheets (as JSON string or concatenated)
-        children_info = " | ".join([
-            f"{child.get('name', 'N/A')} (Age: {child.get('age', 'N/A')}, Course: {child.get('selectedCourse', 'N/A')})"
-            for child in children
-        ])
-        
-        try:
-            # Write to Google Sheets
-            try:
-                client = get_gspread_client()
-                sheet = client.open_by_key(os.environ.get('SHEET_ID'))
-                worksheet = sheet.worksheet('Sheet1')
-                
-                # Append row with all data including children info
-                worksheet.append_row([
-                    enquiry_id,
-                    parent_name,
-                    contact_number,
-                    email if email else '',
-                    str(consent),
-                    todays_date,
-                    children_info,  # Add children information
-                    submitted_at,
-                    'pending'
-                ])
-                print(f"Successfully wrote to Google Sheets: {enquiry_id}")
-            except Exception as sheets_error:
-                # Log error but don't fail the request - DynamoDB is the source of truth
-                print(f"Google Sheets write error: {str(sheets_error)}")
-                print("Continuing with DynamoDB storage...")
-            
-            # Write to DynamoDB (primary storage)
-            table.put_item(
-                Item={
-                    'PK': f'ENQUIRY#{enquiry_id}',
-                    'enquiryId': enquiry_id,
-                    'children': children,
-                    'parentName': parent_name,
-                    'contactNumber': contact_number,
-                    'email': email if email else None,
-                    'consent': consent,
-                    'formDate': todays_date,
-                    'submittedAt': submitted_at,
-                    'status': 'pending'
-                }
-            )
-            print(f"Successfully wrote to DynamoDB: {enquiry_id}")
-        except Exception as e:
-            print(f"DynamoDB put error: {str(e)}")
-            return {
-                'statusCode': 500,
-                'headers': headers,
-                'body': json.dumps({'error': 'Failed to store enquiry'})
-            }
-        
-        return {
-            'statusCode': 200,
-            'headers': headers,
-            'body': json.dumps({
-                'success': True,
-                'enquiryId': enquiry_id
-            })
-        }
-        
-    except json.JSONDecodeError:
-        return {
-            'statusCode': 400,
-            'headers': headers,
-            'body': json.dumps({'error': 'Invalid JSON in request body'})
-        }
+        # Write to DynamoDB (source of truth, synced to Sheets via stream)
+        result = store_enquiry(item, idempotency_key, dedup_keys, submitted_at)
+        if result.get('duplicate'):
+            print(f"Merged repeat submission into enquiry: {result['enquiryId']}")
+            return result
+        stored = True
+        print(f"Successfully wrote to DynamoDB: {enquiry_id}")
+        return result
+    except ApiError:
+        raise
     except Exception as e:
-        print(f"Error: {str(e)}")
-        return {
-            'statusCode': 500,
-            'headers': headers,
-            'body': json.dumps({'error': 'Internal server error'})
-        }
+        replayed = idempotency.replayed_response(e) if idempotency_key else None
+        if replayed is not None:
+            print(f"Replaying response for idempotency key: {replayed.get('enquiryId')}")
+            return replayed
+        metrics.log(f"DynamoDB put error: {str(e)}")
+        raise ApiError(500, 'Failed to store enquiry')
+    finally:
+        if sheet_write:
+            settle_row(sheet_write, item, stored, deadline)
 
 
+INIT_DURATION_MS = (time.perf_counter() - _INIT_START) * 1000
@@ -0,0 +1,125 @@
+import base64
+import hashlib
+import hmac
+import json
+import os
+import time
+
+import secret_cache
+
+
+# Environment variables
+VERIFICATION_KEYS_SECRET = os.environ.get('VERIFICATION_KEYS_SECRET')
+VERIFICATION_TOKEN_TTL_SECONDS = int(os.environ.get('VERIFICATION_TOKEN_TTL_SECONDS', '900'))
+KEY_SET_TTL_SECONDS = int(os.environ.get('KEY_SET_TTL_SECONDS', '300'))
+
+# Key set parsed from the cached secret: (current key id, {key id: key bytes}).
+# Unknown key ids force a refresh at most every
+# secret_cache.MIN_FORCED_REFRESH_SECONDS, so tokens with made-up key ids
+# can't turn every request into a Secrets Manager call
+_key_set = None
+_key_set_source = None
+_local_key_set = None
+
+
+class InvalidToken(Exception):
+    pass
+
+
+def _b64encode(data):
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode()
+
+
+def _b64decode(data):
+    return base64.urlsafe_b64decode(data + '=' * (-len(data) % 4))
+
+
+def parse_key_set(secret_string):
+    """
+    Parse the verification key secret:
+    {"current": "k2", "k1": "<old key>", "k2": "<new key>"}
+
+    To rotate, add a new key and point "current" at it. Tokens signed with
+    the old key keep verifying until the old key is removed.
+    """
+    secret = json.loads(secret_string)
+    current = secret['current']
+    keys = {kid: value.encode() for kid, value in secret.items() if kid != 'current'}
+    if current not in keys:
+        raise ValueError(f"Current verification key {current!r} is missing from the key set")
+    return current, keys
+
+
+def get_key_set(force_refresh=False):
+    global _key_set, _key_set_source
+
+    if _local_key_set is not None:
+        return _local_key_set
+    secret_string = secret_cache.get(VERIFICATION_KEYS_SECRET, force_refresh=force_refresh, ttl=KEY_SET_TTL_SECONDS)
+    # Only re-parse when the cache hands back a newly fetched string
+    if secret_string is not _key_set_source:
+        _key_set = parse_key_set(secret_string)
+        _key_set_source = secret_string
+    return _key_set
+
+
+def set_key_set(current, keys):
+    """
+    Install a key set directly, e.g. for local runs without Secrets Manager.
+    """
+    global _local_key_set
+    _local_key_set = (current, {kid: key if isinstance(key, bytes) else key.encode() for kid, key in keys.items()})
+
+
+def prefetch():
+    """
+    Start loading the key set during module init (see secret_cache.prefetch).
+    """
+    secret_cache.prefetch(VERIFICATION_KEYS_SECRET, ttl=KEY_SET_TTL_SECONDS)
+
+
+def _sign(key, message):
+    return hmac.new(key, message.encode(), hashlib.sha256).digest()
+
+
+def issue_token(phone, now=None):
+    """
+    Return a token binding `phone` to an expiry:
+    <key id>.<base64url payload>.<base64url HMAC-SHA256 signature>
+    """
+    now = int(time.time()) if now is None else now
+    kid, keys = get_key_set()
+    payload = _b64encode(json.dumps({'p': phone, 'e': now + VERIFICATION_TOKEN_TTL_SECONDS}, separators=(',', ':')).encode())
+    message = f'{kid}.{payload}'
+    return f'{message}.{_b64encode(_sign(keys[kid], message))}'
+
+
+def verify_token(token, now=None):
+    """
+    Check a token's signature and expiry without any network call (the key
+    set is cached) and return the phone number it was issued for.
+    Raises InvalidToken otherwise.
+    """
+    if not isinstance(token, str) or token.count('.') != 2:
+        raise InvalidToken('Malformed verification token')
+    kid, payload, signature = token.split('.')
+
+    _, keys = get_key_set()
+    if kid not in keys:
+        # Possibly signed with a key added after the key set was cached
+        _, keys = get_key_set(force_refresh=True)
+        if kid not in keys:
+            raise InvalidToken('Unknown verification key')
+
+    try:
+        valid = hmac.compare_digest(_sign(keys[kid], f'{kid}.{payload}'), _b64decode(signature))
+        claims = json.loads(_b64decode(payload)) if valid else None
+    except ValueError:
+        raise InvalidToken('Malformed verification token')
+    if not valid:
+        raise InvalidToken('Invalid verification token signature')
+
+    now = int(time.time()) if now is None else now
+    if not isinstance(claims, dict) or not isinstance(claims.get('e'), int) or claims['e'] <= now:
+        raise InvalidToken('Verification token has expired')
+    return claims.get('p')
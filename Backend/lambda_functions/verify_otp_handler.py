@@ -1,16 +1,59 @@
-import json
-import boto3
-import hashlib
+import time
+
+_INIT_START = time.perf_counter()
+
 import os
-from decimal import Decimal
 
-# Initialize AWS clients
-dynamodb = boto3.resource('dynamodb')
+import core
+import metrics
+import otp
+import ratelimit
+import schema
+import tokens
+from core import ApiError, api_handler
 
 # Environment variables
 OTP_TABLE = os.environ.get('OTP_TABLE')
 
-def lambda_handler(event, context):
+# Fetch the verification keys in the background during init (SECRET_PREFETCH)
+tokens.prefetch()
+
+
+def consume_otp(key, digest_attribute, digest, expiry_attribute, current_time):
+    """
+    Atomically delete the OTP item if it is unexpired, its digest matches
+    and it has attempts left. DynamoDB compares the digest server-side.
+
+    Returns (True, old_item) on success. On a failed condition returns
+    (False, item), where item is the stored item (None if it doesn't exist),
+    so the caller can tell the failure cases apart without another read.
+    """
+    try:
+        response = core.dynamodb().delete_item(
+            TableName=OTP_TABLE,
+            Key=key,
+            ConditionExpression=(
+                '#digest = :digest AND #expiry > :now'
+                ' AND (attribute_not_exists(verifyAttempts) OR verifyAttempts < :max_attempts)'
+            ),
+            ExpressionAttributeNames={'#digest': digest_attribute, '#expiry': expiry_attribute},
+            ExpressionAttributeValues={
+                ':digest': digest,
+                ':now': {'N': str(current_time)},
+                ':max_attempts': {'N': str(ratelimit.OTP_MAX_VERIFY_ATTEMPTS)},
+            },
+            ReturnValues='ALL_OLD',
+            ReturnValuesOnConditionCheckFailure='ALL_OLD',
+        )
+    except Exception as e:
+        if core.error_code(e) != 'ConditionalCheckFailedException':
+            raise
+        return False, getattr(e, 'response', {}).get('Item')
+    return True, response.get('Attributes')
+
+
+@api_handler
+def lambda_handler(body, event, context):
     """
     Lambda handler for POST /verify
     
@@ -22,135 +65,61 @@ def lambda_handler(event, context):
     
     Returns:
     {
-        "ok": true
+        "ok": true,
+        "verificationToken": "<signed token>",
+        "expiresIn": 900
     }
+
+    The OTP is checked and consumed in a single conditional delete, so a
+    code can only ever be used once, even by concurrent requests. The
+    returned token proves the phone was verified and must be sent to
+    /submit (see tokens.py).
     """
+    # Validate required fields
+    fields = schema.validate_verify_otp(body)
+    request_id = fields['requestId']
+    otp_code = fields['otp']
     
-    # CORS headers
-    headers = {
-        'Access-Control-Allow-Origin': '*',
-        'Access-Control-Allow-Headers': 'Content-Type,x-api-key',
-        'Access-Control-Allow-Methods': 'POST, OPTIONS',
-        'Content-Type': 'application/json'
-    }
+    ratelimit.check_verify_burst(request_id)
     
-    # Handle preflight OPTIONS request
-    if event.get('httpMethod') == 'OPTIONS':
-        return {
-            'statusCode': 200,
-            'headers': headers,
-            'body': ''
-        }
+    key = {'PK': {'S': f'OTP#{request_id}'}}
+    current_time = int(time.time())
     
     try:
-        # Parse request body
-        if isinstance(event.get('body'), str):
-            body = json.loads(event['body'])
-        else:
-            body = event.get('body', {})
-        
-        request_id = body.get('requestId', '').strip()
-        otp = body.get('otp', '').strip()
-        print(f"Request ID: {request_id}, OTP: {otp}")
-        
-        
-        # Validate required fields
-        if not request_id or not otp:
-            return {
-                'statusCode': 400,
-                'headers': headers,
-                'body': json.dumps({'error': 'Missing required fields'})
-            }
+        _, mac = otp.otp_mac(request_id, otp_code)
+        consumed, item = consume_otp(key, 'otp_mac', {'B': mac}, 'TTL', current_time)
         
-        # Get item from DynamoDB
-        table = dynamodb.Table(OTP_TABLE)
-        
-        try:
-            response = table.get_item(
-                Key={
-                    'PK': f'OTP#{request_id}'
-                }
-            )
-        except Exception as e:
-            print(f"DynamoDB get error: {str(e)}")
-            return {
-                'statusCode': 500,
-                'headers': headers,
-                'body': json.dumps({'error': 'Failed to retrieve OTP'})
-            }
-        
-        # Check if item exists
-        if 'Item' not in response:
-            return {
-                'statusCode': 400,
-                'headers': headers,
-                'body': json.dumps({'error': 'OTP not found or already used'})
-            }
-        
-        item = response['Item']
-        
-        # Check if OTP has expired
-        import time
-        current_time = int(time.time())
-        expires_at = int(item.get('expiresAt', 0))
-        
-        if expires_at <= current_time:
-            # Delete expired OTP
-            try:
-                table.delete_item(Key={'PK': f'OTP#{request_id}'})
-            except Exception as e:
-                print(f"Failed to delete expired OTP: {str(e)}")
-            
-            return {
-                'statusCode': 400,
-                'headers': headers,
-                'body': json.dumps({'error': 'OTP has expired'})
-            }
-        
-        # Verify OTP
-        stored_salt = item.get('otp_salt', '')
-        print(f"Stored salt: {stored_salt}")
-        stored_hash = item.get('otp_hash', '')
-        
-        computed_hash = hashlib.sha256((stored_salt + otp).encode()).hexdigest()
-        print(f"Computed hash: {computed_hash}, Stored hash: {stored_hash}")
-        
-        if computed_hash != stored_hash:
-            return {
-                'statusCode': 400,
-                'headers': headers,
-                'body': json.dumps({'error': 'Invalid OTP code'})
-            }
-        
-        # OTP is valid, delete the item to prevent reuse
-        try:
-            table.delete_item(
-                Key={
-                    'PK': f'OTP#{request_id}'
-                }
-            )
-        except Exception as e:
-            print(f"DynamoDB delete error: {str(e)}")
-            # Don't fail the request if delete fails
-        
-        return {
-            'statusCode': 200,
-            'headers': headers,
-            'body': json.dumps({'ok': True})
-        }
-        
-    except json.JSONDecodeError:
-        return {
-            'statusCode': 400,
-            'headers': headers,
-            'body': json.dumps({'error': 'Invalid JSON in request body'})
-        }
+        # Items keyed with a previous verification key, or written in an
+        # older format, fail the first condition. The returned item says
+        # how it was written: check the code against it in process and,
+        # if it matches, retry once against its stored digest
+        if not consumed and item and otp.expires_at(item) > current_time:
+            stored = otp.match(item, request_id, otp_code)
+            if stored and stored[1] != {'B': mac}:
+                consumed, item = consume_otp(key, *stored, current_time)
     except Exception as e:
-        print(f"Error: {str(e)}")
-        return {
-            'statusCode': 500,
-            'headers': headers,
-            'body': json.dumps({'error': 'Internal server error'})
-        }
+        metrics.log(f"DynamoDB delete error: {str(e)}")
+        raise ApiError(500, 'Failed to verify OTP')
+    
+    if not consumed:
+        if not item:
+            raise ApiError(400, 'OTP not found or already used')
+        if otp.expires_at(item) <= current_time:
+            # Expired items are left for the table TTL to remove
+            raise ApiError(400, 'OTP has expired')
+        
+        attempts = int(item.get('verifyAttempts', {}).get('N', '0'))
+        if attempts < ratelimit.OTP_MAX_VERIFY_ATTEMPTS:
+            attempts = ratelimit.record_failed_attempt(OTP_TABLE, key) or attempts
+        if attempts >= ratelimit.OTP_MAX_VERIFY_ATTEMPTS:
+            raise ApiError(429, 'Too many attempts. Please request a new code.')
+        raise ApiError(400, 'Invalid OTP code')
+    
+    return {
+        'ok': True,
+        'verificationToken': tokens.issue_token(item['phone']['S']),
+        'expiresIn': tokens.VERIFICATION_TOKEN_TTL_SECONDS
+    }
 
 
+INIT_DURATION_MS = (time.perf_counter() - _INIT_START) * 1000
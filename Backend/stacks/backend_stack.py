@@ -1,9 +1,11 @@
 from aws_cdk import (
-    # Duration,
+    Duration,
     Stack,
-    # aws_sqs as sqs,
+    aws_sqs as sqs,
     aws_dynamodb as ddb,
     aws_lambda as lambda_,
+    aws_applicationautoscaling as appscaling,
+    aws_lambda_event_sources as lambda_event_sources,
     aws_apigateway as apigw,
     RemovalPolicy,
     aws_sns as sns,
@@ -12,18 +14,80 @@ from aws_cdk import (
     BundlingOptions,
 )
 from constructs import Construct
+import json
 import os
+import sys
 from pathlib import Path
 from dotenv import load_dotenv
 
+from stacks import packaging
+
+# Request models are generated from the functions' own body schemas
+sys.path.insert(0, str(Path(__file__).parent.parent / "lambda_functions"))
+import schema  # noqa: E402
+
 # Load .env file from Backend root directory
 env_path = Path(__file__).parent.parent / '.env'
 load_dotenv(dotenv_path=env_path)
+
+# Per-function sizing; anything here can be overridden for all functions
+# ("defaults") or one function (keyed by construct id) in the
+# "functionConfig" context of cdk.json, or with -c functionConfig='{...}'
+FUNCTION_DEFAULTS = {
+    "memorySize": 256,
+    "timeoutSeconds": 10,
+    "architecture": "arm64",
+    # Warm execution environments on the "live" alias
+    "provisionedConcurrency": 0,
+    # [{"name", "schedule", "minCapacity", "maxCapacity"}] Application Auto
+    # Scaling actions on the alias' provisioned concurrency
+    "scheduledScaling": [],
+    # Scale provisioned concurrency to keep utilization near this fraction
+    "utilizationTarget": None,
+    # SnapStart on published versions; can't be combined with provisioned concurrency
+    "snapStart": False,
+}
+ARCHITECTURES = {
+    "arm64": lambda_.Architecture.ARM_64,
+    "x86_64": lambda_.Architecture.X86_64,
+}
+
+
+def json_schema(model):
+    """apigw.JsonSchema for a schema.gateway_model() dict."""
+    types = model["type"] if isinstance(model["type"], list) else [model["type"]]
+    types = [getattr(apigw.JsonSchemaType, name.upper()) for name in types]
+    return apigw.JsonSchema(
+        schema=apigw.JsonSchemaVersion.DRAFT4,
+        type=types[0] if len(types) == 1 else types,
+        description=model.get("description"),
+        required=model.get("required"),
+        enum=model.get("enum"),
+        min_items=model.get("minItems"),
+        max_items=model.get("maxItems"),
+        properties={name: json_schema(child) for name, child in model["properties"].items()}
+        if "properties" in model else None,
+        items=json_schema(model["items"]) if "items" in model else None,
+    )
+
+
+# EnquiryTable GSIs (index name, partition key), in deployment order
+ENQUIRY_INDEXES = [
+    ("StatusIndex", "status"),
+    ("PhoneIndex", "phone"),
+    ("CourseIndex", "course"),
+]
+
+
 class BackendStack(Stack):
 
     def __init__(self, scope: Construct, construct_id: str, **kwargs) -> None:
         super().__init__(scope, construct_id, **kwargs)
 
+        self.function_config = self.node.try_get_context("functionConfig") or {}
+        if isinstance(self.function_config, str):
+            self.function_config = json.loads(self.function_config)
+
         # Get environment variables with validation
         google_sheet_secret_name = os.getenv("GOOGLE_SHEET_SECRET_NAME")
         sheet_id = os.getenv("SHEET_ID")
@@ -58,80 +122,440 @@ class BackendStack(Stack):
             billing_mode=ddb.BillingMode.PAY_PER_REQUEST,
             point_in_time_recovery_specification=ddb.PointInTimeRecoverySpecification(point_in_time_recovery_enabled=True),
             table_name="EnquiryTable",
+            stream=ddb.StreamViewType.NEW_IMAGE,
+        )
+        # Sparse indexes behind GET /enquiries; each sorts by submittedAt so a
+        # day's enquiries are a begins_with range on one partition.
+        # DynamoDB creates one GSI per table update, so the enquiryIndexes
+        # context deploys the first N: raise it by one per deploy. Enquiries
+        # stored before PhoneIndex/CourseIndex have no phone or course until
+        # backfill_enquiry_indexes.py is run. CourseIndex holds each enquiry
+        # under its primary course only (enquiries.primary_course).
+        enquiry_indexes = ENQUIRY_INDEXES[:self.enquiry_index_count()]
+        for index_name, partition_attribute in enquiry_indexes:
+            enquiry_table.add_global_secondary_index(
+                index_name=index_name,
+                partition_key=ddb.Attribute(name=partition_attribute, type=ddb.AttributeType.STRING),
+                sort_key=ddb.Attribute(name="submittedAt", type=ddb.AttributeType.STRING),
+                projection_type=ddb.ProjectionType.ALL,
+            )
+
+        # Atomic per-phone counters for OTP rate limiting; items expire with their window
+        rate_limit_table = ddb.Table(
+            self, "RateLimitTable",
+            partition_key=ddb.Attribute(name="PK", type=ddb.AttributeType.STRING),
+            removal_policy=RemovalPolicy.DESTROY,
+            time_to_live_attribute="TTL",
+            billing_mode=ddb.BillingMode.PAY_PER_REQUEST,
+            table_name="RateLimitTable",
+        )
+
+        # Idempotency keys for /submit retries; records expire via TTL
+        idempotency_table = ddb.Table(
+            self, "IdempotencyTable",
+            partition_key=ddb.Attribute(name="PK", type=ddb.AttributeType.STRING),
+            removal_policy=RemovalPolicy.DESTROY,
+            time_to_live_attribute="TTL",
+            billing_mode=ddb.BillingMode.PAY_PER_REQUEST,
+            table_name="IdempotencyTable",
+        )
+
+        # HMAC keys for the tokens /verify issues and /submit checks.
+        # Rotate by adding a key and pointing "current" at it.
+        verification_keys_secret = secretsmanager.Secret(
+            self, "VerificationKeysSecret",
+            description="HMAC key set for phone verification tokens",
+            generate_secret_string=secretsmanager.SecretStringGenerator(
+                secret_string_template=json.dumps({"current": "k1"}),
+                generate_string_key="k1",
+                exclude_punctuation=True,
+                password_length=64,
+            ),
         )
+
         common_env = {
             "OTP_TABLE": otp_table.table_name,
             "ENQUIRY_TABLE": enquiry_table.table_name,
             "OTP_TTL_SECONDS": "300",
+            "VERIFICATION_KEYS_SECRET": verification_keys_secret.secret_arn,
+            "VERIFICATION_TOKEN_TTL_SECONDS": "900",
+            "RATE_LIMIT_TABLE": rate_limit_table.table_name,
+            "OTP_REQUESTS_PER_WINDOW": "5",
+            "OTP_REQUEST_WINDOW_SECONDS": "3600",
+            "OTP_RESEND_COOLDOWN_SECONDS": "30",
+            "OTP_MAX_VERIFY_ATTEMPTS": "5",
+            "RATE_LIMIT_LOCAL_BURST": "3",
+            "RATE_LIMIT_LOCAL_REFILL_PER_SECOND": "0.2",
+            "IDEMPOTENCY_TABLE": idempotency_table.table_name,
+            "IDEMPOTENCY_TTL_SECONDS": "86400",
+            "DEDUP_WINDOW_SECONDS": "604800",
+            "SECRET_CACHE_TTL_SECONDS": "3600",
+            "SECRET_REFRESH_AHEAD_SECONDS": "300",
+            "SECRET_PREFETCH": "1",
         }
 
+        # /request only queues the SMS; SmsDispatchLambda publishes it and
+        # records the delivery state on the OTP# item
+        sms_dlq = sqs.Queue(
+            self, "SmsDlq",
+            encryption=sqs.QueueEncryption.SQS_MANAGED,
+            retention_period=Duration.days(1),
+        )
+        sms_queue = sqs.Queue(
+            self, "SmsQueue",
+            encryption=sqs.QueueEncryption.SQS_MANAGED,
+            # Six times the dispatcher's timeout, as recommended for Lambda consumers
+            visibility_timeout=Duration.seconds(6 * self.function_settings("SmsDispatchLambda")["timeoutSeconds"]),
+            # Codes are useless once the OTP has expired
+            retention_period=Duration.seconds(300),
+            dead_letter_queue=sqs.DeadLetterQueue(max_receive_count=3, queue=sms_dlq),
+        )
+
+        # Handler modules only, shared by every function. boto3 comes from
+        # the runtime; other third-party packages are in layers.
+        function_code = lambda_.Code.from_asset(
+            "./lambda_functions",
+            bundling=BundlingOptions(
+                image=lambda_.Runtime.PYTHON_3_12.bundling_image,
+                command=["bash", "-c", packaging.function_command()],
+            ),
+        )
+
         request_otp_lambda = lambda_.Function(
             self, "RequestOtpLambda",
             function_name="RequestOtpLambda",
             runtime=lambda_.Runtime.PYTHON_3_12,
+            **self.function_props("RequestOtpLambda"),
             handler="request_otp_handler.lambda_handler",
-            code=lambda_.Code.from_asset("./lambda_functions"),
+            code=function_code,
+            environment={**common_env,
+                "SMS_QUEUE_URL": sms_queue.queue_url,
+            },
+        )
+        request_otp_alias = self.live_alias(request_otp_lambda)
+
+        sms_dispatch_lambda = lambda_.Function(
+            self, "SmsDispatchLambda",
+            function_name="SmsDispatchLambda",
+            runtime=lambda_.Runtime.PYTHON_3_12,
+            **self.function_props("SmsDispatchLambda"),
+            handler="sms_dispatch_handler.lambda_handler",
+            code=function_code,
+            environment={**common_env,
+                "SMS_PUBLISH_ATTEMPTS": "3",
+                "SMS_MAX_RECEIVES": "3",
+            },
+        )
+        sms_dispatch_alias = self.live_alias(sms_dispatch_lambda)
+        sms_dispatch_alias.add_event_source(
+            lambda_event_sources.SqsEventSource(
+                sms_queue,
+                batch_size=10,
+                report_batch_item_failures=True,
+            )
+        )
+
+        otp_status_lambda = lambda_.Function(
+            self, "OtpStatusLambda",
+            function_name="OtpStatusLambda",
+            runtime=lambda_.Runtime.PYTHON_3_12,
+            **self.function_props("OtpStatusLambda"),
+            handler="otp_status_handler.lambda_handler",
+            code=function_code,
             environment=common_env,
         )
+        otp_status_alias = self.live_alias(otp_status_lambda)
 
         verify_otp_lambda = lambda_.Function(
             self, "VerifyOtpLambda",
             function_name="VerifyOtpLambda",
             runtime=lambda_.Runtime.PYTHON_3_12,
+            **self.function_props("VerifyOtpLambda"),
             handler="verify_otp_handler.lambda_handler",
-            code=lambda_.Code.from_asset("./lambda_functions"),
+            code=function_code,
             environment=common_env,
         )
+        verify_otp_alias = self.live_alias(verify_otp_lambda)
 
         submit_enquiry_lambda = lambda_.Function(
             self, "SubmitEnquiryLambda",
             function_name="SubmitEnquiryLambda",
             runtime=lambda_.Runtime.PYTHON_3_12,
+            **self.function_props("SubmitEnquiryLambda"),
             handler="submit_enquiry_handler.lambda_handler",
+            code=function_code,
+            environment=common_env,
+        )
+        submit_enquiry_alias = self.live_alias(submit_enquiry_lambda)
+
+        submit_batch_lambda = lambda_.Function(
+            self, "SubmitBatchLambda",
+            function_name="SubmitBatchLambda",
+            runtime=lambda_.Runtime.PYTHON_3_12,
+            **self.function_props("SubmitBatchLambda"),
+            handler="submit_batch_handler.lambda_handler",
+            code=function_code,
+            environment={**common_env,
+                "BATCH_MAX_ENQUIRIES": "100",
+            },
+        )
+        submit_batch_alias = self.live_alias(submit_batch_lambda)
+
+        list_enquiries_lambda = lambda_.Function(
+            self, "ListEnquiriesLambda",
+            function_name="ListEnquiriesLambda",
+            runtime=lambda_.Runtime.PYTHON_3_12,
+            **self.function_props("ListEnquiriesLambda"),
+            handler="list_enquiries_handler.lambda_handler",
+            code=function_code,
+            environment={**common_env,
+                "ENQUIRY_INDEXES": ",".join(index_name for index_name, _ in enquiry_indexes),
+            },
+        )
+        list_enquiries_alias = self.live_alias(list_enquiries_lambda)
+
+        config_lambda = lambda_.Function(
+            self, "ConfigLambda",
+            function_name="ConfigLambda",
+            runtime=lambda_.Runtime.PYTHON_3_12,
+            **self.function_props("ConfigLambda"),
+            handler="config_handler.lambda_handler",
+            code=function_code,
+            environment=common_env,
+        )
+        config_alias = self.live_alias(config_lambda)
+
+        # gspread and google-auth, for the functions that write to the sheet
+        sheet_sync_architecture = ARCHITECTURES[self.function_settings("SheetSyncLambda")["architecture"]]
+        sheets_layer = lambda_.LayerVersion(
+            self, "SheetsDependenciesLayer",
             code=lambda_.Code.from_asset(
-                path="./lambda_functions",
+                "./layers/sheets",
                 bundling=BundlingOptions(
                     image=lambda_.Runtime.PYTHON_3_12.bundling_image,
-                    command=[
-                        'bash', '-c',
-                        'pip install -r requirements.txt -t /asset-output && cp -r . /asset-output'
-                    ],
-                )
+                    # Install wheels for the function's architecture
+                    platform=sheet_sync_architecture.docker_platform,
+                    command=["bash", "-c", packaging.layer_command()],
+                ),
             ),
+            compatible_runtimes=[lambda_.Runtime.PYTHON_3_12],
+            compatible_architectures=[sheet_sync_architecture],
+            description="gspread and google-auth for the Google Sheets writers",
+        )
+
+        # Google Sheets sync runs off the request path: new ENQUIRY# items are
+        # drained from the EnquiryTable stream in batches, one append_rows per batch.
+        sheet_sync_lambda = lambda_.Function(
+            self, "SheetSyncLambda",
+            function_name="SheetSyncLambda",
+            runtime=lambda_.Runtime.PYTHON_3_12,
+            **self.function_props("SheetSyncLambda"),
+            handler="sheet_sync_handler.lambda_handler",
+            code=function_code,
+            layers=[sheets_layer],
             environment={**common_env,
                 "SHEET_ID": sheet_id,
                 "GOOGLE_SHEETS_SECRET": google_sheet_secret_name,
+                "SHEET_HANDLE_TTL_SECONDS": "900",
             },
         )
-        google_sheets_secret.grant_read(submit_enquiry_lambda)
+        sheet_sync_alias = self.live_alias(sheet_sync_lambda)
+        google_sheets_secret.grant_read(sheet_sync_lambda)
+
+        # Optionally also append from /submit, overlapped with the DynamoDB
+        # write (see submit_enquiry_handler.SHEETS_DEADLINE_MS)
+        submit_sheets_deadline_ms = int(self.node.try_get_context("submitSheetsDeadlineMs") or 0)
+        if submit_sheets_deadline_ms:
+            if (self.function_settings("SubmitEnquiryLambda")["architecture"]
+                    != self.function_settings("SheetSyncLambda")["architecture"]):
+                raise ValueError("SubmitEnquiryLambda must use SheetSyncLambda's architecture to share the Sheets layer")
+            submit_enquiry_lambda.add_layers(sheets_layer)
+            for name, value in {
+                "SUBMIT_SHEETS_DEADLINE_MS": str(submit_sheets_deadline_ms),
+                "SHEET_ID": sheet_id,
+                "GOOGLE_SHEETS_SECRET": google_sheet_secret_name,
+                "SHEET_HANDLE_TTL_SECONDS": "900",
+            }.items():
+                submit_enquiry_lambda.add_environment(name, value)
+            google_sheets_secret.grant_read(submit_enquiry_lambda)
+
+        sheet_sync_dlq = sqs.Queue(
+            self, "SheetSyncDlq",
+            retention_period=Duration.days(14),
+        )
+        sheet_sync_alias.add_event_source(
+            lambda_event_sources.DynamoEventSource(
+                enquiry_table,
+                starting_position=lambda_.StartingPosition.TRIM_HORIZON,
+                batch_size=100,
+                max_batching_window=Duration.seconds(10),
+                bisect_batch_on_error=True,
+                retry_attempts=10,
+                on_failure=lambda_event_sources.SqsDlq(sheet_sync_dlq),
+                # New enquiries, and those /submit hands back after a failed
+                # or late inline append (sheetRetry; see release_to_stream).
+                # Filters only match leaves, hence sheetRetry's BOOL
+                filters=[
+                    lambda_.FilterCriteria.filter({
+                        "eventName": lambda_.FilterRule.is_equal("INSERT"),
+                        "dynamodb": {
+                            "Keys": {
+                                "PK": {"S": lambda_.FilterRule.begins_with("ENQUIRY#")},
+                            },
+                        },
+                    }),
+                    lambda_.FilterCriteria.filter({
+                        "eventName": lambda_.FilterRule.is_equal("MODIFY"),
+                        "dynamodb": {
+                            "Keys": {
+                                "PK": {"S": lambda_.FilterRule.begins_with("ENQUIRY#")},
+                            },
+                            "NewImage": {
+                                "sheetRetry": {"BOOL": lambda_.FilterRule.exists()},
+                            },
+                        },
+                    }),
+                ],
+            )
+        )
+
+        # GET /config can be served from a stage cache; 0 leaves the cache
+        # cluster (billed hourly) off
+        config_cache_seconds = int(self.node.try_get_context("configCacheTtlSeconds") or 0)
         api_gateway = apigw.RestApi(
             self, "BackendApiGateway",
             rest_api_name="BackendApiGateway",
             description="API Gateway for the backend",
             deploy_options=apigw.StageOptions(
                 stage_name="v1",
+                cache_cluster_enabled=bool(config_cache_seconds),
+                cache_cluster_size="0.5" if config_cache_seconds else None,
+                method_options={
+                    "/config/GET": apigw.MethodDeploymentOptions(
+                        caching_enabled=True,
+                        cache_ttl=Duration.seconds(config_cache_seconds),
+                    ),
+                } if config_cache_seconds else None,
             ),
+            # Preflight is answered by mock integrations and cached by the browser
             default_cors_preflight_options=apigw.CorsOptions(
                 allow_origins=apigw.Cors.ALL_ORIGINS,
                 allow_methods=apigw.Cors.ALL_METHODS,
-                allow_headers=apigw.Cors.DEFAULT_HEADERS,
+                allow_headers=apigw.Cors.DEFAULT_HEADERS + ["Idempotency-Key"],
+                max_age=Duration.hours(1),
             ),
         )
+
+        # Bodies that don't match the model are rejected before the function
+        # is invoked. Gateway errors get the same CORS headers and
+        # {"error": ...} body as the functions' own errors; validation errors
+        # also list their messages under "fields", keyed by path like
+        # ApiError.details (the gateway's message covers the whole body).
+        body_validator = api_gateway.add_request_validator(
+            "BodyValidator",
+            request_validator_name="BodyValidator",
+            validate_request_body=True,
+        )
+        # escapeJavaScript also escapes single quotes as \', which isn't valid JSON
+        api_gateway.add_gateway_response(
+            "BadRequestBodyResponse",
+            type=apigw.ResponseType.BAD_REQUEST_BODY,
+            response_headers={"Access-Control-Allow-Origin": "'*'"},
+            templates={
+                "application/json": '{"error": "Invalid request body", '
+                                    '"fields": {"body": "$util.escapeJavaScript($context.error.validationErrorString)'
+                                    r""".replaceAll("\\'", "'")"}}""",
+            },
+        )
+        for response_id, response_type in (
+            ("Default4xxResponse", apigw.ResponseType.DEFAULT_4_XX),
+            ("Default5xxResponse", apigw.ResponseType.DEFAULT_5_XX),
+        ):
+            api_gateway.add_gateway_response(
+                response_id,
+                type=response_type,
+                response_headers={"Access-Control-Allow-Origin": "'*'"},
+                templates={"application/json": '{"error": $context.error.messageString}'},
+            )
+
+        def body_model(name, body_schema):
+            return {
+                "application/json": api_gateway.add_model(
+                    name,
+                    model_name=name,
+                    content_type="application/json",
+                    schema=json_schema(schema.gateway_model(body_schema)),
+                ),
+            }
+
         request_otp_resource = api_gateway.root.add_resource("request")
         verify_otp_resource = api_gateway.root.add_resource("verify")
         submit_enquiry_resource = api_gateway.root.add_resource("submit")
-        request_otp_method = request_otp_resource.add_method("POST", integration=apigw.LambdaIntegration(request_otp_lambda), api_key_required=True)
-        verify_otp_method = verify_otp_resource.add_method("POST", integration=apigw.LambdaIntegration(verify_otp_lambda), api_key_required=True)
-        submit_enquiry_method = submit_enquiry_resource.add_method("POST", integration=apigw.LambdaIntegration(submit_enquiry_lambda), api_key_required=True)
+        request_otp_method = request_otp_resource.add_method(
+            "POST",
+            integration=apigw.LambdaIntegration(request_otp_alias),
+            api_key_required=True,
+            request_models=body_model("RequestOtpBody", schema.REQUEST_OTP),
+            request_validator=body_validator,
+        )
+        verify_otp_method = verify_otp_resource.add_method(
+            "POST",
+            integration=apigw.LambdaIntegration(verify_otp_alias),
+            api_key_required=True,
+            request_models=body_model("VerifyOtpBody", schema.VERIFY_OTP),
+            request_validator=body_validator,
+        )
+        submit_enquiry_method = submit_enquiry_resource.add_method(
+            "POST",
+            integration=apigw.LambdaIntegration(submit_enquiry_alias),
+            api_key_required=True,
+            request_models=body_model("EnquiryBody", schema.ENQUIRY),
+            request_validator=body_validator,
+        )
+        otp_status_resource = request_otp_resource.add_resource("{requestId}")
+        otp_status_method = otp_status_resource.add_method("GET", integration=apigw.LambdaIntegration(otp_status_alias), api_key_required=True)
+        # Staff bulk upload from event-day tablets, also IAM-signed
+        submit_batch_resource = submit_enquiry_resource.add_resource("batch")
+        submit_batch_method = submit_batch_resource.add_method(
+            "POST",
+            integration=apigw.LambdaIntegration(submit_batch_alias),
+            authorization_type=apigw.AuthorizationType.IAM,
+        )
+        # Staff-only listing: signed with IAM credentials rather than the app's API key
+        list_enquiries_resource = api_gateway.root.add_resource("enquiries")
+        list_enquiries_method = list_enquiries_resource.add_method(
+            "GET",
+            integration=apigw.LambdaIntegration(list_enquiries_alias),
+            authorization_type=apigw.AuthorizationType.IAM,
+        )
+        # Course list and form limits for the app
+        config_resource = api_gateway.root.add_resource("config")
+        config_method = config_resource.add_method(
+            "GET",
+            integration=apigw.LambdaIntegration(config_alias),
+            api_key_required=True,
+        )
 
 
 
         otp_table.grant_read_write_data(request_otp_lambda)
         otp_table.grant_read_write_data(verify_otp_lambda)
+        otp_table.grant_read_write_data(sms_dispatch_lambda)
+        otp_table.grant_read_data(otp_status_lambda)
+        sms_queue.grant_send_messages(request_otp_lambda)
+        rate_limit_table.grant_read_write_data(request_otp_lambda)
         enquiry_table.grant_read_write_data(submit_enquiry_lambda)
+        idempotency_table.grant_read_write_data(submit_enquiry_lambda)
+        enquiry_table.grant_write_data(submit_batch_lambda)
+        enquiry_table.grant_read_data(list_enquiries_lambda)
+        # On-demand backfill scans, and clearing sheetRetry on released enquiries
+        enquiry_table.grant_read_write_data(sheet_sync_lambda)
+        verification_keys_secret.grant_read(request_otp_lambda)  # keys the OTP MAC
+        verification_keys_secret.grant_read(verify_otp_lambda)
+        verification_keys_secret.grant_read(submit_enquiry_lambda)
         
         # Grant permission to publish SMS directly to phone numbers
-        request_otp_lambda.add_to_role_policy(
+        sms_dispatch_lambda.add_to_role_policy(
             iam.PolicyStatement(
                 actions=["sns:Publish"],
                 resources=["*"],  # Required for direct SMS publishing to phone numbers
@@ -150,4 +574,68 @@ class BackendStack(Stack):
         plan.add_api_stage(stage=api_gateway.deployment_stage)
 
 
+    def enquiry_index_count(self):
+        """How many of ENQUIRY_INDEXES to deploy (the enquiryIndexes context, default all)."""
+        count = self.node.try_get_context("enquiryIndexes")
+        count = len(ENQUIRY_INDEXES) if count is None else int(count)
+        if not 0 <= count <= len(ENQUIRY_INDEXES):
+            raise ValueError(f"enquiryIndexes must be between 0 and {len(ENQUIRY_INDEXES)}")
+        return count
 
+    def function_settings(self, name):
+        """FUNCTION_DEFAULTS overlaid with the context's defaults and `name`'s entry."""
+        settings = {
+            **FUNCTION_DEFAULTS,
+            **self.function_config.get("defaults", {}),
+            **self.function_config.get(name, {}),
+        }
+        if settings["architecture"] not in ARCHITECTURES:
+            raise ValueError(f"{name}: architecture must be one of {', '.join(ARCHITECTURES)}")
+        if settings["snapStart"] and (settings["provisionedConcurrency"] or settings["scheduledScaling"]):
+            raise ValueError(f"{name}: snapStart can't be combined with provisioned concurrency")
+        return settings
+
+    def function_props(self, name):
+        """lambda_.Function keyword arguments for `name`'s memory, timeout and architecture."""
+        settings = self.function_settings(name)
+        props = {
+            "memory_size": settings["memorySize"],
+            "timeout": Duration.seconds(settings["timeoutSeconds"]),
+            "architecture": ARCHITECTURES[settings["architecture"]],
+        }
+        if settings["snapStart"]:
+            props["snap_start"] = lambda_.SnapStartConf.ON_PUBLISHED_VERSIONS
+        return props
+
+    def live_alias(self, function):
+        """
+        Publish `function` and return its "live" alias, which API Gateway and
+        the event sources invoke. Provisioned concurrency and its scaling
+        are attached here, so they follow each new version.
+        """
+        name = function.node.id
+        settings = self.function_settings(name)
+        provisioned = settings["provisionedConcurrency"]
+        alias = lambda_.Alias(
+            self, f"{name}LiveAlias",
+            alias_name="live",
+            version=function.current_version,
+            provisioned_concurrent_executions=provisioned or None,
+        )
+
+        windows = settings["scheduledScaling"]
+        if windows or settings["utilizationTarget"]:
+            scaling = alias.add_auto_scaling(
+                min_capacity=max(provisioned, 1),
+                max_capacity=max([provisioned, 1] + [window["maxCapacity"] for window in windows]),
+            )
+            if settings["utilizationTarget"]:
+                scaling.scale_on_utilization(utilization_target=settings["utilizationTarget"])
+            for window in windows:
+                scaling.scale_on_schedule(
+                    window["name"],
+                    schedule=appscaling.Schedule.expression(window["schedule"]),
+                    min_capacity=window["minCapacity"],
+                    max_capacity=window["maxCapacity"],
+                )
+        return alias
@@ -0,0 +1,58 @@
+"""
+Build commands for the Lambda assets. The stack runs them in the Docker
+bundling image; benchmarks/package_size.py and tests/test_packaging.py
+run them locally to report and check package sizes.
+"""
+import subprocess
+import tempfile
+import zipfile
+from pathlib import Path
+
+# Zipped size budgets. A function package over its budget means a module or
+# dependency landed in the shared code asset instead of a layer.
+MAX_FUNCTION_KB = 200
+MAX_LAYER_MB = 12
+
+# /var/task and /opt are read-only, so without .pyc files every cold start
+# compiles the modules again. The asset zip resets mtimes, so the .pyc
+# files must not be checked against their sources.
+_COMPILE = 'python -m compileall -q -j 0 --invalidation-mode unchecked-hash {path}'
+
+
+def function_command(output='/asset-output'):
+    """The handler modules only, precompiled."""
+    return f'cp *.py {output} && ' + _COMPILE.format(path=output)
+
+
+def layer_command(output='/asset-output'):
+    """
+    requirements.txt installed under python/, without dist-info, tests,
+    type stubs or console scripts, and precompiled.
+    """
+    target = f'{output}/python'
+    return ' && '.join([
+        f'pip install -q --no-compile --no-cache-dir -r requirements.txt -t {target}',
+        f'cd {target}',
+        'rm -rf *.dist-info bin',
+        r'find . -depth -type d \( -name tests -o -name test -o -name __pycache__ \) -exec rm -rf {} +',
+        "find . -name '*.pyi' -delete",
+        _COMPILE.format(path='.'),
+    ])
+
+
+def build(source, command, output):
+    """Run `command` (function_command or layer_command) in `source` into `output`."""
+    output = Path(output)
+    output.mkdir(parents=True)
+    subprocess.run(['bash', '-c', command(str(output))], cwd=source, check=True)
+
+
+def sizes(directory):
+    """(zipped bytes, unpacked bytes, file count) of `directory`."""
+    files = [path for path in Path(directory).rglob('*') if path.is_file()]
+    with tempfile.TemporaryFile() as archive:
+        with zipfile.ZipFile(archive, 'w', zipfile.ZIP_DEFLATED) as zipped:
+            for path in files:
+                zipped.write(path, path.relative_to(directory))
+        zipped_bytes = archive.tell()
+    return zipped_bytes, sum(path.stat().st_size for path in files), len(files)
@@ -0,0 +1,48 @@
+"""
+Shared fixtures. The handlers run against each storage.py engine
+(memory and sqlite) installed with core.set_client(), so no AWS
+credentials or network are needed.
+"""
+import json
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+# Read by the handler modules on import
+for _table in ('OTP_TABLE', 'ENQUIRY_TABLE', 'RATE_LIMIT_TABLE', 'IDEMPOTENCY_TABLE'):
+    os.environ.setdefault(_table, _table.title().replace('_', ''))
+
+BACKEND = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND))
+sys.path.insert(0, str(BACKEND / 'lambda_functions'))
+
+import core  # noqa: E402
+import storage  # noqa: E402
+import tokens  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def verification_keys():
+    tokens.set_key_set('test', {'test': 'test-verification-key'})
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def dynamodb(request, tmp_path):
+    """Each handler test runs against both local engines."""
+    if request.param == 'sqlite':
+        engine = storage.SQLiteEngine(str(tmp_path / 'storage.db'))
+    else:
+        engine = storage.MemoryEngine()
+    core.set_client('dynamodb', engine)
+    return engine
+
+
+@pytest.fixture
+def call():
+    """Invoke a handler module with a JSON body; returns (status, body)."""
+    def call(module, body):
+        response = module.lambda_handler({'httpMethod': 'POST', 'body': json.dumps(body)}, None)
+        return response['statusCode'], json.loads(response['body'])
+    return call
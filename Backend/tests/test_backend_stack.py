@@ -0,0 +1,317 @@
+"""
+Synthesizes BackendStack with the context in cdk.json and checks the
+template. Asset bundling (Docker) is skipped.
+"""
+import contextlib
+import json
+import os
+from pathlib import Path
+
+import pytest
+
+aws_cdk = pytest.importorskip('aws_cdk')
+
+from aws_cdk.assertions import Match, Template  # noqa: E402
+
+import schema  # noqa: E402
+from stacks.backend_stack import BackendStack  # noqa: E402
+
+BACKEND = Path(__file__).resolve().parent.parent
+CONTEXT = json.loads((BACKEND / 'cdk.json').read_text())['context']
+
+FUNCTIONS = [
+    'RequestOtpLambda',
+    'SmsDispatchLambda',
+    'OtpStatusLambda',
+    'VerifyOtpLambda',
+    'SubmitEnquiryLambda',
+    'SubmitBatchLambda',
+    'ListEnquiriesLambda',
+    'ConfigLambda',
+    'SheetSyncLambda',
+]
+
+
+def synth(**context):
+    os.environ.setdefault('GOOGLE_SHEET_SECRET_NAME', 'test/google-sheets')
+    os.environ.setdefault('SHEET_ID', 'test-sheet-id')
+    app = aws_cdk.App(context={**CONTEXT, **context, 'aws:cdk:bundling-stacks': []})
+    # Asset paths are relative to Backend/, where cdk runs
+    with contextlib.chdir(BACKEND):
+        return Template.from_stack(BackendStack(app, 'BackendStack'))
+
+
+@pytest.fixture(scope='module')
+def template():
+    return synth()
+
+
+def function_id(template, name):
+    (logical_id,) = template.find_resources('AWS::Lambda::Function', {'Properties': {'FunctionName': name}})
+    return logical_id
+
+
+def function(template, name):
+    return template.find_resources('AWS::Lambda::Function')[function_id(template, name)]['Properties']
+
+
+def alias(template, name):
+    (resource,) = template.find_resources(
+        'AWS::Lambda::Alias', {'Properties': {'FunctionName': {'Ref': function_id(template, name)}}}).values()
+    return resource['Properties']
+
+
+@pytest.mark.parametrize('name, memory, timeout', [
+    ('RequestOtpLambda', 256, 10),
+    ('VerifyOtpLambda', 256, 10),
+    ('SubmitEnquiryLambda', 512, 10),
+    ('SubmitBatchLambda', 512, 30),
+    ('SheetSyncLambda', 512, 60),
+])
+def test_function_sizing(template, name, memory, timeout):
+    props = function(template, name)
+    assert props['MemorySize'] == memory
+    assert props['Timeout'] == timeout
+    assert props['Architectures'] == ['arm64']
+
+
+def test_every_function_has_a_live_alias(template):
+    template.resource_count_is('AWS::Lambda::Alias', len(FUNCTIONS))
+    for name in FUNCTIONS:
+        props = alias(template, name)
+        assert props['Name'] == 'live'
+        assert 'FunctionVersion' in props
+
+
+@pytest.mark.parametrize('name, provisioned', [
+    ('SubmitEnquiryLambda', 1),
+    ('RequestOtpLambda', 1),
+    ('VerifyOtpLambda', 1),
+    ('OtpStatusLambda', None),
+    ('SheetSyncLambda', None),
+])
+def test_provisioned_concurrency(template, name, provisioned):
+    config = alias(template, name).get('ProvisionedConcurrencyConfig')
+    if provisioned:
+        assert config == {'ProvisionedConcurrentExecutions': provisioned}
+    else:
+        assert config is None
+
+
+def test_scheduled_scaling(template):
+    template.resource_count_is('AWS::ApplicationAutoScaling::ScalableTarget', 1)
+    template.has_resource_properties('AWS::ApplicationAutoScaling::ScalableTarget', {
+        'ScalableDimension': 'lambda:function:ProvisionedConcurrency',
+        'MinCapacity': 1,
+        'MaxCapacity': 10,
+        'ScheduledActions': Match.array_with([
+            Match.object_like({
+                'ScheduledActionName': 'SaturdayOpenDayStart',
+                'Schedule': 'cron(0 13 ? * SAT *)',
+                'ScalableTargetAction': {'MinCapacity': 5, 'MaxCapacity': 10},
+            }),
+            Match.object_like({
+                'ScheduledActionName': 'SaturdayOpenDayEnd',
+                'Schedule': 'cron(0 21 ? * SAT *)',
+                'ScalableTargetAction': {'MinCapacity': 1, 'MaxCapacity': 1},
+            }),
+        ]),
+    })
+
+
+def test_function_config_from_command_line():
+    # -c functionConfig='{...}' arrives as a string and replaces cdk.json's
+    template = synth(functionConfig=json.dumps({
+        'defaults': {'architecture': 'x86_64'},
+        'ListEnquiriesLambda': {'memorySize': 1024},
+    }))
+    assert function(template, 'ListEnquiriesLambda')['MemorySize'] == 1024
+    for name in FUNCTIONS:
+        assert function(template, name)['Architectures'] == ['x86_64']
+    assert 'ProvisionedConcurrencyConfig' not in alias(template, 'SubmitEnquiryLambda')
+    template.resource_count_is('AWS::ApplicationAutoScaling::ScalableTarget', 0)
+
+
+@pytest.mark.parametrize('config', [
+    {'defaults': {'architecture': 'ppc64le'}},
+    {'VerifyOtpLambda': {'snapStart': True, 'provisionedConcurrency': 1}},
+])
+def test_invalid_function_config(config):
+    with pytest.raises(ValueError):
+        synth(functionConfig=config)
+
+
+def layer(template):
+    (logical_id,) = template.find_resources('AWS::Lambda::LayerVersion')
+    return {'Ref': logical_id}
+
+
+def test_functions_share_one_code_asset(template):
+    codes = {json.dumps(function(template, name)['Code'], sort_keys=True) for name in FUNCTIONS}
+    assert len(codes) == 1
+
+
+def test_sheets_layer_only_on_sheet_sync(template):
+    for name in FUNCTIONS:
+        expected = [layer(template)] if name == 'SheetSyncLambda' else []
+        assert function(template, name).get('Layers', []) == expected
+    assert 'SHEET_ID' not in function(template, 'SubmitEnquiryLambda')['Environment']['Variables']
+    template.has_resource_properties('AWS::Lambda::LayerVersion', {
+        'CompatibleArchitectures': ['arm64'],
+        'CompatibleRuntimes': ['python3.12'],
+    })
+
+
+def test_inline_sheets_append_adds_layer_to_submit():
+    template = synth(submitSheetsDeadlineMs=1500)
+    for name in FUNCTIONS:
+        expected = [layer(template)] if name in ('SheetSyncLambda', 'SubmitEnquiryLambda') else []
+        assert function(template, name).get('Layers', []) == expected
+    variables = function(template, 'SubmitEnquiryLambda')['Environment']['Variables']
+    assert variables['SUBMIT_SHEETS_DEADLINE_MS'] == '1500'
+    assert variables['SHEET_ID'] == os.environ['SHEET_ID']
+
+
+def test_inline_sheets_append_needs_sheet_sync_architecture():
+    config = CONTEXT['functionConfig']
+    config = {**config, 'SubmitEnquiryLambda': {**config['SubmitEnquiryLambda'], 'architecture': 'x86_64'}}
+    with pytest.raises(ValueError):
+        synth(submitSheetsDeadlineMs=1500, functionConfig=config)
+
+
+def test_sheet_sync_receives_new_and_released_enquiries(template):
+    (mapping,) = template.find_resources('AWS::Lambda::EventSourceMapping').values()
+    patterns = [json.loads(f['Pattern']) for f in mapping['Properties']['FilterCriteria']['Filters']]
+    keys = {'PK': {'S': [{'prefix': 'ENQUIRY#'}]}}
+    assert patterns == [
+        {'eventName': ['INSERT'], 'dynamodb': {'Keys': keys}},
+        {'eventName': ['MODIFY'], 'dynamodb': {'Keys': keys, 'NewImage': {'sheetRetry': {'BOOL': [{'exists': True}]}}}},
+    ]
+
+
+@pytest.mark.parametrize('model_name, body_schema', [
+    ('RequestOtpBody', schema.REQUEST_OTP),
+    ('VerifyOtpBody', schema.VERIFY_OTP),
+    ('EnquiryBody', schema.ENQUIRY),
+])
+def test_request_models_are_validated(template, model_name, body_schema):
+    models = template.find_resources('AWS::ApiGateway::Model', {'Properties': {'Name': model_name}})
+    (model_id,) = models
+    model = models[model_id]['Properties']
+    expected = schema.gateway_model(body_schema)
+    assert model['ContentType'] == 'application/json'
+    assert model['Schema']['$schema'] == 'http://json-schema.org/draft-04/schema#'
+    assert model['Schema']['required'] == expected['required']
+    assert set(model['Schema']['properties']) == set(expected['properties'])
+
+    (validator_id,) = template.find_resources('AWS::ApiGateway::RequestValidator', {
+        'Properties': {'Name': 'BodyValidator', 'ValidateRequestBody': True},
+    })
+    (method,) = template.find_resources('AWS::ApiGateway::Method', {
+        'Properties': {'RequestModels': {'application/json': {'Ref': model_id}}},
+    }).values()
+    assert method['Properties']['HttpMethod'] == 'POST'
+    assert method['Properties']['ApiKeyRequired'] is True
+    assert method['Properties']['RequestValidatorId'] == {'Ref': validator_id}
+
+
+def test_only_json_bodies_are_validated(template):
+    methods = template.find_resources('AWS::ApiGateway::Method').values()
+    validated = [method for method in methods if 'RequestValidatorId' in method['Properties']]
+    assert len(validated) == 3
+
+
+@pytest.mark.parametrize('response_type', ['BAD_REQUEST_BODY', 'DEFAULT_4XX', 'DEFAULT_5XX'])
+def test_gateway_responses_have_cors_and_error_body(template, response_type):
+    (response,) = template.find_resources('AWS::ApiGateway::GatewayResponse', {
+        'Properties': {'ResponseType': response_type},
+    }).values()
+    props = response['Properties']
+    assert props['ResponseParameters'] == {'gatewayresponse.header.Access-Control-Allow-Origin': "'*'"}
+    assert props['ResponseTemplates']['application/json'].startswith('{"error": ')
+
+
+def test_bad_request_body_unescapes_single_quotes(template):
+    (response,) = template.find_resources('AWS::ApiGateway::GatewayResponse', {
+        'Properties': {'ResponseType': 'BAD_REQUEST_BODY'},
+    }).values()
+    body = response['Properties']['ResponseTemplates']['application/json']
+    assert r'''$util.escapeJavaScript($context.error.validationErrorString).replaceAll("\\'", "'")''' in body
+
+
+def test_bad_request_body_lists_fields_like_the_functions(template):
+    (response,) = template.find_resources('AWS::ApiGateway::GatewayResponse', {
+        'Properties': {'ResponseType': 'BAD_REQUEST_BODY'},
+    }).values()
+    body = response['Properties']['ResponseTemplates']['application/json']
+    # What API Gateway renders for a body missing parentName
+    rendered = body.replace(
+        r'''$util.escapeJavaScript($context.error.validationErrorString).replaceAll("\\'", "'")''',
+        r'object has missing required properties ([\"parentName\"])')
+    assert json.loads(rendered) == {
+        'error': 'Invalid request body',
+        'fields': {'body': 'object has missing required properties (["parentName"])'},
+    }
+
+
+def test_cors_preflight(template):
+    preflights = template.find_resources('AWS::ApiGateway::Method', {'Properties': {'HttpMethod': 'OPTIONS'}})
+    # The root and every resource: request, request/{requestId}, verify,
+    # submit, submit/batch, enquiries and config
+    assert len(preflights) == 8
+    for method in preflights.values():
+        integration = method['Properties']['Integration']
+        assert integration['Type'] == 'MOCK'
+        headers = integration['IntegrationResponses'][0]['ResponseParameters']
+        assert 'Idempotency-Key' in headers['method.response.header.Access-Control-Allow-Headers']
+        assert headers['method.response.header.Access-Control-Max-Age'] == "'3600'"
+
+
+def test_config_cache_off_by_default(template):
+    (stage,) = template.find_resources('AWS::ApiGateway::Stage').values()
+    props = stage['Properties']
+    assert props['StageName'] == 'v1'
+    assert not props.get('CacheClusterEnabled')
+    assert not any(setting.get('CachingEnabled') for setting in props.get('MethodSettings', []))
+
+
+def test_config_cache():
+    template = synth(configCacheTtlSeconds=300)
+    template.has_resource_properties('AWS::ApiGateway::Stage', {
+        'StageName': 'v1',
+        'CacheClusterEnabled': True,
+        'CacheClusterSize': '0.5',
+        'MethodSettings': Match.array_with([
+            Match.object_like({
+                'ResourcePath': '/~1config',
+                'HttpMethod': 'GET',
+                'CachingEnabled': True,
+                'CacheTtlInSeconds': 300,
+            }),
+        ]),
+    })
+
+
+def enquiry_indexes(template):
+    (table,) = template.find_resources('AWS::DynamoDB::Table', {'Properties': {'TableName': 'EnquiryTable'}}).values()
+    return [index['IndexName'] for index in table['Properties'].get('GlobalSecondaryIndexes', [])]
+
+
+def test_enquiry_indexes_are_staged(template):
+    # One GSI per deploy: cdk.json holds the current stage
+    count = CONTEXT['enquiryIndexes']
+    assert enquiry_indexes(template) == ['StatusIndex', 'PhoneIndex', 'CourseIndex'][:count]
+    variables = function(template, 'ListEnquiriesLambda')['Environment']['Variables']
+    assert variables['ENQUIRY_INDEXES'] == ','.join(enquiry_indexes(template))
+
+
+def test_all_enquiry_indexes():
+    template = synth(enquiryIndexes=3)
+    assert enquiry_indexes(template) == ['StatusIndex', 'PhoneIndex', 'CourseIndex']
+    variables = function(template, 'ListEnquiriesLambda')['Environment']['Variables']
+    assert variables['ENQUIRY_INDEXES'] == 'StatusIndex,PhoneIndex,CourseIndex'
+
+
+def test_invalid_enquiry_index_count():
+    with pytest.raises(ValueError):
+        synth(enquiryIndexes=4)
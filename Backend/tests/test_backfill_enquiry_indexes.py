@@ -0,0 +1,73 @@
+import json
+
+import pytest
+
+import backfill_enquiry_indexes
+import list_enquiries_handler
+
+TABLE = 'EnquiryTable'
+
+
+def old_enquiry(n, children=None, contact_number='123-456-7890', **attributes):
+    """An item as /submit stored it before PhoneIndex and CourseIndex."""
+    children = children or [
+        {'M': {'name': {'S': ''}, 'age': {'S': ''}, 'selectedCourse': {'S': ''}}},
+        {'M': {'name': {'S': 'John'}, 'age': {'S': '8'}, 'selectedCourse': {'S': 'ucmas'}}},
+    ]
+    return {
+        'PK': {'S': f'ENQUIRY#{n}'},
+        'enquiryId': {'S': str(n)},
+        'children': {'L': children},
+        'contactNumber': {'S': contact_number},
+        'submittedAt': {'S': f'2025-10-23T10:00:0{n}+00:00'},
+        'status': {'S': 'pending'},
+        **attributes,
+    }
+
+
+def stored(dynamodb, n):
+    return dynamodb.get_item(TableName=TABLE, Key={'PK': {'S': f'ENQUIRY#{n}'}})['Item']
+
+
+def list_enquiries(**params):
+    response = list_enquiries_handler.lambda_handler({'httpMethod': 'GET', 'queryStringParameters': params}, None)
+    return response['statusCode'], json.loads(response['body'])
+
+
+def test_backfill_sets_phone_and_primary_course(dynamodb):
+    dynamodb.put_item(TableName=TABLE, Item=old_enquiry(1))
+    dynamodb.put_item(TableName=TABLE, Item=old_enquiry(2, phone={'S': '+15550001111'}, course={'S': 'obotz'}))
+    dynamodb.put_item(TableName=TABLE, Item=old_enquiry(3, children=[{'M': {'name': {'S': 'Incomplete'}}}],
+                                                        contact_number='n/a'))
+    assert list_enquiries(phone='123-456-7890')[1]['items'] == []
+
+    stats = backfill_enquiry_indexes.backfill(dynamodb, TABLE, segments=2, page_size=1)
+
+    assert stats == {'scanned': 2, 'updated': 1, 'skipped': 1}
+    assert stored(dynamodb, 1)['phone'] == {'S': '+11234567890'}
+    assert stored(dynamodb, 1)['course'] == {'S': 'ucmas'}
+    assert stored(dynamodb, 2)['course'] == {'S': 'obotz'}
+    assert 'phone' not in stored(dynamodb, 3)
+    assert [item['enquiryId'] for item in list_enquiries(phone='123-456-7890')[1]['items']] == ['1']
+    assert [item['enquiryId'] for item in list_enquiries(course='ucmas')[1]['items']] == ['1']
+
+
+def test_backfill_dry_run_writes_nothing(dynamodb):
+    dynamodb.put_item(TableName=TABLE, Item=old_enquiry(1))
+
+    stats = backfill_enquiry_indexes.backfill(dynamodb, TABLE, dry_run=True)
+
+    assert stats['updated'] == 1
+    assert stored(dynamodb, 1) == old_enquiry(1)
+
+
+@pytest.mark.parametrize('params, message', [
+    ({'phone': '123-456-7890'}, 'Listing by phone is not available yet'),
+    ({'course': 'ucmas'}, 'Listing by course is not available yet'),
+])
+def test_listing_needs_a_deployed_index(dynamodb, monkeypatch, params, message):
+    monkeypatch.setattr(list_enquiries_handler, 'ENQUIRY_INDEXES', ['StatusIndex'])
+    dynamodb.put_item(TableName=TABLE, Item=old_enquiry(1))
+
+    assert list_enquiries(**params) == (400, {'error': message})
+    assert [item['enquiryId'] for item in list_enquiries()[1]['items']] == ['1']
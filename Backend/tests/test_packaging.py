@@ -0,0 +1,56 @@
+"""
+Builds the Lambda packages with the stack's build commands (see
+stacks/packaging.py) and checks them against the size budgets. The layer
+build installs requirements.txt, so it is skipped without a package index.
+"""
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from stacks import packaging
+
+BACKEND = Path(__file__).resolve().parent.parent
+
+
+@pytest.fixture(scope='module')
+def function_package(tmp_path_factory):
+    output = tmp_path_factory.mktemp('function') / 'asset'
+    packaging.build(BACKEND / 'lambda_functions', packaging.function_command, output)
+    return output
+
+
+@pytest.fixture(scope='module')
+def layer_package(tmp_path_factory):
+    output = tmp_path_factory.mktemp('layer') / 'asset'
+    try:
+        packaging.build(BACKEND / 'layers' / 'sheets', packaging.layer_command, output)
+    except subprocess.CalledProcessError:
+        pytest.skip('the layer build needs pip and the package index')
+    return output
+
+
+def test_function_package_size(function_package):
+    zipped, _, _ = packaging.sizes(function_package)
+    assert zipped <= packaging.MAX_FUNCTION_KB * 1024
+
+
+def test_function_package_is_handlers_only(function_package):
+    sources = sorted(path.name for path in (BACKEND / 'lambda_functions').glob('*.py'))
+    assert sorted(path.name for path in function_package.glob('*.py')) == sources
+    assert {path.parent.name for path in function_package.rglob('*') if path.is_file()} <= {'asset', '__pycache__'}
+    assert len(list(function_package.glob('__pycache__/*.pyc'))) == len(sources)
+
+
+def test_layer_package_size(layer_package):
+    zipped, _, _ = packaging.sizes(layer_package)
+    assert zipped <= packaging.MAX_LAYER_MB * 1024 * 1024
+
+
+def test_layer_package_is_stripped(layer_package):
+    site = layer_package / 'python'
+    assert (site / 'gspread').is_dir()
+    assert not list(site.glob('*.dist-info'))
+    assert not [path for path in site.rglob('*') if path.is_dir() and path.name in ('tests', 'test')]
+    assert not list(site.rglob('*.pyi'))
+    assert list(site.glob('gspread/__pycache__/*.pyc'))
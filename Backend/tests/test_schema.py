@@ -0,0 +1,90 @@
+import pytest
+
+import core
+import enquiries
+import schema
+from core import ApiError
+
+ENQUIRY = {
+    'children': [
+        {'id': '1', 'name': ' John Doe ', 'age': '8', 'selectedCourse': 'ucmas'},
+        {'id': '2', 'name': '', 'age': '', 'selectedCourse': ''},
+    ],
+    'parentName': 'Jane Doe',
+    'contactNumber': '123-456-7890',
+    'consent': True,
+}
+
+
+def errors(body):
+    with pytest.raises(ApiError) as error:
+        schema.validate_enquiry(body)
+    assert error.value.status_code == 400
+    return error.value.details
+
+
+def test_valid_enquiry_is_cleaned():
+    cleaned = enquiries.validate({**ENQUIRY, 'email': None})
+
+    assert cleaned['children'][0] == {'id': '1', 'name': 'John Doe', 'age': '8', 'selectedCourse': 'ucmas'}
+    assert cleaned['email'] == ''
+    assert cleaned['course'] == 'ucmas'
+
+
+def test_undeclared_properties_are_dropped():
+    children = [{**ENQUIRY['children'][0], 'notes': 'x' * 10000, 'extra': {'nested': [1, 2]}}]
+
+    cleaned = schema.validate_enquiry({**ENQUIRY, 'children': children, 'admin': True})
+
+    assert set(cleaned['children'][0]) == {'id', 'name', 'age', 'selectedCourse'}
+    assert 'admin' not in cleaned
+
+
+def test_every_error_is_reported_with_its_path():
+    children = [ENQUIRY['children'][0], {'name': 7, 'age': 'x1', 'selectedCourse': 'chess'}]
+
+    assert errors({'children': children, 'contactNumber': 'call me', 'consent': False}) == {
+        'children[1].name': 'Child name must be a string',
+        'children[1].age': 'Child age must be a number',
+        'children[1].selectedCourse': 'Course must be one of: imaths, ucmas, obotz',
+        'parentName': 'Parent name is required',
+        'contactNumber': 'Contact number is not a valid phone number',
+        'consent': 'Consent is required',
+    }
+
+
+@pytest.mark.parametrize('body, expected', [
+    ([], {'body': 'body must be an object'}),
+    ({**ENQUIRY, 'children': []}, {'children': 'Between 1 and 5 children are required'}),
+    ({**ENQUIRY, 'children': ['John']}, {'children[0]': 'children must be an object'}),
+    ({**ENQUIRY, 'consent': 'yes'}, {'consent': 'Consent must be true or false'}),
+])
+def test_type_errors(body, expected):
+    assert errors(body) == expected
+
+
+@pytest.mark.parametrize('text', [
+    '{"children": [{"age": NaN}]}',
+    '{"children": [{"age": -Infinity}]}',
+    '{"consent": 1e400}',
+])
+def test_non_finite_numbers_are_rejected(text):
+    with pytest.raises(ApiError) as error:
+        core.parse_body({'body': text})
+    assert error.value.status_code == 400
+
+
+def test_numbers_still_parse():
+    assert core.parse_body({'body': b'{"a": 1.5, "b": 2}'}) == {'a': 1.5, 'b': 2}
+
+
+@pytest.mark.parametrize('age, valid', [
+    ('8', True), ('4.5', True), ('4,5', True), ('4.', True),
+    ('x1', False), ('.5', False), ('123', False), ('4.5.1', False),
+])
+def test_child_age(age, valid):
+    body = {**ENQUIRY, 'children': [{**ENQUIRY['children'][0], 'age': age}]}
+    if valid:
+        assert schema.validate_enquiry(body)['children'][0]['age'] == age
+    else:
+        assert errors(body) == {'children[0].age': 'Child age must be a number'}
@@ -0,0 +1,152 @@
+"""
+The sheet round trip: rows appended by the EnquiryTable stream
+(sheet_sync_handler) or by /submit itself (SUBMIT_SHEETS_DEADLINE_MS),
+against the fake Sheets client from benchmarks/fakes.py.
+"""
+import threading
+import time
+
+import pytest
+
+import sheet_sync_handler
+import sheets
+import submit_enquiry_handler
+import tokens
+from benchmarks.fakes import FakeGspreadClient, stream_record
+
+PHONE = '+11234567890'
+
+
+@pytest.fixture
+def sheet():
+    client = FakeGspreadClient()
+    sheets.set_client(client)
+    return client.worksheet
+
+
+@pytest.fixture
+def inline(monkeypatch):
+    monkeypatch.setattr(submit_enquiry_handler, 'SHEETS_DEADLINE_MS', 1000)
+
+
+@pytest.fixture
+def submit(call):
+    token = tokens.issue_token(PHONE)
+
+    def submit(name='John Doe', **fields):
+        status, body = call(submit_enquiry_handler, {
+            'children': [{'id': '1', 'name': name, 'age': '8', 'selectedCourse': 'ucmas'}],
+            'parentName': 'Jane Doe',
+            'contactNumber': '123-456-7890',
+            'consent': True,
+            'verificationToken': token,
+            **fields,
+        })
+        assert status == 200
+        return body['enquiryId']
+    return submit
+
+
+def stored(dynamodb, enquiry_id):
+    return dynamodb.get_item(TableName=submit_enquiry_handler.ENQUIRY_TABLE,
+                             Key={'PK': {'S': f'ENQUIRY#{enquiry_id}'}})['Item']
+
+
+def stream(*records):
+    return sheet_sync_handler.lambda_handler({'Records': list(records)}, None)
+
+
+def sheet_ids(sheet):
+    return [row[0] for row in sheet.rows]
+
+
+def test_new_enquiry_is_appended_once(dynamodb, sheet, submit):
+    enquiry_id = submit()
+    record = stream_record(stored(dynamodb, enquiry_id))
+
+    assert stream(record) == {'synced': 1}
+    # A redelivered batch
+    assert stream(record) == {'synced': 0}
+    assert sheet_ids(sheet) == [enquiry_id]
+
+
+def test_other_records_are_ignored(dynamodb, sheet, submit):
+    item = stored(dynamodb, submit())
+    records = [
+        stream_record(item, 'MODIFY'),
+        stream_record(item, 'REMOVE'),
+        stream_record({**item, 'PK': {'S': 'DEDUP#key'}}),
+    ]
+
+    assert sheet_sync_handler.extract_enquiries(records) == []
+
+
+def test_inline_append_skips_the_stream(dynamodb, sheet, inline, submit):
+    enquiry_id = submit()
+    item = stored(dynamodb, enquiry_id)
+
+    assert sheet_ids(sheet) == [enquiry_id]
+    assert item['sheetWriter'] == {'S': 'submit'}
+    assert stream(stream_record(item)) == {'synced': 0}
+    assert sheet_ids(sheet) == [enquiry_id]
+
+
+def test_failed_inline_append_is_released_to_the_stream(dynamodb, sheet, inline, submit, monkeypatch):
+    def fail(rows, **kwargs):
+        raise RuntimeError('quota exceeded')
+    monkeypatch.setattr(sheet, 'append_rows', fail)
+    enquiry_id = submit()
+    monkeypatch.delattr(sheet, 'append_rows')
+
+    released = stored(dynamodb, enquiry_id)
+    assert sheet.rows == []
+    assert 'sheetWriter' not in released
+    assert released['sheetRetry'] == {'BOOL': True}
+
+    assert stream(stream_record(released, 'MODIFY')) == {'synced': 1}
+    assert sheet_ids(sheet) == [enquiry_id]
+    cleared = stored(dynamodb, enquiry_id)
+    assert 'sheetRetry' not in cleared
+    # The MODIFY that cleared the flag
+    assert stream(stream_record(cleared, 'MODIFY')) == {'synced': 0}
+
+
+def test_late_inline_append_is_not_duplicated(dynamodb, sheet, submit, monkeypatch):
+    monkeypatch.setattr(submit_enquiry_handler, 'SHEETS_DEADLINE_MS', 50)
+    # The stream worker has read the sheet's IDs before the late append
+    earlier_id = submit()
+    stream(stream_record(stored(dynamodb, earlier_id)))
+
+    unblocked = threading.Event()
+    append_rows = sheet.append_rows
+
+    def slow_append(rows, **kwargs):
+        unblocked.wait(5)
+        return append_rows(rows, **kwargs)
+    monkeypatch.setattr(sheet, 'append_rows', slow_append)
+    try:
+        enquiry_id = submit('Jack Doe')
+        released = stored(dynamodb, enquiry_id)
+        assert released['sheetRetry'] == {'BOOL': True}
+    finally:
+        unblocked.set()
+    for _ in range(100):
+        if enquiry_id in sheet_ids(sheet):
+            break
+        time.sleep(0.01)
+
+    assert stream(stream_record(released, 'MODIFY')) == {'synced': 0}
+    assert sheet_ids(sheet) == [earlier_id, enquiry_id]
+    assert 'sheetRetry' not in stored(dynamodb, enquiry_id)
+
+
+@pytest.mark.parametrize('second', [
+    {'name': ' john  doe '},
+    {'idempotencyKey': 'retry-key-1'},
+], ids=['merged-repeat', 'replay'])
+def test_unstored_submission_leaves_no_row(dynamodb, sheet, inline, submit, second):
+    enquiry_id = submit(idempotencyKey='retry-key-1')
+
+    assert submit(**second) == enquiry_id
+    assert sheet_ids(sheet) == [enquiry_id]
+    assert sheet.calls.get('delete_rows') == 1
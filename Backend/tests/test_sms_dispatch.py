@@ -0,0 +1,60 @@
+import json
+import time
+
+import pytest
+
+import core
+import sms_dispatch_handler
+
+REQUEST_ID = '0b7e4c52-3f1d-4c8a-9e2b-5a6f7d8c9e0f'
+
+
+class FakeSns:
+    def __init__(self):
+        self.published = []
+
+    def publish(self, **kwargs):
+        self.published.append(kwargs)
+        return {'MessageId': f'message-{len(self.published)}'}
+
+
+@pytest.fixture
+def sns():
+    fake = FakeSns()
+    core.set_client('sns', fake)
+    return fake
+
+
+def dispatch(receive_count=1):
+    record = {
+        'messageId': 'sqs-1',
+        'attributes': {'ApproximateReceiveCount': str(receive_count)},
+        'body': json.dumps({'requestId': REQUEST_ID, 'phone': '+11234567890', 'code': '1234',
+                            'expiresAt': int(time.time()) + 300}),
+    }
+    return sms_dispatch_handler.lambda_handler({'Records': [record]}, None)
+
+
+def otp_item(dynamodb):
+    return dynamodb.get_item(TableName=sms_dispatch_handler.OTP_TABLE,
+                             Key={'PK': {'S': f'OTP#{REQUEST_ID}'}})['Item']
+
+
+def test_sent_status_is_recorded(dynamodb, sns):
+    dynamodb.put_item(TableName=sms_dispatch_handler.OTP_TABLE, Item={'PK': {'S': f'OTP#{REQUEST_ID}'}})
+
+    assert dispatch() == {'batchItemFailures': []}
+    assert len(sns.published) == 1
+    item = otp_item(dynamodb)
+    assert item['deliveryStatus'] == {'S': 'sent'}
+    assert item['deliveryMessageId'] == {'S': 'message-1'}
+    assert item['deliveryAttempts'] == {'N': '1'}
+
+
+def test_status_write_failure_after_send_is_not_redelivered(dynamodb, sns, monkeypatch):
+    def fail(**kwargs):
+        raise RuntimeError('throttled')
+    monkeypatch.setattr(dynamodb, 'update_item', fail)
+
+    assert dispatch() == {'batchItemFailures': []}
+    assert len(sns.published) == 1
@@ -0,0 +1,247 @@
+import time
+
+import pytest
+
+import storage
+
+TABLE = 'EnquiryTable'
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def engine(request):
+    return storage.create(request.param)
+
+
+def enquiry(n, status='pending', submitted_at=None, **attributes):
+    return {
+        'PK': {'S': f'ENQUIRY#{n:04d}'},
+        'status': {'S': status},
+        'submittedAt': {'S': submitted_at or f'2025-10-23T10:{n // 60:02d}:{n % 60:02d}+00:00'},
+        **attributes,
+    }
+
+
+def key(n):
+    return {'PK': {'S': f'ENQUIRY#{n:04d}'}}
+
+
+def scan_all(engine, **kwargs):
+    """Every item from a paginated scan, and the number of pages."""
+    items, pages, start = [], 0, None
+    while True:
+        response = engine.scan(TableName=TABLE, **kwargs, **({'ExclusiveStartKey': start} if start else {}))
+        items += response['Items']
+        pages += 1
+        start = response.get('LastEvaluatedKey')
+        if not start:
+            return items, pages
+
+
+def test_put_get_delete(engine):
+    engine.put_item(TableName=TABLE, Item=enquiry(1))
+
+    assert engine.get_item(TableName=TABLE, Key=key(1))['Item'] == enquiry(1)
+    assert engine.delete_item(TableName=TABLE, Key=key(1), ReturnValues='ALL_OLD')['Attributes'] == enquiry(1)
+    assert engine.get_item(TableName=TABLE, Key=key(1)) == {}
+
+
+def test_conditional_put_returns_old_item(engine):
+    engine.put_item(TableName=TABLE, Item=enquiry(1))
+
+    with pytest.raises(storage.ClientError) as error:
+        engine.put_item(TableName=TABLE, Item=enquiry(1, status='done'),
+                        ConditionExpression='attribute_not_exists(PK)',
+                        ReturnValuesOnConditionCheckFailure='ALL_OLD')
+
+    assert error.value.response['Error']['Code'] == 'ConditionalCheckFailedException'
+    assert error.value.response['Item'] == enquiry(1)
+    assert engine.get_item(TableName=TABLE, Key=key(1))['Item']['status'] == {'S': 'pending'}
+
+
+def test_conditional_delete(engine):
+    engine.put_item(TableName=TABLE, Item=enquiry(1, otp={'S': 'abc'}))
+
+    with pytest.raises(storage.ClientError):
+        engine.delete_item(TableName=TABLE, Key=key(1), ConditionExpression='otp = :otp',
+                           ExpressionAttributeValues={':otp': {'S': 'xyz'}})
+    engine.delete_item(TableName=TABLE, Key=key(1), ConditionExpression='otp = :otp',
+                       ExpressionAttributeValues={':otp': {'S': 'abc'}})
+
+    assert engine.get_item(TableName=TABLE, Key=key(1)) == {}
+
+
+def test_update_set_add_remove(engine):
+    engine.put_item(TableName=TABLE, Item=enquiry(1, flag={'BOOL': True}))
+
+    response = engine.update_item(
+        TableName=TABLE, Key=key(1),
+        UpdateExpression='SET #status = :status, retries = if_not_exists(retries, :zero) + :one '
+                         'ADD attempts :one REMOVE flag',
+        ExpressionAttributeNames={'#status': 'status'},
+        ExpressionAttributeValues={':status': {'S': 'done'}, ':zero': {'N': '0'}, ':one': {'N': '1'}},
+        ConditionExpression='attribute_exists(PK)',
+        ReturnValues='UPDATED_NEW',
+    )
+
+    assert response['Attributes'] == {'status': {'S': 'done'}, 'retries': {'N': '1'}, 'attempts': {'N': '1'}}
+    assert 'flag' not in engine.get_item(TableName=TABLE, Key=key(1))['Item']
+    with pytest.raises(storage.ClientError):
+        engine.update_item(TableName=TABLE, Key=key(2), UpdateExpression='ADD attempts :one',
+                           ExpressionAttributeValues={':one': {'N': '1'}},
+                           ConditionExpression='attribute_exists(PK)')
+
+
+def test_query_index_in_sort_order(engine):
+    for n in range(10):
+        engine.put_item(TableName=TABLE, Item=enquiry(n, status='done' if n % 2 else 'pending'))
+
+    response = engine.query(TableName=TABLE, IndexName='StatusIndex',
+                            KeyConditionExpression='#status = :status',
+                            ExpressionAttributeNames={'#status': 'status'},
+                            ExpressionAttributeValues={':status': {'S': 'pending'}},
+                            ScanIndexForward=False)
+
+    assert [item['PK']['S'] for item in response['Items']] == [f'ENQUIRY#{n:04d}' for n in (8, 6, 4, 2, 0)]
+
+
+def test_query_prefix_and_pages(engine):
+    for n in range(6):
+        engine.put_item(TableName=TABLE, Item=enquiry(n, submitted_at=f'2025-10-2{n % 2 + 3}T10:00:0{n}'))
+    params = {
+        'TableName': TABLE, 'IndexName': 'StatusIndex', 'Limit': 2,
+        'KeyConditionExpression': '#status = :status AND begins_with(submittedAt, :day)',
+        'ExpressionAttributeNames': {'#status': 'status'},
+        'ExpressionAttributeValues': {':status': {'S': 'pending'}, ':day': {'S': '2025-10-23'}},
+    }
+
+    first = engine.query(**params)
+    second = engine.query(**params, ExclusiveStartKey=first['LastEvaluatedKey'])
+
+    assert [item['PK']['S'] for item in first['Items'] + second['Items']] == \
+        ['ENQUIRY#0000', 'ENQUIRY#0002', 'ENQUIRY#0004']
+    assert 'LastEvaluatedKey' not in second
+
+
+def test_query_needs_partition_key(engine):
+    with pytest.raises(storage.ClientError):
+        engine.query(TableName=TABLE, IndexName='StatusIndex', KeyConditionExpression='begins_with(submittedAt, :d)',
+                     ExpressionAttributeValues={':d': {'S': '2025'}})
+
+
+def test_scan_pages_in_key_order(engine):
+    for n in reversed(range(25)):
+        engine.put_item(TableName=TABLE, Item=enquiry(n))
+
+    items, pages = scan_all(engine, Limit=10)
+
+    assert [item['PK']['S'] for item in items] == [f'ENQUIRY#{n:04d}' for n in range(25)]
+    assert pages == 3
+
+
+def test_scan_sees_writes_between_pages(engine):
+    for n in range(0, 20, 2):
+        engine.put_item(TableName=TABLE, Item=enquiry(n))
+
+    first = engine.scan(TableName=TABLE, Limit=4)
+    # Keys before and after the cursor, a deletion and a re-insertion
+    engine.put_item(TableName=TABLE, Item=enquiry(1))
+    engine.put_item(TableName=TABLE, Item=enquiry(15))
+    engine.delete_item(TableName=TABLE, Key=key(10))
+    engine.delete_item(TableName=TABLE, Key=key(12))
+    engine.put_item(TableName=TABLE, Item=enquiry(12))
+    rest, _ = scan_all(engine, ExclusiveStartKey=first['LastEvaluatedKey'])
+
+    assert [item['PK']['S'] for item in first['Items']] == [f'ENQUIRY#{n:04d}' for n in (0, 2, 4, 6)]
+    assert [item['PK']['S'] for item in rest] == [f'ENQUIRY#{n:04d}' for n in (8, 12, 14, 15, 16, 18)]
+
+
+def test_scan_filter_after_limit(engine):
+    for n in range(10):
+        engine.put_item(TableName=TABLE, Item=enquiry(n, status='done' if n < 5 else 'pending'))
+
+    response = engine.scan(TableName=TABLE, Limit=5, FilterExpression='#status = :status',
+                           ExpressionAttributeNames={'#status': 'status'},
+                           ExpressionAttributeValues={':status': {'S': 'pending'}})
+
+    # Like DynamoDB, the filter runs on the page Limit read
+    assert response['Items'] == []
+    assert 'LastEvaluatedKey' in response
+
+
+def test_scan_segments_cover_the_table_once(engine):
+    for n in range(50):
+        engine.put_item(TableName=TABLE, Item=enquiry(n))
+
+    keys = []
+    for segment in range(4):
+        items, _ = scan_all(engine, Segment=segment, TotalSegments=4, Limit=7)
+        keys += [item['PK']['S'] for item in items]
+
+    assert sorted(keys) == [f'ENQUIRY#{n:04d}' for n in range(50)]
+
+
+def test_batch_write(engine):
+    engine.put_item(TableName=TABLE, Item=enquiry(0))
+
+    response = engine.batch_write_item(RequestItems={TABLE: [
+        {'PutRequest': {'Item': enquiry(1)}},
+        {'PutRequest': {'Item': enquiry(2)}},
+        {'DeleteRequest': {'Key': key(0)}},
+    ]})
+
+    assert response == {'UnprocessedItems': {}}
+    assert [item['PK']['S'] for item in scan_all(engine)[0]] == ['ENQUIRY#0001', 'ENQUIRY#0002']
+
+
+def test_transaction_is_all_or_nothing(engine):
+    engine.put_item(TableName=TABLE, Item=enquiry(1))
+    transaction = [
+        {'Put': {'TableName': TABLE, 'Item': enquiry(2)}},
+        {'Put': {'TableName': TABLE, 'Item': enquiry(1, status='done'),
+                 'ConditionExpression': 'attribute_not_exists(PK)',
+                 'ReturnValuesOnConditionCheckFailure': 'ALL_OLD'}},
+    ]
+
+    with pytest.raises(storage.ClientError) as error:
+        engine.transact_write_items(TransactItems=transaction)
+
+    assert error.value.response['Error']['Code'] == 'TransactionCanceledException'
+    assert error.value.response['CancellationReasons'] == [
+        {'Code': 'None'},
+        {'Code': 'ConditionalCheckFailed', 'Message': 'The conditional request failed', 'Item': enquiry(1)},
+    ]
+    assert engine.get_item(TableName=TABLE, Key=key(2)) == {}
+
+
+def test_transaction_put_update_delete(engine):
+    engine.put_item(TableName=TABLE, Item=enquiry(1))
+    engine.put_item(TableName=TABLE, Item=enquiry(3))
+
+    engine.transact_write_items(TransactItems=[
+        {'Put': {'TableName': TABLE, 'Item': enquiry(2)}},
+        {'Update': {'TableName': TABLE, 'Key': key(1), 'UpdateExpression': 'ADD repeats :one',
+                    'ConditionExpression': 'attribute_exists(PK)',
+                    'ExpressionAttributeValues': {':one': {'N': '1'}}}},
+        {'Delete': {'TableName': TABLE, 'Key': key(3)}},
+    ])
+
+    assert engine.get_item(TableName=TABLE, Key=key(1))['Item']['repeats'] == {'N': '1'}
+    assert [item['PK']['S'] for item in scan_all(engine)[0]] == ['ENQUIRY#0001', 'ENQUIRY#0002']
+
+
+def test_expired_items_are_evicted(engine, monkeypatch):
+    monkeypatch.setattr(storage, 'EVICTION_INTERVAL_SECONDS', 0)
+    now = int(time.time())
+    engine.put_item(TableName=TABLE, Item=enquiry(1, TTL={'N': str(now - 1)}))
+    engine.put_item(TableName=TABLE, Item=enquiry(2, TTL={'N': str(now + 3600)}))
+    engine.put_item(TableName=TABLE, Item=enquiry(3))
+
+    assert [item['PK']['S'] for item in scan_all(engine)[0]] == ['ENQUIRY#0002', 'ENQUIRY#0003']
+    assert engine.query(TableName=TABLE, IndexName='StatusIndex', KeyConditionExpression='#s = :s',
+                        ExpressionAttributeNames={'#s': 'status'},
+                        ExpressionAttributeValues={':s': {'S': 'pending'}})['Count'] == 2
+
+
+def test_unknown_engine():
+    with pytest.raises(ValueError):
+        storage.create('postgres')
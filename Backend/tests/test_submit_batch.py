@@ -0,0 +1,81 @@
+import pytest
+
+import submit_batch_handler
+
+ENQUIRY = {
+    'children': [{'id': '1', 'name': 'John Doe', 'age': '8', 'selectedCourse': 'ucmas'}],
+    'parentName': 'Jane Doe',
+    'contactNumber': '123-456-7890',
+    'email': 'jane@example.com',
+    'consent': True,
+    'todaysDate': '10/23/2025',
+}
+
+
+def upload(call, *entries):
+    status, body = call(submit_batch_handler, {'enquiries': list(entries)})
+    assert status == 200
+    return body['results']
+
+
+def stored(dynamodb, enquiry_id):
+    return dynamodb.get_item(TableName=submit_batch_handler.ENQUIRY_TABLE,
+                             Key={'PK': {'S': f'ENQUIRY#{enquiry_id}'}}).get('Item')
+
+
+def test_upload_writes_valid_entries(dynamodb, call):
+    results = upload(call, {**ENQUIRY, 'clientId': 'tablet-1:1'}, {**ENQUIRY, 'parentName': ''}, ENQUIRY)
+
+    assert [result['success'] for result in results] == [True, False, True]
+    assert results[0]['enquiryId'] == submit_batch_handler.enquiry_id_for({'clientId': 'tablet-1:1'})
+    assert stored(dynamodb, results[0]['enquiryId'])['source'] == {'S': 'batch'}
+    assert stored(dynamodb, results[2]['enquiryId']) is not None
+
+
+def test_reupload_leaves_stored_enquiries(dynamodb, call):
+    first = upload(call, {**ENQUIRY, 'clientId': 'tablet-1:1'})[0]
+    submitted_at = stored(dynamodb, first['enquiryId'])['submittedAt']
+
+    results = upload(call, {**ENQUIRY, 'clientId': 'tablet-1:2'},
+                     {**ENQUIRY, 'clientId': 'tablet-1:1', 'parentName': 'Changed'})
+
+    assert results[0] == {'index': 0, 'success': True,
+                          'enquiryId': submit_batch_handler.enquiry_id_for({'clientId': 'tablet-1:2'})}
+    assert results[1] == {'index': 1, 'success': True, 'enquiryId': first['enquiryId'], 'alreadyPresent': True}
+    item = stored(dynamodb, first['enquiryId'])
+    assert item['parentName'] == {'S': 'Jane Doe'}
+    assert item['submittedAt'] == submitted_at
+    assert stored(dynamodb, results[0]['enquiryId']) is not None
+
+
+def test_existing_items_span_chunks(dynamodb, call, monkeypatch):
+    monkeypatch.setattr(submit_batch_handler, 'BATCH_WRITE_SIZE', 3)
+    upload(call, *[{**ENQUIRY, 'clientId': f'tablet-1:{n}'} for n in range(0, 8, 2)])
+
+    results = upload(call, *[{**ENQUIRY, 'clientId': f'tablet-1:{n}'} for n in range(8)])
+
+    assert all(result['success'] for result in results)
+    assert [bool(result.get('alreadyPresent')) for result in results] == [n % 2 == 0 for n in range(8)]
+    assert all(stored(dynamodb, result['enquiryId']) for result in results)
+
+
+def test_duplicate_client_id_in_upload(dynamodb, call):
+    results = upload(call, {**ENQUIRY, 'clientId': 'tablet-1:1'}, {**ENQUIRY, 'clientId': 'tablet-1:1'})
+
+    assert results[1] == {'index': 1, 'success': False, 'error': 'Duplicate clientId in upload'}
+
+
+def test_failed_writes_are_reported(dynamodb, call, monkeypatch):
+    def fail(**kwargs):
+        raise RuntimeError('throttled')
+    monkeypatch.setattr(dynamodb, 'transact_write_items', fail)
+    monkeypatch.setattr(submit_batch_handler, 'BATCH_BACKOFF_BASE_SECONDS', 0)
+
+    results = upload(call, ENQUIRY)
+
+    assert results == [{'index': 0, 'success': False, 'error': 'Failed to store enquiry'}]
+
+
+@pytest.mark.parametrize('body', [{}, {'enquiries': []}, {'enquiries': 'x'}])
+def test_rejects_empty_upload(dynamodb, call, body):
+    assert call(submit_batch_handler, body)[0] == 400
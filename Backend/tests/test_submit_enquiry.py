@@ -0,0 +1,101 @@
+import pytest
+
+import submit_enquiry_handler
+import tokens
+
+PHONE = '+11234567890'
+
+
+@pytest.fixture
+def submit(call):
+    token = tokens.issue_token(PHONE)
+
+    def submit(*names, **fields):
+        children = [{'id': str(n), 'name': name, 'age': '8', 'selectedCourse': 'ucmas'}
+                    for n, name in enumerate(names or ['John Doe'], start=1)]
+        return call(submit_enquiry_handler, {
+            'children': children,
+            'parentName': 'Jane Doe',
+            'contactNumber': '123-456-7890',
+            'consent': True,
+            'verificationToken': token,
+            **fields,
+        })
+    return submit
+
+
+def enquiry(dynamodb, enquiry_id):
+    return dynamodb.get_item(TableName=submit_enquiry_handler.ENQUIRY_TABLE,
+                             Key={'PK': {'S': f'ENQUIRY#{enquiry_id}'}}).get('Item')
+
+
+def enquiry_count(dynamodb):
+    return dynamodb.scan(TableName=submit_enquiry_handler.ENQUIRY_TABLE)['Count']
+
+
+def test_new_enquiry_is_stored(dynamodb, submit):
+    status, body = submit()
+
+    assert status == 200
+    assert body == {'success': True, 'enquiryId': body['enquiryId']}
+    assert enquiry(dynamodb, body['enquiryId'])['phone'] == {'S': PHONE}
+
+
+def test_retry_replays_response(dynamodb, submit):
+    _, first = submit(idempotencyKey='retry-key-1')
+    status, second = submit(idempotencyKey='retry-key-1')
+
+    assert status == 200
+    assert second == first
+    assert enquiry_count(dynamodb) == 1
+
+
+def test_repeat_is_merged(dynamodb, submit):
+    _, first = submit('John Doe')
+    status, repeat = submit(' john  doe ')
+
+    assert status == 200
+    assert repeat == {'success': True, 'enquiryId': first['enquiryId'], 'duplicate': True}
+    assert enquiry_count(dynamodb) == 1
+    assert enquiry(dynamodb, first['enquiryId'])['repeatSubmissions'] == {'N': '1'}
+
+
+def test_retry_of_merged_repeat_replays_without_merging_again(dynamodb, submit):
+    _, first = submit('John Doe')
+    _, repeat = submit('John Doe', idempotencyKey='retry-key-2')
+    status, retry = submit('John Doe', idempotencyKey='retry-key-2')
+
+    assert status == 200
+    assert retry == repeat == {'success': True, 'enquiryId': first['enquiryId'], 'duplicate': True}
+    assert enquiry(dynamodb, first['enquiryId'])['repeatSubmissions'] == {'N': '1'}
+
+
+def test_new_child_is_a_new_enquiry(dynamodb, submit):
+    _, first = submit('John Doe')
+    _, second = submit('John Doe', 'Mary Doe')
+
+    assert 'duplicate' not in second
+    assert second['enquiryId'] != first['enquiryId']
+    assert enquiry_count(dynamodb) == 2
+
+
+def test_repeat_of_deleted_enquiry_is_stored(dynamodb, submit):
+    _, first = submit('John Doe', idempotencyKey='retry-key-3')
+    dynamodb.delete_item(TableName=submit_enquiry_handler.ENQUIRY_TABLE,
+                         Key={'PK': {'S': f"ENQUIRY#{first['enquiryId']}"}})
+
+    _, second = submit('John Doe', idempotencyKey='retry-key-4')
+    _, third = submit('John Doe')
+
+    assert 'duplicate' not in second
+    assert third == {'success': True, 'enquiryId': second['enquiryId'], 'duplicate': True}
+
+
+@pytest.mark.parametrize('fields, status', [
+    ({'verificationToken': None}, 401),
+    ({'verificationToken': 'not-a-token'}, 401),
+    ({'contactNumber': '123-456-0000'}, 403),
+])
+def test_phone_must_be_verified(dynamodb, submit, fields, status):
+    assert submit(**fields)[0] == status
+    assert enquiry_count(dynamodb) == 0
@@ -0,0 +1,176 @@
+import time
+import uuid
+
+import pytest
+
+import otp
+import ratelimit
+import tokens
+import verify_otp_handler
+
+PHONE = '+11234567890'
+
+
+BUCKETS = ratelimit._verify_buckets
+
+
+def fresh_buckets(monkeypatch):
+    """Reset the in-process burst filter to the handler's settings."""
+    monkeypatch.setattr(ratelimit, '_verify_buckets',
+                        ratelimit.TokenBucket(BUCKETS.capacity, BUCKETS.refill_per_second))
+
+
+@pytest.fixture(autouse=True)
+def verify_buckets(monkeypatch):
+    fresh_buckets(monkeypatch)
+
+
+def put_otp(dynamodb, request_id, code, expires_in=300):
+    """Store an OTP# item the way request_otp_handler writes it."""
+    kid, mac = otp.otp_mac(request_id, code)
+    dynamodb.put_item(TableName=verify_otp_handler.OTP_TABLE, Item={
+        'PK': {'S': f'OTP#{request_id}'},
+        'otp_mac': {'B': mac},
+        'kid': {'S': kid},
+        'phone': {'S': PHONE},
+        'TTL': {'N': str(int(time.time()) + expires_in)},
+    })
+
+
+def put_legacy_otp(dynamodb, request_id, code, salt=None, expires_in=300):
+    """Store an OTP# item in the format used before otp_mac."""
+    item = {
+        'PK': {'S': f'OTP#{request_id}'},
+        'phone': {'S': PHONE},
+        'expiresAt': {'N': str(int(time.time()) + expires_in)},
+    }
+    if salt:
+        item['otp_salt'] = {'S': salt}
+        item['otp_hash'] = {'S': otp.legacy_otp_hash(salt, code)}
+    else:
+        item['otp_hash'] = {'S': otp.otp_hash(request_id, code)}
+    dynamodb.put_item(TableName=verify_otp_handler.OTP_TABLE, Item=item)
+
+
+def stored(dynamodb, request_id):
+    return dynamodb.get_item(TableName=verify_otp_handler.OTP_TABLE,
+                             Key={'PK': {'S': f'OTP#{request_id}'}}).get('Item')
+
+
+def test_correct_code_is_consumed(dynamodb, call):
+    request_id = str(uuid.uuid4())
+    put_otp(dynamodb, request_id, '1234')
+
+    status, body = call(verify_otp_handler, {'requestId': request_id, 'otp': '1234'})
+
+    assert status == 200
+    assert body['ok'] is True
+    assert body['expiresIn'] == tokens.VERIFICATION_TOKEN_TTL_SECONDS
+    assert tokens.verify_token(body['verificationToken']) == PHONE
+    assert stored(dynamodb, request_id) is None
+
+
+def test_code_cannot_be_used_twice(dynamodb, call):
+    request_id = str(uuid.uuid4())
+    put_otp(dynamodb, request_id, '1234')
+
+    assert call(verify_otp_handler, {'requestId': request_id, 'otp': '1234'})[0] == 200
+    status, body = call(verify_otp_handler, {'requestId': request_id, 'otp': '1234'})
+
+    assert status == 400
+    assert body['error'] == 'OTP not found or already used'
+
+
+def test_expired_code_is_rejected(dynamodb, call, monkeypatch):
+    # DynamoDB can take days to delete an expired item; keep it readable
+    monkeypatch.setattr(dynamodb, '_evict', lambda: None)
+    request_id = str(uuid.uuid4())
+    put_otp(dynamodb, request_id, '1234', expires_in=-1)
+
+    status, body = call(verify_otp_handler, {'requestId': request_id, 'otp': '1234'})
+
+    assert status == 400
+    assert body['error'] == 'OTP has expired'
+
+
+def test_wrong_code_counts_attempts(dynamodb, call, monkeypatch):
+    request_id = str(uuid.uuid4())
+    put_otp(dynamodb, request_id, '1234')
+
+    for attempt in range(1, ratelimit.OTP_MAX_VERIFY_ATTEMPTS):
+        status, body = call(verify_otp_handler, {'requestId': request_id, 'otp': '0000'})
+        assert (status, body['error']) == (400, 'Invalid OTP code')
+        assert stored(dynamodb, request_id)['verifyAttempts'] == {'N': str(attempt)}
+
+    status, body = call(verify_otp_handler, {'requestId': request_id, 'otp': '0000'})
+    assert (status, body['error']) == (429, 'Too many attempts. Please request a new code.')
+
+    # Once the attempts are used up, even the right code is refused
+    fresh_buckets(monkeypatch)
+    status, body = call(verify_otp_handler, {'requestId': request_id, 'otp': '1234'})
+    assert (status, body['error']) == (429, 'Too many attempts. Please request a new code.')
+    assert stored(dynamodb, request_id) is not None
+
+
+def test_rapid_guesses_are_slowed_down(dynamodb, call, monkeypatch):
+    monkeypatch.setattr(ratelimit, '_verify_buckets', ratelimit.TokenBucket(2, 0))
+    request_id = str(uuid.uuid4())
+    put_otp(dynamodb, request_id, '1234')
+
+    for _ in range(2):
+        assert call(verify_otp_handler, {'requestId': request_id, 'otp': '0000'})[0] == 400
+    status, body = call(verify_otp_handler, {'requestId': request_id, 'otp': '1234'})
+
+    assert status == 429
+    # The app offers a new code on "Too many attempts"; this one can wait
+    assert 'Too many attempts' not in body['error']
+    assert stored(dynamodb, request_id)['verifyAttempts'] == {'N': '2'}
+
+
+def test_unknown_request_id(dynamodb, call):
+    status, body = call(verify_otp_handler, {'requestId': str(uuid.uuid4()), 'otp': '1234'})
+
+    assert status == 400
+    assert body['error'] == 'OTP not found or already used'
+
+
+def test_code_keyed_with_previous_key(dynamodb, call):
+    request_id = str(uuid.uuid4())
+    tokens.set_key_set('old', {'old': 'old-verification-key'})
+    put_otp(dynamodb, request_id, '1234')
+    tokens.set_key_set('new', {'old': 'old-verification-key', 'new': 'new-verification-key'})
+
+    status, body = call(verify_otp_handler, {'requestId': request_id, 'otp': '1234'})
+
+    assert status == 200
+    assert tokens.verify_token(body['verificationToken']) == PHONE
+    assert stored(dynamodb, request_id) is None
+
+
+@pytest.mark.parametrize('salt', [None, 'legacy-salt'])
+def test_legacy_items(dynamodb, call, salt):
+    request_id = str(uuid.uuid4())
+    put_legacy_otp(dynamodb, request_id, '1234', salt=salt)
+
+    status, _ = call(verify_otp_handler, {'requestId': request_id, 'otp': '0000'})
+    assert status == 400
+    assert stored(dynamodb, request_id)['verifyAttempts'] == {'N': '1'}
+
+    status, body = call(verify_otp_handler, {'requestId': request_id, 'otp': '1234'})
+    assert status == 200
+    assert tokens.verify_token(body['verificationToken']) == PHONE
+    assert stored(dynamodb, request_id) is None
+
+    status, _ = call(verify_otp_handler, {'requestId': request_id, 'otp': '1234'})
+    assert status == 400
+
+
+@pytest.mark.parametrize('salt', [None, 'legacy-salt'])
+def test_expired_legacy_item(dynamodb, call, salt):
+    request_id = str(uuid.uuid4())
+    put_legacy_otp(dynamodb, request_id, '1234', salt=salt, expires_in=-1)
+
+    status, body = call(verify_otp_handler, {'requestId': request_id, 'otp': '1234'})
+
+    assert status == 400
+    assert body['error'] == 'OTP has expired'
@@ -1,4 +1,4 @@
-import React, { useState } from 'react';
+import React, { useEffect, useState } from 'react';
 import {
   StyleSheet,
   ScrollView,
@@ -29,7 +29,7 @@ import {
   ContainerWidth,
   moderateScale
 } from '@/constants/theme';
-import { requestOtp } from '@/app/api/api';
+import { AppConfig, getConfig, requestOtp } from '@/app/api/api';
 
 
 
@@ -40,11 +40,33 @@ const obotzLogo = require('@/assets/images/obotz-logo.png');
 
 
 
+// Used until GET /config responds, and if it fails
+const DEFAULT_CONFIG: AppConfig = {
+  courses: [
+    {
+      id: 'imaths',
+      name: 'i-Maths',
+      description: 'i-Maths is an Early Math Enrichment Program designed for children aged 4-7 years. It focuses on building strong mathematical foundations through interactive and engaging activities that make learning math fun and effective.',
+    },
+    {
+      id: 'ucmas',
+      name: 'UCMAS',
+      description: 'UCMAS (Universal Concept of Mental Arithmetic System) is an abacus-based mental math program for children aged 7-13 years. It enhances concentration, memory, and calculation skills through systematic training with the abacus.',
+    },
+    {
+      id: 'obotz',
+      name: 'OBOTZ',
+      description: 'OBOTZ is an AI Robotics & Coding Program designed for children aged 8-18 years. It introduces students to programming, robotics, and artificial intelligence through hands-on projects and interactive learning experiences.',
+    },
+  ],
+  maxChildren: 5,
+};
+
 interface Child {
   id: string;
   name: string;
   age: string;
-  selectedCourse: 'imaths' | 'ucmas' | 'obotz' | '';
+  selectedCourse: string;
 }
 
 interface FormData {
@@ -72,9 +94,18 @@ export default function EnquiryFormScreen() {
   const [selectedCourseInfo, setSelectedCourseInfo] = useState<string>('');
   const [prevPhoneLength, setPrevPhoneLength] = useState(0);
   const [isSubmitting, setIsSubmitting] = useState(false);
+  const [appConfig, setAppConfig] = useState<AppConfig>(DEFAULT_CONFIG);
+
+  useEffect(() => {
+    getConfig()
+      .then(setAppConfig)
+      .catch(() => {
+        // Keep the built-in course list
+      });
+  }, []);
 
   const addChild = () => {
-    if (formData.children.length < 5) {
+    if (formData.children.length < appConfig.maxChildren) {
       const newChild: Child = {
         id: Date.now().toString(),
         name: '',
@@ -106,6 +137,12 @@ export default function EnquiryFormScreen() {
     }));
   };
 
+  // Digits and one decimal separator (4.5); the backend rejects anything else
+  const formatAge = (value: string): string => {
+    const [whole, ...fraction] = value.replace(/[^\d.,]/g, '').split(/[.,]/);
+    return fraction.length ? `${whole || '0'}.${fraction.join('')}` : whole;
+  };
+
   const formatPhoneNumber = (value: string, isDeleting: boolean): string => {
 
     if (isDeleting && value.length === 3) {
@@ -198,14 +235,8 @@ export default function EnquiryFormScreen() {
     }
   };
 
-  const getCourseName = (course: string) => {
-    switch (course) {
-      case 'imaths': return 'i-Maths';
-      case 'ucmas': return 'UCMAS';
-      case 'obotz': return 'OBOTZ';
-      default: return 'Select Course';
-    }
-  };
+  const getCourseName = (course: string) =>
+    appConfig.courses.find(option => option.id === course)?.name ?? 'Select Course';
 
   const getCourseLogo = (course: string) => {
     switch (course) {
@@ -216,17 +247,8 @@ export default function EnquiryFormScreen() {
     }
   };
 
-  const getCourseInfo = (course: string) => {
-    switch (course) {
-      case 'imaths': 
-        return 'i-Maths is an Early Math Enrichment Program designed for children aged 4-7 years. It focuses on building strong mathematical foundations through interactive and engaging activities that make learning math fun and effective.';
-      case 'ucmas': 
-        return 'UCMAS (Universal Concept of Mental Arithmetic System) is an abacus-based mental math program for children aged 7-13 years. It enhances concentration, memory, and calculation skills through systematic training with the abacus.';
-      case 'obotz': 
-        return 'OBOTZ is an AI Robotics & Coding Program designed for children aged 8-18 years. It introduces students to programming, robotics, and artificial intelligence through hands-on projects and interactive learning experiences.';
-      default: return '';
-    }
-  };
+  const getCourseInfo = (course: string) =>
+    appConfig.courses.find(option => option.id === course)?.description ?? '';
 
   const showCourseInfo = (course: string) => {
     setSelectedCourseInfo(getCourseInfo(course));
@@ -263,7 +285,7 @@ export default function EnquiryFormScreen() {
             <View style={styles.section}>
               <View style={styles.sectionHeader}>
                 <Text style={styles.sectionTitle}>Children Information</Text>
-                <Text style={styles.sectionSubtitle}>Add up to 5 children</Text>
+                <Text style={styles.sectionSubtitle}>Add up to {appConfig.maxChildren} children</Text>
               </View>
               
               {formData.children.map((child, index) => (
@@ -296,11 +318,11 @@ export default function EnquiryFormScreen() {
                       <TextInput
                         style={styles.ageInput}
                         value={child.age}
-                        onChangeText={(value) => updateChild(child.id, 'age', value)}
+                        onChangeText={(value) => updateChild(child.id, 'age', formatAge(value))}
                         placeholder="Age"
                         placeholderTextColor={NeutralColors.gray500}
-                        keyboardType="numeric"
-                        maxLength={2}
+                        keyboardType="decimal-pad"
+                        maxLength={4}
                       />
                     </View>
                   </View>
@@ -311,7 +333,7 @@ export default function EnquiryFormScreen() {
                       <Text style={styles.inputLabel}>Select Course <Text style={styles.requiredAsterisk}>*</Text></Text>
                     </View>
                     <View style={styles.courseOptions}>
-                      {['imaths', 'ucmas', 'obotz'].map((course) => (
+                      {appConfig.courses.map(({ id: course }) => (
                         <View key={course} style={styles.courseOptionContainer}>
                           <TouchableOpacity
                             style={[
@@ -345,7 +367,7 @@ export default function EnquiryFormScreen() {
               ))}
 
               {/* Add Child Button */}
-              {formData.children.length < 5 && (
+              {formData.children.length < appConfig.maxChildren && (
                 <TouchableOpacity style={styles.addChildButton} onPress={addChild}>
                   <Text style={styles.addChildButtonText}>+ Add Another Child</Text>
                 </TouchableOpacity>
@@ -25,10 +25,19 @@ import {
   ContainerWidth,
   moderateScale
 } from '@/constants/theme';
-import { verifyOtp, submitEnquiry, requestOtp } from '@/app/api/api';
+import {
+  verifyOtp,
+  submitEnquiry,
+  requestOtp,
+  getOtpStatus,
+  createIdempotencyKey,
+  ApiRequestError,
+} from '@/app/api/api';
 
 const OTP_LENGTH = 4;
 const TIMER_DURATION = 300; // 5 minutes in seconds
+const STATUS_POLL_INTERVAL = 3000; // ms between SMS delivery status checks
+const STATUS_POLL_ATTEMPTS = 5;
 
 export default function VerifyScreen() {
   const params = useLocalSearchParams();
@@ -54,6 +63,11 @@ export default function VerifyScreen() {
   // Refs for OTP inputs
   const inputRefs = useRef<(TextInput | null)[]>([]);
   
+  // Kept across retries: a verified code can't be verified again, and the
+  // same idempotency key lets the backend drop duplicate submissions
+  const verificationTokenRef = useRef<string | null>(null);
+  const idempotencyKeyRef = useRef<string>(createIdempotencyKey());
+  
   // Timer effect
   useEffect(() => {
     if (timeLeft <= 0) {
@@ -74,6 +88,39 @@ export default function VerifyScreen() {
     return () => clearInterval(timer);
   }, [timeLeft]);
   
+  // Poll SMS delivery status so a failed send can be resent right away
+  useEffect(() => {
+    if (!requestId) return;
+    
+    let attempts = 0;
+    let cancelled = false;
+    
+    const poll = setInterval(async () => {
+      attempts += 1;
+      try {
+        const { deliveryStatus } = await getOtpStatus(requestId);
+        if (cancelled) return;
+        if (deliveryStatus === 'failed') {
+          setError('We could not send your code. Please tap resend.');
+          setCanResend(true);
+        }
+        if (deliveryStatus === 'sent' || deliveryStatus === 'failed') {
+          clearInterval(poll);
+        }
+      } catch (err) {
+        // Status is informational only; keep waiting for the code
+      }
+      if (attempts >= STATUS_POLL_ATTEMPTS) {
+        clearInterval(poll);
+      }
+    }, STATUS_POLL_INTERVAL);
+    
+    return () => {
+      cancelled = true;
+      clearInterval(poll);
+    };
+  }, [requestId]);
+  
   // Focus first input on mount
   useEffect(() => {
     setTimeout(() => {
@@ -145,12 +192,15 @@ export default function VerifyScreen() {
     setError('');
     
     try {
-      // Step 1: Verify OTP
-      await verifyOtp(requestId, otpCode);
+      // Step 1: Verify OTP (skipped when retrying a failed submit)
+      if (!verificationTokenRef.current) {
+        const { verificationToken } = await verifyOtp(requestId, otpCode);
+        verificationTokenRef.current = verificationToken;
+      }
       
       // Step 2: Submit enquiry
       setIsSubmitting(true);
-      await submitEnquiry(formData);
+      await submitEnquiry(formData, verificationTokenRef.current, idempotencyKeyRef.current);
       
       // Success!
       Alert.alert(
@@ -171,13 +221,24 @@ export default function VerifyScreen() {
       
       // Display user-friendly error messages
       const errorMessage = err.message || 'Verification failed';
+      const fields = err instanceof ApiRequestError ? err.fields : {};
       
-      if (errorMessage.includes('expired')) {
+      if (fields.body) {
+        // Rejected by API Gateway before reaching the backend
+        setError('Please check the form and try again.');
+      } else if (Object.keys(fields).length) {
+        setError(Object.values(fields).join('\n'));
+      } else if (errorMessage.includes('expired')) {
         setError('Your code has expired. Please request a new one.');
       } else if (errorMessage.includes('Invalid OTP')) {
         setError('Invalid code. Please check and try again.');
       } else if (errorMessage.includes('not found')) {
         setError('Code not found. Please request a new one.');
+      } else if (errorMessage.includes('Too many attempts')) {
+        setError('Too many attempts. Please request a new code.');
+        setCanResend(true);
+      } else if (errorMessage.includes('Slow down')) {
+        setError('Please wait a few seconds and try again.');
       } else {
         setError('Verification failed. Please try again.');
       }
@@ -6,27 +6,97 @@ const getHeaders = () => ({
   'x-api-key': API_KEY,
 });
 
+/**
+ * Create a key identifying one enquiry submission, so retries of the same
+ * submission are recognised by the backend and not stored twice
+ */
+export const createIdempotencyKey = () =>
+  `${Date.now().toString(36)}-${Math.random().toString(36).slice(2, 12)}-${Math.random().toString(36).slice(2, 12)}`;
+
 // ===== API Response Types =====
 
+export type OtpDeliveryStatus = 'queued' | 'retrying' | 'sent' | 'failed';
+
 export interface RequestOtpResponse {
   requestId: string;
+  deliveryStatus: OtpDeliveryStatus;
+}
+
+export interface OtpStatusResponse {
+  requestId: string;
+  deliveryStatus: OtpDeliveryStatus;
 }
 
 export interface VerifyOtpResponse {
   ok: boolean;
+  verificationToken: string;
+  expiresIn: number;
 }
 
 export interface SubmitEnquiryResponse {
   success: boolean;
   enquiryId: string;
+  // Set when the submission repeated an earlier enquiry and was merged into it
+  duplicate?: boolean;
+}
+
+export interface CourseConfig {
+  id: string;
+  name: string;
+  description: string;
+}
+
+export interface AppConfig {
+  courses: CourseConfig[];
+  maxChildren: number;
 }
 
 export interface ApiError {
   error: string;
+  // Validation messages keyed by field path, e.g. "children[0].age". A body
+  // rejected by API Gateway's model check is reported under "body"
+  fields?: Record<string, string>;
+}
+
+/**
+ * Error thrown for a failed API response, keeping its validation messages
+ */
+export class ApiRequestError extends Error {
+  fields: Record<string, string>;
+
+  constructor(data: Partial<ApiError>, fallback: string) {
+    super(data.error || fallback);
+    this.name = 'ApiRequestError';
+    this.fields = data.fields || {};
+  }
 }
 
 // ===== API Functions =====
 
+/**
+ * Get the course list and form limits
+ * @returns Promise with the app configuration
+ */
+export const getConfig = async (): Promise<AppConfig> => {
+  try {
+    const response = await fetch(`${API_URL}/config`, {
+      method: 'GET',
+      headers: getHeaders(),
+    });
+
+    const data = await response.json();
+
+    if (!response.ok) {
+      throw new ApiRequestError(data, 'Failed to load configuration');
+    }
+
+    return data;
+  } catch (error) {
+    console.error('Get config error:', error);
+    throw error;
+  }
+};
+
 /**
  * Request OTP for phone number verification
  * @param phone - Phone number in format XXX-XXX-XXXX (will be converted to E.164 format)
@@ -49,7 +119,7 @@ export const requestOtp = async (phone: string): Promise<RequestOtpResponse> =>
     const data = await response.json();
 
     if (!response.ok) {
-      throw new Error(data.error || 'Failed to request OTP');
+      throw new ApiRequestError(data, 'Failed to request OTP');
     }
 
     return data;
@@ -59,12 +129,37 @@ export const requestOtp = async (phone: string): Promise<RequestOtpResponse> =>
   }
 };
 
+/**
+ * Get the SMS delivery status of a requested OTP
+ * @param requestId - The request ID from requestOtp
+ * @returns Promise with the delivery status
+ */
+export const getOtpStatus = async (requestId: string): Promise<OtpStatusResponse> => {
+  try {
+    const response = await fetch(`${API_URL}/request/${encodeURIComponent(requestId)}`, {
+      method: 'GET',
+      headers: getHeaders(),
+    });
+
+    const data = await response.json();
+
+    if (!response.ok) {
+      throw new ApiRequestError(data, 'Failed to get OTP status');
+    }
+
+    return data;
+  } catch (error) {
+    console.error('Get OTP status error:', error);
+    throw error;
+  }
+};
+
 /**
  * Verify OTP code
  * @param requestId - The request ID from requestOtp
  * @param phone - Phone number in format XXX-XXX-XXXX
  * @param otp - 4-digit OTP code
- * @returns Promise with ok status
+ * @returns Promise with ok status and the verification token required by submitEnquiry
  */
 export const verifyOtp = async (
   requestId: string,
@@ -87,7 +182,7 @@ export const verifyOtp = async (
     const data = await response.json();
 
     if (!response.ok) {
-      throw new Error(data.error || 'Failed to verify OTP');
+      throw new ApiRequestError(data, 'Failed to verify OTP');
     }
 
     return data;
@@ -100,20 +195,32 @@ export const verifyOtp = async (
 /**
  * Submit enquiry form data
  * @param formData - Complete form data object
+ * @param verificationToken - Token returned by verifyOtp for the form's contact number
+ * @param idempotencyKey - Key from createIdempotencyKey, reused when retrying the same submission
  * @returns Promise with success status and enquiryId
  */
-export const submitEnquiry = async (formData: any): Promise<SubmitEnquiryResponse> => {
+export const submitEnquiry = async (
+  formData: any,
+  verificationToken: string,
+  idempotencyKey: string
+): Promise<SubmitEnquiryResponse> => {
   try {
     const response = await fetch(`${API_URL}/submit`, {
       method: 'POST',
-      headers: getHeaders(),
-      body: JSON.stringify(formData),
+      headers: {
+        ...getHeaders(),
+        'Idempotency-Key': idempotencyKey,
+      },
+      body: JSON.stringify({
+        ...formData,
+        verificationToken,
+      }),
     });
 
     const data = await response.json();
 
     if (!response.ok) {
-      throw new Error(data.error || 'Failed to submit enquiry');
+      throw new ApiRequestError(data, 'Failed to submit enquiry');
     }
 
     return data;